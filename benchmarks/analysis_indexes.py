@@ -0,0 +1,141 @@
+"""Compare analysis report timings on a synthetic SQLite database with and without the analytical indexes.
+
+Run from the repository root after `pip install -e .`:
+
+    python benchmarks/analysis_indexes.py --rows 200000
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from sqlalchemy import Connection, Engine, insert, text
+
+from automotive_data_project.analysis.reports import (
+    mean_price_by_fuel,
+    mean_price_by_mileage_bucket,
+    median_price_by_year,
+    offer_count_by_make_model,
+)
+from automotive_data_project.storage.database import init_schema, make_engine
+from automotive_data_project.storage.migrations import ANALYTICAL_INDEXES
+from automotive_data_project.storage.models import Listing
+
+MAKES = {
+    "Toyota": ["Corolla", "Yaris", "RAV4", "Auris", "C-HR"],
+    "Volkswagen": ["Golf", "Passat", "Polo", "Tiguan"],
+    "Skoda": ["Octavia", "Fabia", "Superb"],
+    "BMW": ["Seria 3", "Seria 5", "X3"],
+    "Ford": ["Focus", "Mondeo", "Fiesta"],
+}
+FUELS = ["Benzyna", "Diesel", "Hybryda", "Elektryczny", "Benzyna+LPG"]
+
+REPORTS = {
+    "median_price_by_year": median_price_by_year,
+    "mean_price_by_fuel": mean_price_by_fuel,
+    "offer_count_by_make_model": offer_count_by_make_model,
+    "mean_price_by_mileage_bucket": mean_price_by_mileage_bucket,
+}
+
+QUERIES = {
+    "segment_filter": (
+        "SELECT COUNT(*), AVG(price) FROM listings "
+        "WHERE make = 'Toyota' AND model = 'Corolla' AND production_year BETWEEN 2018 AND 2020"
+    ),
+    "recently_seen": "SELECT COUNT(*) FROM listings WHERE last_seen_at >= :since",
+}
+
+
+def populate(engine: Engine, rows: int, seed: int = 7) -> None:
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    batch: list[dict[str, object]] = []
+    with engine.begin() as conn:
+        for index in range(rows):
+            make = rng.choice(list(MAKES))
+            year = rng.randint(2005, 2024)
+            seen = now - timedelta(days=rng.randint(0, 365))
+            batch.append(
+                {
+                    "advert_id": str(index),
+                    "source": "otomoto",
+                    "source_url": f"https://example.test/{index}",
+                    "make": make,
+                    "model": rng.choice(MAKES[make]),
+                    "production_year": year,
+                    "price": None if rng.random() < 0.1 else rng.randint(8_000, 250_000),
+                    "currency": "PLN",
+                    "mileage_km": rng.randint(0, 400_000),
+                    "fuel_type": rng.choice(FUELS),
+                    "first_seen_at": seen,
+                    "last_seen_at": seen,
+                }
+            )
+            if len(batch) == 10_000:
+                conn.execute(insert(Listing), batch)
+                batch.clear()
+        if batch:
+            conn.execute(insert(Listing), batch)
+        conn.exec_driver_sql("ANALYZE")
+
+
+def _best_of(repeat: int, run) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def time_queries(engine: Engine, repeat: int) -> dict[str, float]:
+    since = datetime.now(timezone.utc) - timedelta(days=7)
+    timings: dict[str, float] = {}
+    with engine.connect() as conn:
+        for name, report in REPORTS.items():
+            timings[name] = _best_of(repeat, lambda report=report: report(conn))
+        for name, sql in QUERIES.items():
+            timings[name] = _best_of(repeat, lambda sql=sql: _run_sql(conn, sql, since))
+    return timings
+
+
+def _run_sql(conn: Connection, sql: str, since: datetime) -> None:
+    conn.execute(text(sql), {"since": since}).all()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = make_engine(f"sqlite+pysqlite:///{Path(tmp) / 'bench.sqlite3'}")
+        init_schema(engine)
+        with engine.begin() as conn:
+            for name in ANALYTICAL_INDEXES:
+                conn.exec_driver_sql(f"DROP INDEX {name}")
+        populate(engine, args.rows)
+        without = time_queries(engine, args.repeat)
+
+        with engine.begin() as conn:
+            for index in Listing.__table__.indexes:
+                if index.name in ANALYTICAL_INDEXES:
+                    index.create(conn)
+            conn.exec_driver_sql("ANALYZE")
+        indexed = time_queries(engine, args.repeat)
+        engine.dispose()
+
+    print(f"{'query':<30}{'no index ms':>14}{'indexed ms':>14}{'speedup':>10}")
+    for name in without:
+        speedup = without[name] / indexed[name] if indexed[name] else float("inf")
+        print(f"{name:<30}{without[name] * 1000:>14.2f}{indexed[name] * 1000:>14.2f}{speedup:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Time the vectorised equipment relation builder on synthetic listings, optionally against the row-wise one.
+
+Run from the repository root with pandas installed:
+
+    python benchmarks/equipment_relations.py --listings 1000000
+    python benchmarks/equipment_relations.py --listings 100000 --compare-rowwise
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from scripts.utils.equipment_utils import (  # noqa: E402
+    EXCLUDED_EQUIPMENT_SECTIONS,
+    build_equipment_df,
+    explode_equipment,
+    listing_equipment_arrays,
+)
+
+OPTIONS_CSV = Path(__file__).resolve().parents[1] / "src" / "automotive_data_project" / "data" / "equipment_options.csv"
+
+
+def option_names() -> list[str]:
+    names = pd.read_csv(OPTIONS_CSV, keep_default_na=False)["name"]
+    return [name for name in names if name]
+
+
+def synthetic_equipment(listings: int, options: list[str], mean_items: int, seed: int = 7) -> pd.Series:
+    """Raw '|'-joined equipment strings with mixed case, padding and section headers, like the exports."""
+    rng = np.random.default_rng(seed)
+    vocabulary = np.asarray([*options, *(section.title() for section in EXCLUDED_EQUIPMENT_SECTIONS)], dtype=object)
+    counts = rng.poisson(mean_items, size=listings)
+    picks = vocabulary[rng.integers(0, len(vocabulary), size=int(counts.sum()))]
+    bounds = np.cumsum(counts)[:-1]
+    return pd.Series(["|".join(items) for items in np.split(picks, bounds)])
+
+
+def rowwise_relations(equipment: pd.Series, equipment_df: pd.DataFrame) -> int:
+    """The previous implementation: a Python lambda per row and iterrows over the listings."""
+    lists = equipment.fillna("").apply(
+        lambda x: list(
+            {item.strip().lower() for item in x.split("|") if item.strip().lower() not in EXCLUDED_EQUIPMENT_SECTIONS}
+        )
+    )
+    frame = pd.DataFrame({"local_id": np.arange(1, len(lists) + 1), "equipment_list": lists})
+    equipment_map = dict(zip(equipment_df["name"], equipment_df["id"], strict=True))
+    records = []
+    for _, row in frame.iterrows():
+        for name in row["equipment_list"]:
+            equipment_id = equipment_map.get(name)
+            if equipment_id is not None:
+                records.append({"listing_id": row["local_id"], "equipment_id": equipment_id})
+    return len(pd.DataFrame(records))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--listings", type=int, default=1_000_000)
+    parser.add_argument("--mean-items", type=int, default=25)
+    parser.add_argument("--compare-rowwise", action="store_true")
+    args = parser.parse_args()
+
+    equipment = synthetic_equipment(args.listings, option_names(), args.mean_items)
+    local_ids = np.arange(1, len(equipment) + 1)
+
+    started = time.perf_counter()
+    exploded = explode_equipment(equipment)
+    equipment_df = build_equipment_df([exploded["name"].unique()])
+    listing_ids, equipment_ids = listing_equipment_arrays(local_ids, exploded, equipment_df)
+    vectorised = time.perf_counter() - started
+    size_mb = (listing_ids.nbytes + equipment_ids.nbytes) / 1_000_000
+    print(
+        f"vectorised: {args.listings} listings, {len(listing_ids)} pairs, "
+        f"{len(equipment_df)} options in {vectorised:.2f}s ({size_mb:.1f} MB of int32 arrays)"
+    )
+
+    if args.compare_rowwise:
+        started = time.perf_counter()
+        pairs = rowwise_relations(equipment, equipment_df)
+        rowwise = time.perf_counter() - started
+        print(f"row-wise:   {pairs} pairs in {rowwise:.2f}s ({rowwise / vectorised:.1f}x slower)")
+
+
+if __name__ == "__main__":
+    main()
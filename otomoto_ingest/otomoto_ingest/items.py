@@ -3,10 +3,30 @@
 # See documentation in:
 # https://docs.scrapy.org/en/latest/topics/items.html
 
+from dataclasses import fields
+
 import scrapy
+from itemadapter import ItemAdapter
+
+from automotive_data_project.scraping.models import RawListing
 
 
 class OtomotoIngestItem(scrapy.Item):
-    # define the fields for your item here like:
-    # name = scrapy.Field()
-    pass
+    # Same fields as automotive_data_project.scraping.models.RawListing
+    advert_id = scrapy.Field()
+    source = scrapy.Field()
+    source_url = scrapy.Field()
+    scraped_at = scrapy.Field()
+    raw_fields = scrapy.Field()
+    equipment = scrapy.Field()
+    price_raw = scrapy.Field()
+    currency = scrapy.Field()
+    advert_date_raw = scrapy.Field()
+
+    @classmethod
+    def from_raw_listing(cls, raw):
+        return cls({field.name: getattr(raw, field.name) for field in fields(RawListing)})
+
+    def to_raw_listing(self):
+        adapter = ItemAdapter(self)
+        return RawListing(**{field.name: adapter[field.name] for field in fields(RawListing) if field.name in adapter})
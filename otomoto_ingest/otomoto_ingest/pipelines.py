@@ -3,11 +3,75 @@
 # Don't forget to add your pipeline to the ITEM_PIPELINES setting
 # See: https://docs.scrapy.org/en/latest/topics/item-pipeline.html
 
+from twisted.internet.defer import DeferredLock, succeed
+from twisted.internet.threads import deferToThread
 
-# useful for handling different item types with a single interface
-from itemadapter import ItemAdapter
+from automotive_data_project.config import AppConfig
+from automotive_data_project.storage.database import init_schema, make_engine, make_session_factory
+from automotive_data_project.storage.repositories import ListingRepository
+from automotive_data_project.transformation.normalization import normalize_listing
 
 
 class OtomotoIngestPipeline:
+    """
+    Normalize scraped listings and upsert them into the listings table in batches.
+    Database writes run in the reactor's thread pool, one batch at a time, so the crawl keeps
+    downloading while a batch is written and the aggregates never see two writers of ours at once.
+    """
+
+    def __init__(self, database_url, database_profile, batch_size, stats=None):
+        self.database_url = database_url
+        self.database_profile = database_profile
+        self.batch_size = batch_size
+        self.stats = stats
+        self.buffer = []
+        self.lock = DeferredLock()
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        # Fall back to the same DATABASE_URL / DATABASE_PROFILE environment the CLI reads
+        defaults = AppConfig.from_env()
+        return cls(
+            database_url=settings.get("LISTINGS_DATABASE_URL") or defaults.database_url,
+            database_profile=settings.get("LISTINGS_DATABASE_PROFILE") or defaults.database_profile,
+            batch_size=settings.getint("LISTINGS_BATCH_SIZE", 200),
+            stats=crawler.stats,
+        )
+
+    def open_spider(self, spider):
+        self.engine = make_engine(self.database_url, self.database_profile)
+        init_schema(self.engine)
+        self.session_factory = make_session_factory(self.engine)
+
     def process_item(self, item, spider):
-        return item
+        self.buffer.append(normalize_listing(item.to_raw_listing()))
+        if len(self.buffer) < self.batch_size:
+            return item
+        # Returning the Deferred holds this item until its batch is stored, which throttles the
+        # spider when the database falls behind instead of letting the buffer grow
+        return self.flush(spider).addCallback(lambda _: item)
+
+    def close_spider(self, spider):
+        return self.flush(spider).addBoth(self._dispose)
+
+    def flush(self, spider):
+        if not self.buffer:
+            return succeed(0)
+        batch, self.buffer = self.buffer, []
+        deferred = self.lock.run(deferToThread, self._write, batch)
+        return deferred.addCallback(self._saved, spider)
+
+    def _write(self, batch):
+        with self.session_factory.begin() as session:
+            return ListingRepository(session).upsert_many(batch)
+
+    def _saved(self, saved, spider):
+        spider.logger.info(f"Upserted {saved} listings")
+        if self.stats is not None:
+            self.stats.inc_value("listings/saved", saved)
+        return saved
+
+    def _dispose(self, result):
+        self.engine.dispose()
+        return result
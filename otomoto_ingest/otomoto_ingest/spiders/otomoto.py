@@ -1,7 +1,11 @@
 import scrapy
 import os
+from scrapy.exceptions import CloseSpider
 from scrapy_playwright.page import PageMethod
 
+from automotive_data_project.scraping.parser import is_captcha_html, parse_listing_page, parse_offer_page
+from otomoto_ingest.items import OtomotoIngestItem
+
 class OtomotoRawSpider(scrapy.Spider):
     name = "otomoto_raw"
     MAX_PAGES = 5  # how many pages to fetch
@@ -28,7 +32,8 @@ class OtomotoRawSpider(scrapy.Spider):
 
     def parse(self, response):
         """
-        Save the raw HTML of each listing page to raw_data/page_{n}.html.
+        Save the raw HTML of each listing page to raw_data/page_{n}.html
+        and follow every advert on it.
         """
         page = response.meta['page']
         filename = f"page_{page}.html"
@@ -37,4 +42,18 @@ class OtomotoRawSpider(scrapy.Spider):
         path = os.path.join('..', 'raw_data', filename)
         with open(path, 'wb') as f:
             f.write(response.body)
-        self.log(f"Saved raw HTML to {path}")
\ No newline at end of file
+        self.log(f"Saved raw HTML to {path}")
+
+        for ref in parse_listing_page(response.text):
+            yield response.follow(ref.url, callback=self.parse_offer, cb_kwargs={'advert_id': ref.advert_id})
+
+    def parse_offer(self, response, advert_id):
+        """
+        Parse one detail page with the shared parser; OtomotoIngestPipeline stores the item.
+        A CAPTCHA page yields nothing and closes the spider, like BlockedByCaptcha in the pipeline.
+        """
+        if is_captcha_html(response.text):
+            self.logger.warning(f"CAPTCHA on {response.url}; stopping the crawl")
+            raise CloseSpider("captcha")
+        raw = parse_offer_page(response.text, source_url=response.url, advert_id=advert_id)
+        yield OtomotoIngestItem.from_raw_listing(raw)
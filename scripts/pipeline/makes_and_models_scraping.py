@@ -217,12 +217,12 @@ try:
     print("Brands:", brand_names)
 
     # Optional: Save the brand names to a text file for further analysis
-    with open("data/make_names.txt", "w", encoding="utf-8") as f:
+    with open("src/automotive_data_project/data/make_names.txt", "w", encoding="utf-8") as f:
         for brand in brand_names:
             f.write(brand + "\n")
 
     # Prepare the CSV file for saving the Brand-Model pairs
-    csv_file = open("data/brands_and_models.csv", mode="w", newline="", encoding="utf-8")
+    csv_file = open("src/automotive_data_project/data/brands_and_models.csv", mode="w", newline="", encoding="utf-8")
     csv_writer = csv.writer(csv_file)
     csv_writer.writerow(["Brand", "Model"])  # Column headers
 
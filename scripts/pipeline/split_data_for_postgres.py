@@ -1,3 +1,4 @@
+import argparse
 import pandas as pd
 import numpy as np
 import os
@@ -7,11 +8,17 @@ from itertools import chain
 import sys
 from pathlib import Path
 sys.path.append(str(Path(__file__).resolve().parents[2]))
+sys.path.append(str(Path(__file__).resolve().parents[2] / "src"))
+from automotive_data_project.analysis.loader import DTYPE_CONVERSION, apply_dtypes
 from scripts.utils.equipment_utils import (
-    extract_equipment_list,
+    explode_equipment,
     build_equipment_df,
-    generate_listing_equipment_relations
+    load_equipment_ids,
+    update_equipment_ids,
+    equipment_ids_to_df,
+    listing_equipment_arrays
 )
+from scripts.utils.fingerprint_utils import FingerprintStore, row_fingerprints
 from scripts.utils.data_cleaning_utils import (
     clean_battery_capacity,
     clean_range_column,
@@ -26,208 +33,265 @@ from scripts.utils.data_cleaning_utils import (
     clean_max_electric_power_column
 )
 
-# Load the merged dataset from CSV
-data_dir = Path(os.environ.get("DATA_DIR", "data"))
-
-df = pd.read_csv(
-    data_dir / 'merged01.csv',
-    dtype={
-        'Pojemność baterii': str,
-        'Autonomia': str,
-        'Średnie zużycie': str,
-        'Kondycja baterii': str,
-        'Typ złącza ładowania': str,
-        'advert_date': str
+# Raw columns read as strings so every chunk parses them the same way
+RAW_DTYPES = {
+    'Pojemność baterii': str,
+    'Autonomia': str,
+    'Średnie zużycie': str,
+    'Kondycja baterii': str,
+    'Typ złącza ładowania': str,
+    'advert_date': str,
+    'price': str
+}
+
+
+def clean_frame(df):
+    """
+    Clean, rename and convert one frame (the whole file or a single chunk).
+    Returns the cleaned frame and the list of columns that could not be converted.
+    """
+    # Clean and convert various specification columns
+    # Battery capacity to numeric kWh
+    df['Pojemność_baterii_kWh'] = clean_battery_capacity(df['Pojemność baterii'])
+    del df['Pojemność baterii']
+
+    # Range (Autonomia) to numeric km
+    df['Autonomia_km'] = clean_range_column(df['Autonomia'])
+    del df['Autonomia']
+
+    # Engine displacement (cm3)
+    df['engine_capacity_cm3'] = clean_engine_displacement(df['Pojemność skokowa'])
+    del df['Pojemność skokowa']
+
+    # Power in horsepower
+    df['power_hp'] = clean_moc_column(df['Moc'])
+    del df['Moc']
+
+    # CO2 emissions in g/km
+    df['co2_emissions_gpkm'] = clean_co2_emissions_column(df['Emisja CO2'])
+    del df['Emisja CO2']
+
+    # Urban and extra-urban fuel consumption (L/100km)
+    df['urban_fuel_consumption_l_per_100km'] = clean_urban_fuel_column(df['Spalanie W Mieście'])
+    del df['Spalanie W Mieście']
+    df['extraurban_fuel_consumption_l_per_100km'] = clean_extraurban_fuel_column(df['Spalanie Poza Miastem'])
+    del df['Spalanie Poza Miastem']
+
+    # Mileage in kilometers
+    df['mileage_km'] = clean_mileage_column(df['Przebieg'])
+    del df['Przebieg']
+
+    # Average energy consumption (kWh/100km)
+    df['average_energy_consumption_kwh_per_100km'] = clean_avg_energy_consumption_column(df['Średnie zużycie'])
+    del df['Średnie zużycie']
+
+    # Battery health as percentage
+    df['battery_health_percent'] = clean_battery_health_column(df['Kondycja baterii'])
+    del df['Kondycja baterii']
+
+    # Maximum electric power in HP
+    df['max_electric_power_hp'] = clean_max_electric_power_column(df['Elektryczna moc maksymalna HP'])
+    del df['Elektryczna moc maksymalna HP']
+
+    # Clean price column: remove spaces, replace commas, convert to float
+    df['price'] = (
+        df['price']
+        .str.replace(' ', '', regex=False)
+        .str.replace(',', '.', regex=False)
+        .apply(pd.to_numeric, errors='coerce')
+    )
+
+    # Map Polish month names to numeric strings for advert_date parsing
+    month_map = {
+        'stycznia': '01', 'lutego': '02', 'marca': '03', 'kwietnia': '04',
+        'maja': '05', 'czerwca': '06', 'lipca': '07', 'sierpnia': '08',
+        'września': '09', 'października': '10', 'listopada': '11', 'grudnia': '12'
     }
-)
 
-# Clean and convert various specification columns
-# Battery capacity to numeric kWh
-df['Pojemność_baterii_kWh'] = clean_battery_capacity(df['Pojemność baterii'])
-df = df.drop('Pojemność baterii', axis=1)
-
-# Range (Autonomia) to numeric km
-df['Autonomia_km'] = clean_range_column(df['Autonomia'])
-df = df.drop('Autonomia', axis=1)
-
-# Engine displacement (cm3)
-df['engine_capacity_cm3'] = clean_engine_displacement(df['Pojemność skokowa'])
-df = df.drop('Pojemność skokowa', axis=1)
-
-# Power in horsepower
-df['power_hp'] = clean_moc_column(df['Moc'])
-df = df.drop('Moc', axis=1)
-
-# CO2 emissions in g/km
-df['co2_emissions_gpkm'] = clean_co2_emissions_column(df['Emisja CO2'])
-df = df.drop('Emisja CO2', axis=1)
-
-# Urban and extra-urban fuel consumption (L/100km)
-df['urban_fuel_consumption_l_per_100km'] = clean_urban_fuel_column(df['Spalanie W Mieście'])
-df = df.drop('Spalanie W Mieście', axis=1)
-df['extraurban_fuel_consumption_l_per_100km'] = clean_extraurban_fuel_column(df['Spalanie Poza Miastem'])
-df = df.drop('Spalanie Poza Miastem', axis=1)
-
-# Mileage in kilometers
-df['mileage_km'] = clean_mileage_column(df['Przebieg'])
-df = df.drop('Przebieg', axis=1)
-
-# Average energy consumption (kWh/100km)
-df['average_energy_consumption_kwh_per_100km'] = clean_avg_energy_consumption_column(df['Średnie zużycie'])
-df = df.drop('Średnie zużycie', axis=1)
-
-# Battery health as percentage
-df['battery_health_percent'] = clean_battery_health_column(df['Kondycja baterii'])
-df = df.drop('Kondycja baterii', axis=1)
-
-# Maximum electric power in HP
-df['max_electric_power_hp'] = clean_max_electric_power_column(df['Elektryczna moc maksymalna HP'])
-df = df.drop('Elektryczna moc maksymalna HP', axis=1)
-
-# Clean price column: remove spaces, replace commas, convert to float
-df['price'] = (
-    df['price']
-    .str.replace(' ', '', regex=False)
-    .str.replace(',', '.', regex=False)
-    .apply(pd.to_numeric, errors='coerce')
-)
+    # Replace Polish month names in advert_date string
+    for pl, num in month_map.items():
+        df['advert_date'] = df['advert_date'].str.replace(pl, num, regex=False)
+
+    # Convert advert_date to datetime type
+    df['advert_date'] = pd.to_datetime(df['advert_date'], format='%d %m %Y %H:%M')
+
+    # Rename columns from Polish to English identifiers
+    column_mapping = {
+        'Marka pojazdu': 'make', 'Model pojazdu': 'model', 'Wersja': 'version',
+        'Kolor': 'color', 'Liczba drzwi': 'number_of_doors', 'Liczba miejsc': 'number_of_seats',
+        'Rok produkcji': 'production_year', 'Generacja': 'generation', 'Rodzaj paliwa': 'fuel_type',
+        'Typ nadwozia': 'body_type', 'Rodzaj koloru': 'color_type', 'Skrzynia biegów': 'transmission',
+        'Napęd': 'drive_type', 'Kraj pochodzenia': 'country_of_origin', 'Numer rejestracyjny pojazdu': 'registration_number',
+        'Stan': 'condition', 'Bezwypadkowy': 'accident_free',
+        'Data pierwszej rejestracji w historii pojazdu': 'first_registration_date',
+        'Zarejestrowany w Polsce': 'registered_in_poland', 'Pierwszy właściciel (od nowości)': 'first_owner',
+        'Serwisowany w ASO': 'serviced_at_authorized_station', 'Ma numer rejestracyjny': 'has_registration_number',
+        'Typ złącza ładowania': 'charging_connector_type', 'Liczba silników': 'number_of_engines',
+        'Odzyskiwanie energii hamowania': 'brake_energy_recovery', 'Liczba baterii': 'number_of_batteries',
+        'equipment': 'equipment', 'price': 'price', 'currency': 'currency', 'price_level': 'price_level',
+        'advert_date': 'advert_date', 'advert_id': 'advert_id', 'description': 'description',
+        'Pojemność_baterii_kWh': 'battery_capacity_kwh', 'Autonomia_km': 'range_km',
+        'engine_capacity_cm3': 'engine_capacity_cm3', 'power_hp': 'power_hp',
+        'co2_emissions_gpkm': 'co2_emissions_gpkm',
+        'urban_fuel_consumption_l_per_100km': 'urban_fuel_consumption_l_per_100km',
+        'extraurban_fuel_consumption_l_per_100km': 'extraurban_fuel_consumption_l_per_100km',
+        'mileage_km': 'mileage_km', 'average_energy_consumption_kwh_per_100km': 'average_energy_consumption_kwh_per_100km',
+        'battery_health_percent': 'battery_health_percent', 'max_electric_power_hp': 'max_electric_power_hp'
+    }
 
-# Map Polish month names to numeric strings for advert_date parsing
-month_map = {
-    'stycznia': '01', 'lutego': '02', 'marca': '03', 'kwietnia': '04',
-    'maja': '05', 'czerwca': '06', 'lipca': '07', 'sierpnia': '08',
-    'września': '09', 'października': '10', 'listopada': '11', 'grudnia': '12'
-}
+    df.rename(columns=column_mapping, inplace=True)
 
-# Replace Polish month names in advert_date string
-for pl, num in month_map.items():
-    df['advert_date'] = df['advert_date'].str.replace(pl, num, regex=False)
-
-# Convert advert_date to datetime type
-df['advert_date'] = pd.to_datetime(df['advert_date'], format='%d %m %Y %H:%M')
-
-# Identify text, numeric, and date columns
-text_cols = df.select_dtypes(include='object').columns
-num_cols = df.select_dtypes(include=['float64', 'int64']).columns
-date_cols = df.select_dtypes(include='datetime64[ns]').columns
-
-# Temporarily fill missing values for de-duplication
-# Text with empty string, numbers with -1, dates with a placeholder
-df[text_cols] = df[text_cols].fillna('')
-df[num_cols] = df[num_cols].fillna(-1)
-df[date_cols] = df[date_cols].fillna(pd.Timestamp('1900-01-01'))
-
-df = df.drop_duplicates()
-
-# Restore proper missing indicators: empty → <NA>, -1 → <NA>, placeholder date → NaT
-df[text_cols] = df[text_cols].replace('', pd.NA)
-df[num_cols] = df[num_cols].replace(-1, pd.NA)
-df[date_cols] = df[date_cols].replace(pd.Timestamp('1900-01-01'), pd.NaT)
-
-# Rename columns from Polish to English identifiers
-column_mapping = {
-    'Marka pojazdu': 'make', 'Model pojazdu': 'model', 'Wersja': 'version',
-    'Kolor': 'color', 'Liczba drzwi': 'number_of_doors', 'Liczba miejsc': 'number_of_seats',
-    'Rok produkcji': 'production_year', 'Generacja': 'generation', 'Rodzaj paliwa': 'fuel_type',
-    'Typ nadwozia': 'body_type', 'Rodzaj koloru': 'color_type', 'Skrzynia biegów': 'transmission',
-    'Napęd': 'drive_type', 'Kraj pochodzenia': 'country_of_origin', 'Numer rejestracyjny pojazdu': 'registration_number',
-    'Stan': 'condition', 'Bezwypadkowy': 'accident_free',
-    'Data pierwszej rejestracji w historii pojazdu': 'first_registration_date',
-    'Zarejestrowany w Polsce': 'registered_in_poland', 'Pierwszy właściciel (od nowości)': 'first_owner',
-    'Serwisowany w ASO': 'serviced_at_authorized_station', 'Ma numer rejestracyjny': 'has_registration_number',
-    'Typ złącza ładowania': 'charging_connector_type', 'Liczba silników': 'number_of_engines',
-    'Odzyskiwanie energii hamowania': 'brake_energy_recovery', 'Liczba baterii': 'number_of_batteries',
-    'equipment': 'equipment', 'price': 'price', 'currency': 'currency', 'price_level': 'price_level',
-    'advert_date': 'advert_date', 'advert_id': 'advert_id', 'description': 'description',
-    'Pojemność_baterii_kWh': 'battery_capacity_kwh', 'Autonomia_km': 'range_km',
-    'engine_capacity_cm3': 'engine_capacity_cm3', 'power_hp': 'power_hp',
-    'co2_emissions_gpkm': 'co2_emissions_gpkm',
-    'urban_fuel_consumption_l_per_100km': 'urban_fuel_consumption_l_per_100km',
-    'extraurban_fuel_consumption_l_per_100km': 'extraurban_fuel_consumption_l_per_100km',
-    'mileage_km': 'mileage_km', 'average_energy_consumption_kwh_per_100km': 'average_energy_consumption_kwh_per_100km',
-    'battery_health_percent': 'battery_health_percent', 'max_electric_power_hp': 'max_electric_power_hp'
-}
+    date_columns = ['first_registration_date', 'advert_date']
+
+    # Convert boolean-like string columns to actual boolean dtype
+    bool_cols = [
+        'accident_free', 'registered_in_poland', 'first_owner',
+        'serviced_at_authorized_station', 'has_registration_number',
+        'brake_energy_recovery'
+    ]
+    mapping = {'tak': True, 'nie': False}
+
+    for col in bool_cols:
+        s = df[col].astype(str).str.strip().str.lower()
+        df[col] = s.map(mapping).astype('boolean')
+
+    # Apply numeric and categorical dtype conversions (shared with the analysis loader)
+    missing_columns = apply_dtypes(df, DTYPE_CONVERSION)
+
+    # Ensure date columns are proper datetime types
+    for col in date_columns:
+        if col in df.columns:
+            df[col] = pd.to_datetime(df[col], errors='coerce')
+        else:
+            missing_columns.append(col)
+
+    return df, missing_columns
 
-df.rename(columns=column_mapping, inplace=True)
-
-# Define desired dtypes for columns
-dtype_conversion = {
-    'number_of_doors': 'Int8', 'number_of_seats': 'Int8', 'production_year': 'Int16',
-    'number_of_engines': 'Int8', 'number_of_batteries': 'Int8', 'mileage_km': 'Int32',
-    'advert_id': 'Int64',
-    'price': 'float32', 'battery_capacity_kwh': 'float32', 'range_km': 'float32',
-    'power_hp': 'float32', 'co2_emissions_gpkm': 'float32', 'urban_fuel_consumption_l_per_100km': 'float32',
-    'extraurban_fuel_consumption_l_per_100km': 'float32', 'average_energy_consumption_kwh_per_100km': 'float32',
-    'battery_health_percent': 'float32', 'max_electric_power_hp': 'float32', 'engine_capacity_cm3': 'float32',
-    'accident_free': 'boolean', 'registered_in_poland': 'boolean', 'first_owner': 'boolean',
-    'serviced_at_authorized_station': 'boolean', 'has_registration_number': 'boolean', 'brake_energy_recovery': 'boolean',
-    'make': 'category', 'model': 'category', 'version': 'category', 'color': 'category',
-    'generation': 'category', 'fuel_type': 'category', 'body_type': 'category',
-    'color_type': 'category', 'transmission': 'category', 'drive_type': 'category',
-    'country_of_origin': 'category', 'condition': 'category', 'charging_connector_type': 'category',
-    'currency': 'category', 'price_level': 'category'
-}
 
-date_columns = ['first_registration_date', 'advert_date']
-nullable_float_types = ['float32']
-nullable_int_types = ['Int8', 'Int16', 'Int32', 'Int64']
-
-missing_columns = []
-
-# Convert boolean-like string columns to actual boolean dtype
-bool_cols = [
-    'accident_free', 'registered_in_poland', 'first_owner',
-    'serviced_at_authorized_station', 'has_registration_number',
-    'brake_energy_recovery'
-]
-mapping = {'tak': True, 'nie': False}
-
-for col in bool_cols:
-    s = df[col].astype(str).str.strip().str.lower()
-    df[col] = s.map(mapping).astype('boolean')
-
-# Apply numeric and categorical dtype conversions
-for col, target_type in dtype_conversion.items():
-    if col not in df.columns:
-        missing_columns.append(col)
-        continue
-    if target_type in nullable_float_types:
-        df[col] = pd.to_numeric(df[col], errors='coerce').astype(target_type)
-    elif target_type in nullable_int_types:
-        df[col] = pd.to_numeric(df[col], errors='coerce').astype(target_type)
-    elif target_type == 'boolean':
-        # Already cleaned above
-        df[col] = df[col].astype('boolean')
+def report_missing_columns(missing_columns):
+    # Report any missing columns that couldn't be converted
+    if missing_columns:
+        print("⚠️ Missing columns (not converted):")
+        for col in missing_columns:
+            print(f" - {col}")
     else:
-        df[col] = df[col].astype(target_type)
+        print("✅ All columns converted successfully.")
 
-# Ensure date columns are proper datetime types
-for col in date_columns:
-    if col in df.columns:
-        df[col] = pd.to_datetime(df[col], errors='coerce')
+
+def drop_seen_rows(df, store):
+    """
+    Keep only rows whose fingerprint is not yet in the store (from this or an earlier run).
+    """
+    return df[store.new_rows(row_fingerprints(df))].reset_index(drop=True)
+
+
+def relations_frame(local_ids, exploded, equipment_df):
+    listing_ids, equipment_ids = listing_equipment_arrays(local_ids.to_numpy(), exploded, equipment_df)
+    return pd.DataFrame({'listing_id': listing_ids, 'equipment_id': equipment_ids})
+
+
+def output_paths(output_dir):
+    return (
+        os.path.join(output_dir, 'listings.csv'),
+        os.path.join(output_dir, 'equipment_options.csv'),
+        os.path.join(output_dir, 'listing_equipment.csv'),
+    )
+
+
+def split_in_memory(data_dir, output_dir, store):
+    """
+    Original mode: load the whole merged CSV, clean it and write the three output CSVs.
+    When the fingerprint store already holds rows from an earlier run, only new rows are
+    appended and their equipment IDs extend the existing equipment_options.csv.
+    """
+    listings_path, options_path, relations_path = output_paths(output_dir)
+    resume = len(store) > 0
+    next_local_id = len(store) + 1
+
+    df = pd.read_csv(data_dir / 'merged01.csv', dtype=RAW_DTYPES)
+    df, missing_columns = clean_frame(df)
+    report_missing_columns(missing_columns)
+    df = drop_seen_rows(df, store)
+
+    # Add a local unique identifier for each listing, continuing after rows of earlier runs
+    df['local_id'] = df.index + next_local_id
+
+    # Split equipment strings and build relational tables
+    exploded = explode_equipment(df['equipment'])
+    if resume:
+        equipment_ids = update_equipment_ids([exploded['name'].unique()], load_equipment_ids(options_path))
+        equipment_df = equipment_ids_to_df(equipment_ids)
     else:
-        missing_columns.append(col)
-
-# Report any missing columns that couldn't be converted
-if missing_columns:
-    print("⚠️ Missing columns (not converted):")
-    for col in missing_columns:
-        print(f" - {col}")
-else:
-    print("✅ All columns converted successfully.")
-
-# Add a local unique identifier for each listing
-df = df.reset_index(drop=True).copy()
-df['local_id'] = df.index + 1
-
-# Extract equipment lists and build relational tables
-df['equipment_list'] = extract_equipment_list(df['equipment'])
-equipment_df = build_equipment_df(df['equipment_list'])
-listing_equipment_df = generate_listing_equipment_relations(df, equipment_df)
-
-# Save cleaned listings and equipment CSVs to disk
-output_dir = data_dir
-listings_df = df.drop(columns=['equipment', 'equipment_list'])
-listings_df.to_csv(os.path.join(output_dir, 'listings.csv'), index=False)
-equipment_df.to_csv(os.path.join(output_dir, 'equipment_options.csv'), index=False)
-listing_equipment_df.to_csv(os.path.join(output_dir, 'listing_equipment.csv'), index=False)
+        equipment_df = build_equipment_df([exploded['name'].unique()])
+    listing_equipment_df = relations_frame(df['local_id'], exploded, equipment_df)
+
+    # Save cleaned listings and equipment CSVs to disk
+    listings_df = df.drop(columns=['equipment'])
+    listings_df.to_csv(listings_path, mode='a' if resume else 'w', header=not resume, index=False)
+    equipment_df.to_csv(options_path, index=False)
+    listing_equipment_df.to_csv(relations_path, mode='a' if resume else 'w', header=not resume, index=False)
+    store.save()
+    print(f"{len(df)} new listings written")
+
+
+def split_chunked(data_dir, output_dir, chunksize, store):
+    """
+    Streaming mode: clean the merged CSV chunk by chunk and append each chunk to the outputs,
+    so peak memory depends on the chunk size rather than the file size.
+
+    local_id continues across chunks, equipment IDs are assigned incrementally and never change
+    once given, and rows already in the fingerprint store are dropped. Equipment IDs therefore
+    follow first appearance rather than the global alphabetical order of the in-memory mode.
+    """
+    listings_path, options_path, relations_path = output_paths(output_dir)
+    resume = len(store) > 0
+    equipment_ids = load_equipment_ids(options_path) if resume else {}
+    missing_columns = set()
+    next_local_id = len(store) + 1
+
+    reader = pd.read_csv(data_dir / 'merged01.csv', dtype=RAW_DTYPES, chunksize=chunksize)
+    for chunk_number, chunk in enumerate(reader):
+        df, chunk_missing = clean_frame(chunk)
+        missing_columns.update(chunk_missing)
+        df = drop_seen_rows(df, store)
+
+        df['local_id'] = df.index + next_local_id
+        next_local_id += len(df)
+
+        exploded = explode_equipment(df['equipment'])
+        update_equipment_ids([exploded['name'].unique()], equipment_ids)
+        listing_equipment_df = relations_frame(df['local_id'], exploded, equipment_ids_to_df(equipment_ids))
+
+        append = resume or chunk_number > 0
+        listings_df = df.drop(columns=['equipment'])
+        listings_df.to_csv(listings_path, mode='a' if append else 'w', header=not append, index=False)
+        listing_equipment_df.to_csv(relations_path, mode='a' if append else 'w', header=not append, index=False)
+        print(f"Chunk {chunk_number + 1}: {len(df)} listings written")
+
+    report_missing_columns(sorted(missing_columns))
+    equipment_ids_to_df(equipment_ids).to_csv(options_path, index=False)
+    store.save()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Split merged01.csv into listings and equipment CSVs.")
+    parser.add_argument(
+        "--chunksize", type=int, default=None,
+        help="Rows per chunk; process the file in streaming mode instead of loading it whole"
+    )
+    parser.add_argument(
+        "--fingerprints", type=Path, default=None,
+        help="Persist row fingerprints in this .npy file; later runs then append only unseen rows"
+    )
+    args = parser.parse_args()
+
+    data_dir = Path(os.environ.get("DATA_DIR", "data"))
+    store = FingerprintStore(args.fingerprints)
+    if args.chunksize:
+        split_chunked(data_dir, data_dir, args.chunksize, store)
+    else:
+        split_in_memory(data_dir, data_dir, store)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,6 @@
 from itertools import chain
+
+import numpy as np
 import pandas as pd
 
 # Equipment sections to ignore when parsing individual items
@@ -9,20 +11,62 @@ EXCLUDED_EQUIPMENT_SECTIONS = {
     'bezpieczeństwo'
 }
 
+# Listings split per block in explode_equipment; bounds how many token strings are alive at once
+EXPLODE_BLOCK_ROWS = 100_000
+
+def explode_equipment(equipment_col, block_rows=EXPLODE_BLOCK_ROWS):
+    """
+    Split raw '|'-separated equipment strings into one row per (listing position, item).
+    Items are stripped and lowercased, section headers in EXCLUDED_EQUIPMENT_SECTIONS are dropped
+    and repeats within a listing are removed. 'row' is the 0-based position in equipment_col and
+    'name' is categorical.
+    """
+    raw = equipment_col.fillna('').astype(str).tolist()
+    name_ids = {}
+    row_blocks, code_blocks = [], []
+    # Tokens exist as Python strings only one block at a time; the result is two integer arrays
+    for start in range(0, len(raw), block_rows):
+        rows, codes = _explode_block(raw[start:start + block_rows], name_ids)
+        row_blocks.append(rows + start)
+        code_blocks.append(codes)
+    rows = np.concatenate(row_blocks) if row_blocks else np.empty(0, dtype=np.int64)
+    codes = np.concatenate(code_blocks) if code_blocks else np.empty(0, dtype=np.int32)
+    return pd.DataFrame({
+        'row': rows,
+        'name': pd.Categorical.from_codes(codes, categories=pd.Index(list(name_ids), dtype=object)),
+    })
+
+def _explode_block(raw, name_ids):
+    # One split over the joined block instead of one per row; every row yields count('|') + 1 tokens
+    counts = np.fromiter((value.count('|') for value in raw), dtype=np.int64, count=len(raw)) + 1
+    rows = np.repeat(np.arange(len(raw), dtype=np.int64), counts)
+    token_codes, tokens = pd.factorize(np.asarray('|'.join(raw).split('|'), dtype=object))
+
+    # Normalise each distinct token once and give it a code shared by all blocks (-1 = excluded)
+    names = pd.Index(tokens).str.strip().str.lower()
+    token_ids = np.fromiter(
+        (-1 if name in EXCLUDED_EQUIPMENT_SECTIONS else name_ids.setdefault(name, len(name_ids)) for name in names),
+        dtype=np.int32,
+        count=len(names),
+    )
+    codes = token_ids[token_codes]
+    keep = codes >= 0
+    rows, codes = rows[keep], codes[keep]
+
+    first = ~pd.Series(rows * (len(name_ids) + 1) + codes).duplicated().to_numpy()
+    return rows[first], codes[first]
+
 def extract_equipment_list(equipment_col):
     """
     Parse each raw equipment string into a cleaned list of unique, lowercase items.
     Excludes any general section headers defined in EXCLUDED_EQUIPMENT_SECTIONS.
     """
-    # Replace NaN with empty string, split on '|', strip and lowercase items,
-    # filter out sections to exclude, then dedupe using a set
-    return equipment_col.fillna('').apply(
-        lambda x: list(set(
-            item.strip().lower()
-            for item in x.split('|')
-            if item.strip().lower() not in EXCLUDED_EQUIPMENT_SECTIONS
-        ))
-    )
+    exploded = explode_equipment(equipment_col)
+    names = exploded['name'].astype(object).to_numpy()
+    # Rows come out of explode_equipment in order, so each listing's items form one slice
+    bounds = np.searchsorted(exploded['row'].to_numpy(), np.arange(1, len(equipment_col)))
+    lists = [list(items) for items in np.split(names, bounds)] if len(equipment_col) else []
+    return pd.Series(lists, index=equipment_col.index, dtype=object)
 
 def build_equipment_df(equipment_lists):
     """
@@ -37,19 +81,59 @@ def build_equipment_df(equipment_lists):
     # Return sorted by name with clean indexing
     return df[['id', 'name']].sort_values(by='name').reset_index(drop=True)
 
+def load_equipment_ids(path):
+    """
+    Read an existing equipment_options.csv back into a name -> ID mapping.
+    """
+    df = pd.read_csv(path, keep_default_na=False)
+    return dict(zip(df['name'], df['id'].astype(int)))
+
+def update_equipment_ids(equipment_lists, equipment_ids):
+    """
+    Extend a name -> ID mapping with equipment names not seen before.
+    New names get the next free IDs in alphabetical order, so IDs assigned in earlier chunks never change.
+    """
+    new_names = set(chain.from_iterable(equipment_lists)) - equipment_ids.keys()
+    next_id = max(equipment_ids.values(), default=-1) + 1
+    for offset, name in enumerate(sorted(new_names)):
+        equipment_ids[name] = next_id + offset
+    return equipment_ids
+
+def equipment_ids_to_df(equipment_ids):
+    """
+    Convert a name -> ID mapping into the same id/name DataFrame build_equipment_df returns.
+    """
+    df = pd.DataFrame(list(equipment_ids.items()), columns=['name', 'id'])
+    return df[['id', 'name']].sort_values(by='name').reset_index(drop=True)
+
+def equipment_codes(names, equipment_df):
+    """
+    Map item names to equipment IDs, returning -1 for names missing from equipment_df.
+    Names are factorized first, so only the distinct names are looked up.
+    """
+    codes, uniques = pd.factorize(np.asarray(names, dtype=object))
+    positions = pd.Index(equipment_df['name']).get_indexer(uniques)
+    ids = np.where(positions >= 0, equipment_df['id'].to_numpy()[positions], -1)
+    return ids[codes] if len(codes) else np.empty(0, dtype=ids.dtype)
+
+def listing_equipment_arrays(listing_ids, exploded, equipment_df):
+    """
+    Build the listing_equipment table as two int32 arrays (listing_id, equipment_id)
+    from the output of explode_equipment and the listing IDs in the same row order.
+    """
+    equipment_ids = equipment_codes(exploded['name'], equipment_df)
+    known = equipment_ids >= 0
+    rows = exploded['row'].to_numpy()[known]
+    return (
+        np.asarray(listing_ids)[rows].astype(np.int32),
+        equipment_ids[known].astype(np.int32),
+    )
+
 def generate_listing_equipment_relations(df, equipment_df, equipment_column='equipment_list'):
     """
     Build a mapping DataFrame linking each listing's local_id to its equipment IDs.
     """
-    # Create a lookup from equipment name to its ID
-    equipment_map = dict(zip(equipment_df['name'], equipment_df['id']))
-    records = []
-    # For each listing, generate one row per equipment item
-    for _, row in df.iterrows():
-        listing_id = row['local_id']
-        for eq_name in row[equipment_column]:
-            eq_id = equipment_map.get(eq_name)
-            if eq_id is not None:
-                records.append({'listing_id': listing_id, 'equipment_id': eq_id})
-    # Return as DataFrame
-    return pd.DataFrame(records)
\ No newline at end of file
+    items = df[equipment_column].reset_index(drop=True).explode().dropna()
+    exploded = pd.DataFrame({'row': items.index.to_numpy(dtype=np.int64), 'name': items.to_numpy()})
+    listing_ids, equipment_ids = listing_equipment_arrays(df['local_id'].to_numpy(), exploded, equipment_df)
+    return pd.DataFrame({'listing_id': listing_ids, 'equipment_id': equipment_ids})
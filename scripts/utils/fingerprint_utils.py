@@ -0,0 +1,57 @@
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+
+def row_fingerprints(df):
+    """
+    Compute one 64-bit fingerprint per row from its normalized values.
+    Values are compared in string form, so a column that is all-empty in one chunk (and inferred
+    with another dtype) still hashes the same; missing values hash as <NA>.
+    """
+    return pd.util.hash_pandas_object(df.astype("string"), index=False).to_numpy(dtype=np.uint64)
+
+
+class FingerprintStore:
+    """
+    Sorted set of row fingerprints, optionally persisted as a .npy file between runs.
+    With 64-bit fingerprints the chance of any collision stays below one in a million up to
+    about six million distinct rows.
+    """
+
+    def __init__(self, path=None):
+        self.path = Path(path) if path else None
+        if self.path and self.path.exists():
+            self.fingerprints = np.load(self.path)
+        else:
+            self.fingerprints = np.empty(0, dtype=np.uint64)
+
+    def __len__(self):
+        return len(self.fingerprints)
+
+    def new_rows(self, fingerprints):
+        """
+        Return a boolean mask of rows not seen before, keeping the first of any duplicates
+        within the batch, and add those rows to the store.
+        """
+        fingerprints = np.asarray(fingerprints, dtype=np.uint64)
+        position = np.searchsorted(self.fingerprints, fingerprints)
+        known = np.zeros(len(fingerprints), dtype=bool)
+        in_range = position < len(self.fingerprints)
+        known[in_range] = self.fingerprints[position[in_range]] == fingerprints[in_range]
+
+        is_new = ~known & ~pd.Series(fingerprints).duplicated().to_numpy()
+        self.fingerprints = np.union1d(self.fingerprints, fingerprints[is_new])
+        return is_new
+
+    def save(self):
+        if self.path is None:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Write next to the target and swap, so an interrupted run never leaves a truncated store
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp_path, "wb") as handle:
+            np.save(handle, self.fingerprints)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1 @@
+"""Analysis queries over loaded listings."""
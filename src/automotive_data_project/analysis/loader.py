@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import logging
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+from sqlalchemy import Engine, func, select
+
+from automotive_data_project.storage.models import DERIVED_LISTING_COLUMNS, Listing
+
+LOGGER = logging.getLogger(__name__)
+
+DTYPE_CONVERSION = {
+    "number_of_doors": "Int8",
+    "number_of_seats": "Int8",
+    "production_year": "Int16",
+    "number_of_engines": "Int8",
+    "number_of_batteries": "Int8",
+    "mileage_km": "Int32",
+    "advert_id": "Int64",
+    "price": "float32",
+    "battery_capacity_kwh": "float32",
+    "range_km": "float32",
+    "power_hp": "float32",
+    "co2_emissions_gpkm": "float32",
+    "urban_fuel_consumption_l_per_100km": "float32",
+    "extraurban_fuel_consumption_l_per_100km": "float32",
+    "average_energy_consumption_kwh_per_100km": "float32",
+    "battery_health_percent": "float32",
+    "max_electric_power_hp": "float32",
+    "engine_capacity_cm3": "float32",
+    "accident_free": "boolean",
+    "registered_in_poland": "boolean",
+    "first_owner": "boolean",
+    "serviced_at_authorized_station": "boolean",
+    "has_registration_number": "boolean",
+    "brake_energy_recovery": "boolean",
+    "make": "category",
+    "model": "category",
+    "version": "category",
+    "color": "category",
+    "generation": "category",
+    "fuel_type": "category",
+    "body_type": "category",
+    "color_type": "category",
+    "transmission": "category",
+    "drive_type": "category",
+    "country_of_origin": "category",
+    "condition": "category",
+    "charging_connector_type": "category",
+    "currency": "category",
+    "price_level": "category",
+}
+
+NULLABLE_NUMERIC_TYPES = {"float32", "Int8", "Int16", "Int32", "Int64"}
+
+# The database keeps source advert IDs as text; only the legacy CSV pipeline coerces them to Int64.
+LOADER_COLUMNS = [
+    column.name
+    for column in Listing.__table__.columns
+    if column.name not in {"raw_parameters", "source_url", *DERIVED_LISTING_COLUMNS}
+]
+LOADER_DTYPES = {column: dtype for column, dtype in DTYPE_CONVERSION.items() if column != "advert_id"}
+
+
+def apply_dtypes(df: pd.DataFrame, dtypes: dict[str, str] = DTYPE_CONVERSION) -> list[str]:
+    """Convert columns in place to their analysis dtypes; returns mapped columns missing from the frame."""
+    missing = []
+    for column, target_type in dtypes.items():
+        if column not in df.columns:
+            missing.append(column)
+            continue
+        if target_type in NULLABLE_NUMERIC_TYPES:
+            df[column] = pd.to_numeric(df[column], errors="coerce").astype(target_type)
+        else:
+            df[column] = df[column].astype(target_type)
+    return missing
+
+
+def _concat_with_shared_categories(frames: list[pd.DataFrame]) -> pd.DataFrame:
+    if not frames:
+        return pd.DataFrame(columns=LOADER_COLUMNS)
+    for column in frames[0].columns:
+        if isinstance(frames[0][column].dtype, pd.CategoricalDtype):
+            categories = pd.api.types.union_categoricals([frame[column] for frame in frames]).categories
+            for frame in frames:
+                frame[column] = frame[column].cat.set_categories(categories)
+    return pd.concat(frames, ignore_index=True)
+
+
+def cache_key(engine: Engine) -> tuple[int, datetime | None]:
+    with engine.connect() as conn:
+        count, latest = conn.execute(select(func.count(), func.max(Listing.last_seen_at))).one()
+    return int(count), latest
+
+
+def cache_path(cache_dir: Path, key: tuple[int, datetime | None]) -> Path:
+    count, latest = key
+    stamp = latest.strftime("%Y%m%dT%H%M%S%f") if latest is not None else "empty"
+    return cache_dir / f"listings-{count}-{stamp}.feather"
+
+
+def read_listings_frame(engine: Engine, chunksize: int = 50_000) -> pd.DataFrame:
+    """Read listings chunk by chunk, converting each chunk to its final dtypes as it arrives."""
+    statement = select(*(Listing.__table__.c[column] for column in LOADER_COLUMNS))
+    frames = []
+    with engine.connect() as conn:
+        for chunk in pd.read_sql_query(statement, conn, chunksize=chunksize):
+            apply_dtypes(chunk, LOADER_DTYPES)
+            frames.append(chunk)
+    return _concat_with_shared_categories(frames)
+
+
+def load_listings_frame(
+    engine: Engine, cache_dir: Path, chunksize: int = 50_000, refresh: bool = False
+) -> pd.DataFrame:
+    """Typed listings DataFrame, reused from a Feather cache while row count and max(last_seen_at) are unchanged."""
+    path = cache_path(cache_dir, cache_key(engine))
+    if path.exists() and not refresh:
+        LOGGER.info("Loading listings from cache %s", path)
+        return pd.read_feather(path)
+
+    frame = read_listings_frame(engine, chunksize)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    for stale in cache_dir.glob("listings-*.feather"):
+        stale.unlink()
+    frame.to_feather(path)
+    LOGGER.info("Cached %s listings to %s", len(frame), path)
+    return frame
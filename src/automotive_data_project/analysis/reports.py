@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+from decimal import Decimal
+
+from sqlalchemy import Connection, Float, cast, func, literal_column, select
+
+from automotive_data_project.storage.models import Listing
+
+UNKNOWN = "unknown"
+
+
+def _number(value: Decimal | float | int | None) -> float | None:
+    return float(value) if value is not None else None
+
+
+def median_price_by_year(conn: Connection) -> list[tuple[int, float]]:
+    """Median price per production year, computed in the database."""
+    priced = Listing.price.is_not(None) & Listing.production_year.is_not(None) & (Listing.production_year != 0)
+    if conn.dialect.name == "postgresql":
+        statement = (
+            select(Listing.production_year, func.percentile_cont(0.5).within_group(Listing.price))
+            .where(priced)
+            .group_by(Listing.production_year)
+            .order_by(Listing.production_year)
+        )
+    else:
+        ranked = (
+            select(
+                Listing.production_year.label("year"),
+                cast(Listing.price, Float).label("price"),
+                func.row_number().over(partition_by=Listing.production_year, order_by=Listing.price).label("position"),
+                func.count().over(partition_by=Listing.production_year).label("total"),
+            )
+            .where(priced)
+            .subquery()
+        )
+        statement = (
+            select(ranked.c.year, func.avg(ranked.c.price))
+            .where(ranked.c.position.in_([(ranked.c.total + 1) // 2, (ranked.c.total + 2) // 2]))
+            .group_by(ranked.c.year)
+            .order_by(ranked.c.year)
+        )
+    return [(int(year), _number(median)) for year, median in conn.execute(statement)]
+
+
+def mean_price_by_fuel(conn: Connection) -> list[tuple[str, float]]:
+    statement = (
+        select(Listing.fuel_type, func.avg(Listing.price)).where(Listing.price.is_not(None)).group_by(Listing.fuel_type)
+    )
+    rows = [(fuel or UNKNOWN, _number(average)) for fuel, average in conn.execute(statement)]
+    return sorted(rows, key=lambda row: row[0])
+
+
+def offer_count_by_make_model(conn: Connection) -> list[tuple[str, str, int]]:
+    statement = (
+        select(Listing.make, Listing.model, func.count())
+        .where(Listing.price.is_not(None))
+        .group_by(Listing.make, Listing.model)
+    )
+    rows = [(make or UNKNOWN, model or UNKNOWN, int(count)) for make, model, count in conn.execute(statement)]
+    return sorted(rows, key=lambda row: (-row[2], row[0], row[1]))
+
+
+def mean_price_by_mileage_bucket(conn: Connection, bucket_km: int = 50_000) -> list[tuple[int, float]]:
+    """Average price per mileage bucket, keyed by the bucket's first kilometer."""
+    size = literal_column(str(int(bucket_km)))
+    bucket = ((Listing.mileage_km // size) * size).label("bucket")
+    statement = (
+        select(bucket, func.avg(Listing.price))
+        .where(Listing.price.is_not(None), Listing.mileage_km.is_not(None))
+        .group_by(bucket)
+        .order_by(bucket)
+    )
+    return [(int(start), _number(average)) for start, average in conn.execute(statement)]
@@ -3,20 +3,41 @@ from __future__ import annotations
 import argparse
 import json
 import logging
+import signal
+import sys
+from dataclasses import replace
+from datetime import datetime, timedelta
 from pathlib import Path
 
-from automotive_data_project.config import AppConfig, ScrapeConfig
+from automotive_data_project.config import FUEL_TYPES, GEARBOXES, AppConfig, ScrapeConfig, load_targets
+from automotive_data_project.export.records import EXPORT_FORMATS, ExportFilters, export_listings
 from automotive_data_project.logging_config import configure_logging
-from automotive_data_project.pipeline import collect_from_fixture, run_pipeline
+from automotive_data_project.pipeline import collect_from_fixture, run_batch, run_pipeline
+from automotive_data_project.scheduler import DEFAULT_STATUS_PORT, Scheduler, start_status_server
+from automotive_data_project.scraping.client import OtomotoClient
+from automotive_data_project.scraping.exceptions import AccessBlocked, CaptchaDetected, FetchFailed, RateLimited
+from automotive_data_project.scraping.planner import (
+    OTOMOTO_PAGE_CAP,
+    PAGE_COUNT_TTL_SECONDS,
+    PageCountCache,
+    ShardPlanner,
+)
+from automotive_data_project.storage.aggregates import rebuild_aggregates, verify_aggregates
 from automotive_data_project.storage.database import init_schema, make_engine, reset_schema
+from automotive_data_project.storage.jobs import DEFAULT_LEASE_SECONDS, DEFAULT_MAX_ATTEMPTS, JobQueue
+from automotive_data_project.storage.sketches import rebuild_sketches, verify_sketches
+from automotive_data_project.worker import Worker, enqueue_shards
 
 
 def _scrape_config_from_args(args: argparse.Namespace, base: ScrapeConfig) -> ScrapeConfig:
-    return ScrapeConfig(
+    return replace(
+        base,
         make=args.make or base.make,
         model=args.model or base.model,
         year_from=args.year_from or base.year_from,
         year_to=args.year_to or base.year_to,
+        gearbox=args.gearbox or base.gearbox,
+        fuel_type=args.fuel_type or base.fuel_type,
         max_pages=args.max_pages or base.max_pages,
         max_listings=args.max_listings or base.max_listings,
         concurrency=args.concurrency or base.concurrency,
@@ -24,6 +45,30 @@ def _scrape_config_from_args(args: argparse.Namespace, base: ScrapeConfig) -> Sc
         request_jitter_seconds=args.jitter or base.request_jitter_seconds,
         timeout_seconds=args.timeout or base.timeout_seconds,
         save_html_debug=args.save_html_debug or base.save_html_debug,
+        incremental=args.incremental or base.incremental,
+        known_id_stop=args.known_id_stop or base.known_id_stop,
+    )
+
+
+def _add_scrape_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--make")
+    parser.add_argument("--model")
+    parser.add_argument("--year-from", type=int)
+    parser.add_argument("--year-to", type=int)
+    parser.add_argument("--gearbox", choices=GEARBOXES)
+    parser.add_argument("--fuel-type", choices=FUEL_TYPES)
+    parser.add_argument("--max-pages", type=int)
+    parser.add_argument("--max-listings", type=int)
+    parser.add_argument("--concurrency", type=int)
+    parser.add_argument("--delay", type=float)
+    parser.add_argument("--jitter", type=float)
+    parser.add_argument("--timeout", type=float)
+    parser.add_argument("--save-html-debug", action="store_true")
+    parser.add_argument(
+        "--incremental", action="store_true", help="Newest first; stop paginating once adverts are already stored."
+    )
+    parser.add_argument(
+        "--known-id-stop", type=int, help="With --incremental, stop after this many known IDs in a row."
     )
 
 
@@ -39,23 +84,83 @@ def build_parser() -> argparse.ArgumentParser:
     reset_db.add_argument("--yes-i-understand-this-drops-data", action="store_true")
     reset_db.set_defaults(handler=handle_reset_db)
 
+    aggregates = subparsers.add_parser(
+        "rebuild-aggregates",
+        help="Recompute market segment aggregates and sketches from listings and verify them.",
+    )
+    aggregates.add_argument("--verify-only", action="store_true", help="Only compare stored aggregates with listings.")
+    aggregates.set_defaults(handler=handle_rebuild_aggregates)
+
+    export = subparsers.add_parser("export", help="Stream listings as NDJSON or CSV to stdout or a file.")
+    export.add_argument("--format", choices=EXPORT_FORMATS, default="ndjson")
+    export.add_argument("--output", type=Path, help="Target file. Defaults to stdout.")
+    export.add_argument("--make")
+    export.add_argument("--model")
+    export.add_argument("--year-from", type=int)
+    export.add_argument("--year-to", type=int)
+    export.add_argument("--seen-since", type=datetime.fromisoformat, help="ISO timestamp compared with last_seen_at.")
+    export.add_argument("--page-size", type=int, default=5_000)
+    export.set_defaults(handler=handle_export)
+
+    parquet = subparsers.add_parser(
+        "export-parquet", help="Stream listings into a Parquet dataset partitioned by make and production year."
+    )
+    parquet.add_argument("--output", type=Path, help="Dataset directory. Defaults to DATA_DIR/parquet/listings.")
+    parquet.add_argument("--full", action="store_true", help="Export every row into an empty output directory.")
+    parquet.add_argument("--batch-size", type=int, default=50_000)
+    parquet.add_argument(
+        "--overlap-minutes",
+        type=float,
+        default=10.0,
+        help="Re-read this far behind the watermark to catch late commits; already exported rows are skipped.",
+    )
+    parquet.set_defaults(handler=handle_export_parquet)
+
     scrape = subparsers.add_parser("scrape", help="Run a small configured scrape and load records.")
-    scrape.add_argument("--make")
-    scrape.add_argument("--model")
-    scrape.add_argument("--year-from", type=int)
-    scrape.add_argument("--year-to", type=int)
-    scrape.add_argument("--max-pages", type=int)
-    scrape.add_argument("--max-listings", type=int)
-    scrape.add_argument("--concurrency", type=int)
-    scrape.add_argument("--delay", type=float)
-    scrape.add_argument("--jitter", type=float)
-    scrape.add_argument("--timeout", type=float)
-    scrape.add_argument("--save-html-debug", action="store_true")
+    _add_scrape_arguments(scrape)
     scrape.set_defaults(handler=handle_scrape)
 
+    plan = subparsers.add_parser(
+        "plan-shards", help="Split a search into shards under a page budget and print them as JSON."
+    )
+    _add_scrape_arguments(plan)
+    plan.add_argument("--page-budget", type=int, default=OTOMOTO_PAGE_CAP)
+    plan.add_argument(
+        "--cache-ttl", type=float, default=PAGE_COUNT_TTL_SECONDS, help="Seconds a cached page count is reused."
+    )
+    plan.add_argument("--cache-file", type=Path, help="Defaults to DATA_DIR/page_counts.json.")
+    plan.add_argument("--enqueue", action="store_true", help="Add the shards to crawl_jobs for workers.")
+    plan.set_defaults(handler=handle_plan_shards)
+
+    worker = subparsers.add_parser("worker", help="Claim and run crawl jobs queued by plan-shards --enqueue.")
+    worker.add_argument("--worker-id", help="Defaults to hostname:pid.")
+    worker.add_argument("--batch-size", type=int, default=10, help="Detail jobs claimed and upserted together.")
+    worker.add_argument("--lease-seconds", type=float, default=DEFAULT_LEASE_SECONDS)
+    worker.add_argument("--max-attempts", type=int, default=DEFAULT_MAX_ATTEMPTS)
+    worker.add_argument("--max-jobs", type=int)
+    worker.add_argument("--wait", action="store_true", help="Poll for new jobs instead of exiting when idle.")
+    worker.add_argument("--poll-seconds", type=float, default=30.0)
+    worker.set_defaults(handler=handle_worker)
+
     run = subparsers.add_parser("run-pipeline", help="Run the default small ETL pipeline.")
     run.set_defaults(handler=handle_run_pipeline)
 
+    batch = subparsers.add_parser(
+        "run-batch", help="Scrape every target in a CSV or YAML file with one engine and HTTP session."
+    )
+    batch.add_argument("targets", type=Path, help="Columns/keys: make, model, year_from, year_to, gearbox, ...")
+    batch.set_defaults(handler=handle_run_batch)
+
+    serve = subparsers.add_parser(
+        "serve-scheduler", help="Stay resident and scrape every target in a CSV or YAML file on an interval."
+    )
+    serve.add_argument("targets", type=Path, help="Same format as run-batch.")
+    serve.add_argument("--interval-minutes", type=float, default=30.0, help="Time between runs of each target.")
+    serve.add_argument("--host", default="127.0.0.1", help="Address of the /health and /metrics endpoint.")
+    serve.add_argument("--port", type=int, default=DEFAULT_STATUS_PORT, help="0 disables the endpoint.")
+    serve.add_argument("--max-runs", type=int, help="Exit after this many target runs.")
+    serve.set_defaults(handler=handle_serve_scheduler)
+
     fixture = subparsers.add_parser("parse-fixture", help="Parse a local offer HTML file without network access.")
     fixture.add_argument("path", type=Path)
     fixture.set_defaults(handler=handle_parse_fixture)
@@ -63,7 +168,7 @@ def build_parser() -> argparse.ArgumentParser:
 
 
 def handle_init_db(args: argparse.Namespace, config: AppConfig) -> None:
-    engine = make_engine(config.database_url)
+    engine = make_engine(config.database_url, config.database_profile)
     init_schema(engine)
     logging.getLogger(__name__).info("Schema initialized")
 
@@ -71,22 +176,168 @@ def handle_init_db(args: argparse.Namespace, config: AppConfig) -> None:
 def handle_reset_db(args: argparse.Namespace, config: AppConfig) -> None:
     if not args.yes_i_understand_this_drops_data:
         raise SystemExit("Refusing to drop data without --yes-i-understand-this-drops-data")
-    engine = make_engine(config.database_url)
+    engine = make_engine(config.database_url, config.database_profile)
     reset_schema(engine)
     logging.getLogger(__name__).warning("Schema reset completed")
 
 
+def handle_rebuild_aggregates(args: argparse.Namespace, config: AppConfig) -> None:
+    engine = make_engine(config.database_url, config.database_profile)
+    init_schema(engine)
+    summary: dict[str, object] = {}
+    with engine.begin() as conn:
+        if not args.verify_only:
+            summary.update(rebuild_aggregates(conn))
+            summary["quantile_sketches"] = rebuild_sketches(conn)
+        problems = verify_aggregates(conn) + verify_sketches(conn)
+    summary["mismatches"] = problems
+    print(json.dumps(summary, ensure_ascii=False, indent=2))
+    if problems:
+        raise SystemExit(f"Aggregate verification found {len(problems)} mismatches")
+
+
+def handle_export(args: argparse.Namespace, config: AppConfig) -> None:
+    engine = make_engine(config.database_url, config.database_profile)
+    filters = ExportFilters(
+        make=args.make,
+        model=args.model,
+        year_from=args.year_from,
+        year_to=args.year_to,
+        seen_since=args.seen_since,
+    )
+    if args.output is None:
+        count = export_listings(engine, sys.stdout, args.format, filters, args.page_size)
+    else:
+        with args.output.open("w", encoding="utf-8", newline="") as stream:
+            count = export_listings(engine, stream, args.format, filters, args.page_size)
+    logging.getLogger(__name__).info("Exported %s listings as %s", count, args.format)
+
+
+def handle_export_parquet(args: argparse.Namespace, config: AppConfig) -> None:
+    try:
+        from automotive_data_project.export.parquet import export_parquet
+    except ImportError as exc:
+        raise SystemExit("export-parquet requires pyarrow: python -m pip install -e .[export]") from exc
+    engine = make_engine(config.database_url, config.database_profile)
+    output = args.output or config.data_dir / "parquet" / "listings"
+    try:
+        result = export_parquet(
+            engine,
+            output,
+            incremental=not args.full,
+            batch_size=args.batch_size,
+            overlap=timedelta(minutes=args.overlap_minutes),
+        )
+    except FileExistsError as exc:
+        raise SystemExit(f"{exc}; remove it or pass another --output") from exc
+    print(json.dumps(result.__dict__, default=str, ensure_ascii=False, indent=2))
+
+
+def _validated(scrape: ScrapeConfig) -> ScrapeConfig:
+    try:
+        scrape.validate_target()
+    except ValueError as exc:
+        raise SystemExit(str(exc)) from exc
+    return scrape
+
+
 def handle_scrape(args: argparse.Namespace, config: AppConfig) -> None:
-    scrape = _scrape_config_from_args(args, config.scrape)
+    scrape = _validated(_scrape_config_from_args(args, config.scrape))
     stats = run_pipeline(config, scrape)
     print(json.dumps(stats.__dict__, default=str, ensure_ascii=False, indent=2))
 
 
 def handle_run_pipeline(args: argparse.Namespace, config: AppConfig) -> None:
-    stats = run_pipeline(config)
+    stats = run_pipeline(config, _validated(config.scrape))
     print(json.dumps(stats.__dict__, default=str, ensure_ascii=False, indent=2))
 
 
+def handle_plan_shards(args: argparse.Namespace, config: AppConfig) -> None:
+    scrape = _validated(_scrape_config_from_args(args, config.scrape))
+    cache = PageCountCache(args.cache_ttl, args.cache_file or config.data_dir / "page_counts.json")
+    client = OtomotoClient(scrape)
+    planner = ShardPlanner(client, cache, page_budget=args.page_budget)
+    try:
+        shards = planner.plan(scrape)
+    except (AccessBlocked, RateLimited, CaptchaDetected, FetchFailed) as exc:
+        cache.save()
+        raise SystemExit(f"Stopped planning after {exc.__class__.__name__}: {exc}") from exc
+    finally:
+        client.close()
+    print(json.dumps([shard.as_dict() for shard in shards], ensure_ascii=False, indent=2))
+    logging.getLogger(__name__).info(
+        "Planned %s shards, %s pages, with %s page-count requests",
+        len(shards),
+        sum(shard.pages for shard in shards),
+        planner.requests_sent,
+    )
+    if planner.coverage_gaps:
+        logging.getLogger(__name__).warning(
+            "%s pages are not covered by any shard",
+            sum(gap["pages"] - gap["covered_pages"] for gap in planner.coverage_gaps),
+        )
+    if args.enqueue:
+        engine = make_engine(config.database_url, config.database_profile)
+        init_schema(engine)
+        queued = enqueue_shards(JobQueue(engine), shards)
+        logging.getLogger(__name__).info("Queued %s shard jobs", queued)
+
+
+def handle_worker(args: argparse.Namespace, config: AppConfig) -> None:
+    engine = make_engine(config.database_url, config.database_profile)
+    init_schema(engine)
+    queue = JobQueue(engine, lease_seconds=args.lease_seconds, max_attempts=args.max_attempts)
+    worker = Worker(config, queue, worker_id=args.worker_id, batch_size=args.batch_size)
+    try:
+        stats = worker.run(max_jobs=args.max_jobs, wait=args.wait, poll_seconds=args.poll_seconds)
+    finally:
+        worker.client.close()
+    print(json.dumps({**stats.__dict__, "queue": queue.counts()}, default=str, ensure_ascii=False, indent=2))
+
+
+def _load_targets(path: Path, config: AppConfig) -> list[ScrapeConfig]:
+    try:
+        targets = load_targets(path, config.scrape)
+        for target in targets:
+            target.validate_target()
+    except ImportError as exc:
+        raise SystemExit("YAML target files require PyYAML: python -m pip install -e .[batch]") from exc
+    except ValueError as exc:
+        raise SystemExit(str(exc)) from exc
+    return targets
+
+
+def handle_run_batch(args: argparse.Namespace, config: AppConfig) -> None:
+    targets = _load_targets(args.targets, config)
+    batch = run_batch(config, targets)
+    report = {
+        "targets": [
+            {"make": target.make, "model": target.model, "year_from": target.year_from, "year_to": target.year_to}
+            | stats.__dict__
+            for target, stats in batch.targets
+        ],
+        "total": batch.total.__dict__,
+        "stopped_reason": batch.stopped_reason,
+        "skipped_targets": len(targets) - len(batch.targets),
+    }
+    print(json.dumps(report, default=str, ensure_ascii=False, indent=2))
+
+
+def handle_serve_scheduler(args: argparse.Namespace, config: AppConfig) -> None:
+    scheduler = Scheduler(config, _load_targets(args.targets, config), interval_seconds=args.interval_minutes * 60)
+    server = start_status_server(scheduler, args.host, args.port) if args.port else None
+    # Treat SIGTERM like Ctrl+C so the scheduler closes its connections on the way out.
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    try:
+        scheduler.serve(max_runs=args.max_runs)
+    except KeyboardInterrupt:
+        logging.getLogger(__name__).info("Scheduler stopped after %s runs", scheduler.runs)
+    finally:
+        if server is not None:
+            server.shutdown()
+            server.server_close()
+
+
 def handle_parse_fixture(args: argparse.Namespace, config: AppConfig) -> None:
     path = args.path.resolve()
     html = path.read_text(encoding="utf-8")
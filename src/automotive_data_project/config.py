@@ -1,11 +1,17 @@
 from __future__ import annotations
 
+import csv
 import os
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 from pathlib import Path
 from urllib.parse import urlencode
 
+from automotive_data_project.transformation.catalog import catalog_key, load_catalog
+
 PROJECT_ROOT = Path(__file__).resolve().parents[2]
+# Otomoto enum values used for search filters and shard splits.
+GEARBOXES = ("manual", "automatic")
+FUEL_TYPES = ("petrol", "diesel", "petrol-lpg", "petrol-cng", "hybrid", "plugin-hybrid", "electric", "hydrogen")
 
 
 def _bool_from_env(name: str, default: bool) -> bool:
@@ -16,8 +22,8 @@ def _bool_from_env(name: str, default: bool) -> bool:
 
 
 def slugify(value: str) -> str:
-    """Create a simple Otomoto path slug from a make or model name."""
-    return value.strip().lower().replace(" ", "-")
+    """Create an Otomoto path slug from a make or model name: ``"Lynk & Co"`` -> ``"lynk-and-co"``."""
+    return catalog_key(value)
 
 
 @dataclass(frozen=True)
@@ -26,6 +32,8 @@ class ScrapeConfig:
     model: str = "Corolla"
     year_from: int = 2019
     year_to: int = 2021
+    gearbox: str | None = None
+    fuel_type: str | None = None
     max_pages: int = 2
     max_listings: int = 30
     concurrency: int = 1
@@ -33,19 +41,44 @@ class ScrapeConfig:
     request_jitter_seconds: float = 2.0
     timeout_seconds: float = 20.0
     save_html_debug: bool = False
+    # Database holding the request budget shared with other processes; None paces this client on its own.
+    rate_limit_url: str | None = None
+    cooldown_seconds: float = 900.0
+    # Newest-first ordering; pagination stops at a page of known IDs or after known_id_stop known IDs in a row.
+    incremental: bool = False
+    known_id_stop: int = 20
+    # Transient failures (5xx, connection errors) are retried at the end of the run with exponential backoff.
+    retry_attempts: int = 3
+    retry_budget: int = 20
+    retry_backoff_seconds: float = 30.0
     source: str = "otomoto"
     base_url: str = "https://www.otomoto.pl"
 
     def search_url(self) -> str:
         """Build the central search URL for the configured filters."""
-        path = f"/osobowe/{slugify(self.make)}/{slugify(self.model)}"
+        catalog = load_catalog()
+        make = catalog.make(self.make)
+        model = catalog.model(make, self.model)
+        make_slug = make.slug if make else slugify(self.make)
+        model_slug = model.slug if model else slugify(self.model)
+        path = f"/osobowe/{make_slug}/{model_slug}"
         params = {
             "search[filter_float_year:from]": self.year_from,
             "search[filter_float_year:to]": self.year_to,
             "search[advanced_search_expanded]": "true",
         }
+        if self.gearbox:
+            params["search[filter_enum_gearbox]"] = self.gearbox
+        if self.fuel_type:
+            params["search[filter_enum_fuel_type]"] = self.fuel_type
+        if self.incremental:
+            params["search[order]"] = "created_at_first:desc"
         return f"{self.base_url}{path}?{urlencode(params)}"
 
+    def validate_target(self) -> None:
+        """Raise ``ValueError`` if make or model is not in the catalog, before any request is sent."""
+        load_catalog().resolve(self.make, self.model)
+
 
 @dataclass(frozen=True)
 class AppConfig:
@@ -53,6 +86,7 @@ class AppConfig:
     data_dir: Path
     raw_html_dir: Path
     scrape: ScrapeConfig
+    database_profile: str = "default"
 
     @classmethod
     def from_env(cls) -> AppConfig:
@@ -63,6 +97,8 @@ class AppConfig:
             model=os.getenv("SCRAPE_MODEL", "Corolla"),
             year_from=int(os.getenv("SCRAPE_YEAR_FROM", "2019")),
             year_to=int(os.getenv("SCRAPE_YEAR_TO", "2021")),
+            gearbox=os.getenv("SCRAPE_GEARBOX") or None,
+            fuel_type=os.getenv("SCRAPE_FUEL_TYPE") or None,
             max_pages=int(os.getenv("SCRAPE_MAX_PAGES", "2")),
             max_listings=int(os.getenv("SCRAPE_MAX_LISTINGS", "30")),
             concurrency=int(os.getenv("SCRAPE_CONCURRENCY", "1")),
@@ -70,10 +106,54 @@ class AppConfig:
             request_jitter_seconds=float(os.getenv("SCRAPE_JITTER_SECONDS", "2")),
             timeout_seconds=float(os.getenv("SCRAPE_TIMEOUT_SECONDS", "20")),
             save_html_debug=_bool_from_env("SCRAPE_SAVE_HTML_DEBUG", False),
+            rate_limit_url=os.getenv("SCRAPE_RATE_LIMIT_URL", f"sqlite:///{data_dir / 'politeness.sqlite3'}") or None,
+            cooldown_seconds=float(os.getenv("SCRAPE_COOLDOWN_SECONDS", "900")),
+            incremental=_bool_from_env("SCRAPE_INCREMENTAL", False),
+            known_id_stop=int(os.getenv("SCRAPE_KNOWN_ID_STOP", "20")),
+            retry_attempts=int(os.getenv("SCRAPE_RETRY_ATTEMPTS", "3")),
+            retry_budget=int(os.getenv("SCRAPE_RETRY_BUDGET", "20")),
+            retry_backoff_seconds=float(os.getenv("SCRAPE_RETRY_BACKOFF_SECONDS", "30")),
         )
         return cls(
             database_url=os.getenv("DATABASE_URL", f"sqlite:///{data_dir / 'automotive_data.sqlite3'}"),
             data_dir=data_dir,
             raw_html_dir=raw_html_dir,
             scrape=scrape,
+            database_profile=os.getenv("DATABASE_PROFILE", "default"),
         )
+
+
+# Columns a batch target file may set; everything else comes from the base ScrapeConfig.
+TARGET_FIELDS = {
+    "make": str,
+    "model": str,
+    "year_from": int,
+    "year_to": int,
+    "gearbox": str,
+    "fuel_type": str,
+    "max_pages": int,
+    "max_listings": int,
+}
+
+
+def load_targets(path: Path, base: ScrapeConfig) -> list[ScrapeConfig]:
+    """Read scrape targets from CSV, or from YAML (a list, or a mapping with ``targets``) when PyYAML is installed."""
+    if path.suffix.lower() in {".yaml", ".yml"}:
+        import yaml
+
+        data = yaml.safe_load(path.read_text(encoding="utf-8")) or []
+        rows = data.get("targets", []) if isinstance(data, dict) else data
+    else:
+        with path.open(encoding="utf-8", newline="") as handle:
+            rows = list(csv.DictReader(handle))
+
+    targets = []
+    for line, row in enumerate(rows, start=1):
+        unknown = set(row) - TARGET_FIELDS.keys()
+        if unknown:
+            raise ValueError(f"{path} target {line}: unknown fields {', '.join(sorted(unknown))}")
+        values = {
+            name: TARGET_FIELDS[name](value) for name, value in row.items() if value is not None and str(value).strip()
+        }
+        targets.append(replace(base, **values))
+    return targets
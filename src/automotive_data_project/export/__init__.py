@@ -0,0 +1 @@
+"""Streaming exports of the listings table."""
@@ -0,0 +1,187 @@
+from __future__ import annotations
+
+import json
+import logging
+from collections.abc import Iterator
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.dataset as ds
+from sqlalchemy import Engine, select
+
+from automotive_data_project.storage.models import Listing
+
+LOGGER = logging.getLogger(__name__)
+
+WATERMARK_FILE = "_watermark.json"
+PARTITION_COLUMNS = ["make", "production_year"]
+# last_seen_at is stamped before the writing transaction commits, so a row can become visible with a timestamp
+# older than a watermark taken in between. Each incremental run re-reads this far behind the watermark.
+DEFAULT_OVERLAP = timedelta(minutes=10)
+
+_DICTIONARY_STRING = pa.dictionary(pa.int32(), pa.string())
+
+LISTING_SCHEMA = pa.schema(
+    [
+        ("id", pa.int64()),
+        ("advert_id", pa.string()),
+        ("source", _DICTIONARY_STRING),
+        ("source_url", pa.string()),
+        ("make", pa.string()),
+        ("model", _DICTIONARY_STRING),
+        ("version", _DICTIONARY_STRING),
+        ("production_year", pa.int32()),
+        ("price", pa.decimal128(12, 2)),
+        ("currency", _DICTIONARY_STRING),
+        ("mileage_km", pa.int32()),
+        ("fuel_type", _DICTIONARY_STRING),
+        ("transmission", _DICTIONARY_STRING),
+        ("body_type", _DICTIONARY_STRING),
+        ("power_hp", pa.int32()),
+        ("engine_capacity_cm3", pa.int32()),
+        ("advert_date", pa.timestamp("us")),
+        ("first_seen_at", pa.timestamp("us", tz="UTC")),
+        ("last_seen_at", pa.timestamp("us", tz="UTC")),
+        ("scraped_at", pa.timestamp("us", tz="UTC")),
+        ("equipment", pa.list_(pa.string())),
+        ("raw_parameters", pa.map_(pa.string(), pa.string())),
+    ]
+)
+
+
+ExportedKey = tuple[str, str, str]
+
+
+@dataclass
+class ParquetExportResult:
+    rows: int = 0
+    batches: int = 0
+    skipped_overlap: int = 0
+    previous_watermark: datetime | None = None
+    watermark: datetime | None = None
+
+
+def _read_state(output_dir: Path) -> dict[str, object] | None:
+    path = output_dir / WATERMARK_FILE
+    if not path.exists():
+        return None
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def read_watermark(output_dir: Path) -> datetime | None:
+    state = _read_state(output_dir)
+    return datetime.fromisoformat(state["last_seen_at"]) if state else None
+
+
+def read_exported_keys(output_dir: Path) -> set[ExportedKey]:
+    """``(source, advert_id, last_seen_at)`` of exported rows inside the overlap window of the watermark."""
+    state = _read_state(output_dir)
+    return {tuple(key) for key in state.get("overlap_keys", [])} if state else set()
+
+
+def write_watermark(output_dir: Path, watermark: datetime, rows: int, overlap_keys: set[ExportedKey]) -> None:
+    payload = {
+        "last_seen_at": watermark.isoformat(),
+        "rows": rows,
+        "exported_at": datetime.now(timezone.utc).isoformat(),
+        "overlap_keys": sorted(overlap_keys),
+    }
+    (output_dir / WATERMARK_FILE).write_text(json.dumps(payload, indent=2), encoding="utf-8")
+
+
+def _utc(value: datetime | None) -> datetime | None:
+    if value is None:
+        return None
+    # SQLite hands back naive datetimes written in UTC; PostgreSQL returns aware ones in the session time zone.
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+
+
+def _exported_key(row: dict[str, object]) -> ExportedKey:
+    return (row["source"], row["advert_id"], _utc(row["last_seen_at"]).isoformat(timespec="microseconds"))
+
+
+def _column_values(rows: list[dict[str, object]], name: str) -> list[object]:
+    if name == "raw_parameters":
+        return [list(row[name].items()) if row[name] else None for row in rows]
+    if name in {"first_seen_at", "last_seen_at", "scraped_at"}:
+        return [_utc(row[name]) for row in rows]
+    return [row[name] for row in rows]
+
+
+def _record_batch(rows: list[dict[str, object]]) -> pa.RecordBatch:
+    arrays = [pa.array(_column_values(rows, field.name), type=field.type) for field in LISTING_SCHEMA]
+    return pa.RecordBatch.from_arrays(arrays, schema=LISTING_SCHEMA)
+
+
+def export_parquet(
+    engine: Engine,
+    output_dir: Path,
+    incremental: bool = True,
+    batch_size: int = 50_000,
+    overlap: timedelta = DEFAULT_OVERLAP,
+) -> ParquetExportResult:
+    """Stream listings into a hive-partitioned Parquet dataset (make / production_year).
+
+    Incremental runs export rows whose ``last_seen_at`` is past the stored watermark minus ``overlap``, which
+    picks up rows committed late with an older timestamp. Rows of that window that an earlier run already wrote
+    are recognised by ``(source, advert_id, last_seen_at)`` and skipped. A re-seen listing still appears again in
+    a newer part file; readers keep the row with the latest ``last_seen_at`` per ``(source, advert_id)``.
+
+    A full export (``incremental=False``) raises ``FileExistsError`` unless ``output_dir`` is empty, since writing
+    every row next to an earlier export would duplicate all of them.
+    """
+    if not incremental and output_dir.is_dir() and any(output_dir.iterdir()):
+        raise FileExistsError(f"{output_dir} is not empty; a full export needs an empty output directory")
+    output_dir.mkdir(parents=True, exist_ok=True)
+    result = ParquetExportResult(previous_watermark=read_watermark(output_dir) if incremental else None)
+    exported = read_exported_keys(output_dir) if incremental else set()
+    statement = select(*(Listing.__table__.c[field.name] for field in LISTING_SCHEMA)).order_by(Listing.id)
+    if result.previous_watermark is not None:
+        statement = statement.where(Listing.last_seen_at > result.previous_watermark - overlap)
+    run_id = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+
+    with engine.connect() as conn:
+        rows_iter = conn.execution_options(yield_per=batch_size).execute(statement).mappings()
+
+        def batches() -> Iterator[pa.RecordBatch]:
+            for partition in rows_iter.partitions():
+                rows = [dict(row) for row in partition if _exported_key(row) not in exported]
+                result.skipped_overlap += len(partition) - len(rows)
+                if not rows:
+                    continue
+                exported.update(_exported_key(row) for row in rows)
+                result.rows += len(rows)
+                result.batches += 1
+                latest = max(_utc(row["last_seen_at"]) for row in rows)
+                result.watermark = latest if result.watermark is None else max(result.watermark, latest)
+                yield _record_batch(rows)
+
+        ds.write_dataset(
+            batches(),
+            output_dir,
+            schema=LISTING_SCHEMA,
+            format="parquet",
+            partitioning=PARTITION_COLUMNS,
+            partitioning_flavor="hive",
+            basename_template=f"part-{run_id}-{{i}}.parquet",
+            existing_data_behavior="overwrite_or_ignore",
+            file_options=ds.ParquetFileFormat().make_write_options(use_dictionary=True, compression="zstd"),
+        )
+
+    if result.watermark is not None:
+        # A run that only picked up late commits must not move the watermark back.
+        result.watermark = max(result.watermark, result.previous_watermark or result.watermark)
+        # Fixed-width ISO strings of UTC datetimes compare in time order.
+        cutoff = (result.watermark - overlap).isoformat(timespec="microseconds")
+        write_watermark(output_dir, result.watermark, result.rows, {key for key in exported if key[2] > cutoff})
+    LOGGER.info(
+        "Exported %s listings in %s batches to %s (watermark %s -> %s)",
+        result.rows,
+        result.batches,
+        output_dir,
+        result.previous_watermark,
+        result.watermark,
+    )
+    return result
@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import csv
+import json
+from collections.abc import Iterator
+from dataclasses import dataclass
+from datetime import date, datetime
+from decimal import Decimal
+from typing import TextIO
+
+from sqlalchemy import Engine, select
+
+from automotive_data_project.storage.models import DERIVED_LISTING_COLUMNS, Listing
+
+EXPORT_FORMATS = ("ndjson", "csv")
+EXPORT_COLUMNS = [column.name for column in Listing.__table__.columns if column.name not in DERIVED_LISTING_COLUMNS]
+
+
+@dataclass(frozen=True)
+class ExportFilters:
+    make: str | None = None
+    model: str | None = None
+    year_from: int | None = None
+    year_to: int | None = None
+    seen_since: datetime | None = None
+
+    def conditions(self) -> list:
+        conditions = []
+        if self.make is not None:
+            conditions.append(Listing.make == self.make)
+        if self.model is not None:
+            conditions.append(Listing.model == self.model)
+        if self.year_from is not None:
+            conditions.append(Listing.production_year >= self.year_from)
+        if self.year_to is not None:
+            conditions.append(Listing.production_year <= self.year_to)
+        if self.seen_since is not None:
+            conditions.append(Listing.last_seen_at >= self.seen_since)
+        return conditions
+
+
+def iter_listings(engine: Engine, filters: ExportFilters | None = None, page_size: int = 5_000) -> Iterator[dict]:
+    """Yield listing rows in id order using keyset pagination, holding at most one page in memory."""
+    table = Listing.__table__
+    columns = [table.c[column] for column in EXPORT_COLUMNS]
+    conditions = (filters or ExportFilters()).conditions()
+    last_id = 0
+    while True:
+        statement = select(*columns).where(table.c.id > last_id, *conditions).order_by(table.c.id).limit(page_size)
+        with engine.connect() as conn:
+            page = [dict(row) for row in conn.execute(statement).mappings()]
+        if not page:
+            return
+        yield from page
+        last_id = page[-1]["id"]
+
+
+def _json_default(value: object) -> object:
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, datetime | date):
+        return value.isoformat()
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+def write_ndjson(rows: Iterator[dict], stream: TextIO) -> int:
+    count = 0
+    for row in rows:
+        stream.write(json.dumps(row, default=_json_default, ensure_ascii=False))
+        stream.write("\n")
+        count += 1
+    return count
+
+
+def _csv_value(value: object) -> object:
+    if isinstance(value, list | dict):
+        return json.dumps(value, ensure_ascii=False)
+    if isinstance(value, datetime | date):
+        return value.isoformat()
+    return value
+
+
+def write_csv(rows: Iterator[dict], stream: TextIO) -> int:
+    writer = csv.DictWriter(stream, fieldnames=EXPORT_COLUMNS)
+    writer.writeheader()
+    count = 0
+    for row in rows:
+        writer.writerow({name: _csv_value(value) for name, value in row.items()})
+        count += 1
+    return count
+
+
+def export_listings(
+    engine: Engine,
+    stream: TextIO,
+    export_format: str = "ndjson",
+    filters: ExportFilters | None = None,
+    page_size: int = 5_000,
+) -> int:
+    """Write matching listings to a text stream; returns the number of rows written."""
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format {export_format!r}; expected one of: {', '.join(EXPORT_FORMATS)}")
+    writer = write_ndjson if export_format == "ndjson" else write_csv
+    return writer(iter_listings(engine, filters, page_size), stream)
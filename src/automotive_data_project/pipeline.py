@@ -1,27 +1,90 @@
 from __future__ import annotations
 
 import logging
-from dataclasses import dataclass
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, field, fields
+
+from sqlalchemy import Engine
+from sqlalchemy.orm import Session, sessionmaker
 
 from automotive_data_project.config import AppConfig, ScrapeConfig
+from automotive_data_project.priority import DetailCandidate, DetailQueue, DetailScorer, Scorer
 from automotive_data_project.scraping.client import OtomotoClient, add_page_param
 from automotive_data_project.scraping.exceptions import AccessBlocked, CaptchaDetected, FetchFailed, RateLimited
+from automotive_data_project.scraping.models import ListingRef
 from automotive_data_project.scraping.parser import parse_listing_page, parse_offer_page, parse_total_pages
+from automotive_data_project.scraping.retry import RetryQueue
+from automotive_data_project.scraping.watermark import KnownIdWatermark
 from automotive_data_project.storage.database import init_schema, make_engine, make_session_factory
 from automotive_data_project.storage.repositories import ListingRepository
+from automotive_data_project.transformation.cleaning import cleaning_cache_stats
 from automotive_data_project.transformation.normalization import normalize_listing
 
 LOGGER = logging.getLogger(__name__)
 
+# Stop reasons that mean the source is pushing back; a batch run ends instead of trying the next target.
+BLOCKING_STOP_REASONS = frozenset({"AccessBlocked", "RateLimited", "CaptchaDetected", "CooldownActive"})
+
 
 @dataclass
 class PipelineStats:
     pages_visited: int = 0
+    # Result pages left unfetched because an incremental crawl reached known adverts.
+    pages_skipped: int = 0
     listings_found: int = 0
     new_listings: int = 0
+    # Stored listings fetched again because the scorer ranked them, e.g. for a changed card price.
+    refreshed_listings: int = 0
     skipped_duplicates: int = 0
     parse_errors: int = 0
     saved_records: int = 0
+    # Transient FetchFailed errors, and what became of their deferred retries.
+    fetch_failures: int = 0
+    retries_recovered: int = 0
+    retries_dropped: int = 0
+    stopped_reason: str | None = None
+    retry_after_seconds: int | None = None
+
+    def add(self, other: PipelineStats) -> None:
+        for stat in fields(self):
+            value = getattr(self, stat.name)
+            if isinstance(value, int) and stat.name != "retry_after_seconds":
+                setattr(self, stat.name, value + getattr(other, stat.name))
+
+
+@dataclass
+class PipelineResources:
+    """Engine, session factory and HTTP client that several pipeline runs can share.
+
+    The client is built from one ``ScrapeConfig``, so targets run with it share its delay, timeout and base URL;
+    only the search filters come from each target.
+    """
+
+    engine: Engine
+    session_factory: sessionmaker[Session]
+    client: OtomotoClient
+    known_advert_ids: dict[str, set[str]] = field(default_factory=dict)
+    # Used for retry backoff; the same function the client sleeps with, so a fake clock covers both.
+    sleep_func: Callable[[float], None] = time.sleep
+
+    @classmethod
+    def open(cls, config: AppConfig, scrape_config: ScrapeConfig | None = None, **client_kwargs) -> PipelineResources:
+        engine = make_engine(config.database_url, config.database_profile)
+        init_schema(engine)
+        client = OtomotoClient(scrape_config or config.scrape, **client_kwargs)
+        sleep_func = client_kwargs.get("sleep_func", time.sleep)
+        return cls(engine, make_session_factory(engine), client, sleep_func=sleep_func)
+
+    def close(self) -> None:
+        self.client.close()
+        self.engine.dispose()
+
+
+@dataclass
+class BatchStats:
+    targets: list[tuple[ScrapeConfig, PipelineStats]]
+    total: PipelineStats
     stopped_reason: str | None = None
 
 
@@ -30,12 +93,70 @@ def collect_from_fixture(html: str, source_url: str = "fixture://offer.html") ->
     return [normalize_listing(raw)]
 
 
-def run_pipeline(config: AppConfig, scrape_config: ScrapeConfig | None = None) -> PipelineStats:
+def run_pipeline(
+    config: AppConfig,
+    scrape_config: ScrapeConfig | None = None,
+    resources: PipelineResources | None = None,
+    scorer: Scorer | None = None,
+) -> PipelineStats:
+    """Scrape one target; pass ``resources`` to reuse an engine and HTTP session across calls.
+
+    ``scorer`` ranks discovered listings for the ``max_listings`` detail budget; ``DetailScorer`` by default.
+    """
     scrape = scrape_config or config.scrape
-    engine = make_engine(config.database_url)
-    init_schema(engine)
-    session_factory = make_session_factory(engine)
-    client = OtomotoClient(scrape)
+    scrape.validate_target()
+    owned = resources is None
+    resources = resources or PipelineResources.open(config, scrape)
+    try:
+        stats = _run_target(config, scrape, resources, scorer)
+    finally:
+        if owned:
+            resources.close()
+    _log_cleaning_cache_stats()
+    return stats
+
+
+def run_batch(config: AppConfig, targets: list[ScrapeConfig], scorer: Scorer | None = None) -> BatchStats:
+    """Run every target with one engine, schema check and HTTP session; stop all of them on blocking signals."""
+    for target in targets:
+        target.validate_target()
+    batch = BatchStats(targets=[], total=PipelineStats())
+    resources = PipelineResources.open(config)
+    try:
+        for target in targets:
+            stats = _run_target(config, target, resources, scorer)
+            batch.targets.append((target, stats))
+            batch.total.add(stats)
+            if stats.stopped_reason in BLOCKING_STOP_REASONS:
+                batch.stopped_reason = stats.stopped_reason
+                LOGGER.warning("Stopping batch after %s targets: %s", len(batch.targets), stats.stopped_reason)
+                break
+    finally:
+        resources.close()
+    LOGGER.info(
+        "Finished batch targets=%s/%s found=%s new=%s saved=%s stopped=%s",
+        len(batch.targets),
+        len(targets),
+        batch.total.listings_found,
+        batch.total.new_listings,
+        batch.total.saved_records,
+        batch.stopped_reason,
+    )
+    _log_cleaning_cache_stats()
+    return batch
+
+
+def _log_cleaning_cache_stats() -> None:
+    LOGGER.info(
+        "Cleaning cache hit ratios %s",
+        " ".join(f"{name}={cache.hit_ratio:.0%}" for name, cache in cleaning_cache_stats().items()),
+    )
+
+
+def _run_target(
+    config: AppConfig, scrape: ScrapeConfig, resources: PipelineResources, scorer: Scorer | None = None
+) -> PipelineStats:
+    client = resources.client
     stats = PipelineStats()
     LOGGER.info(
         "Starting pipeline source=%s make=%s model=%s years=%s-%s max_pages=%s max_listings=%s concurrency=%s",
@@ -49,67 +170,147 @@ def run_pipeline(config: AppConfig, scrape_config: ScrapeConfig | None = None) -
         scrape.concurrency,
     )
 
-    with session_factory.begin() as session:
+    with resources.session_factory.begin() as session:
         repo = ListingRepository(session)
-        existing_ids = repo.existing_advert_ids(scrape.source)
+        # Loaded once per resources (the scheduler clears it before each run); later targets of a batch reuse the set
+        # and the IDs committed into it.
+        if scrape.source not in resources.known_advert_ids:
+            resources.known_advert_ids[scrape.source] = repo.existing_advert_ids(scrape.source)
+        existing_ids = resources.known_advert_ids[scrape.source]
         records: list[dict[str, object]] = []
-        search_url = scrape.search_url()
+        fetched_ids: list[str] = []
 
+        watermark = KnownIdWatermark(existing_ids, scrape.known_id_stop) if scrape.incremental else None
+        retries = RetryQueue(
+            scrape.retry_budget, scrape.retry_attempts, scrape.retry_backoff_seconds, sleep_func=resources.sleep_func
+        )
         try:
-            first_page = client.fetch(add_page_param(search_url, 1))
-            total_pages = min(parse_total_pages(first_page.html), scrape.max_pages)
-            pages = [(1, first_page.html)]
-            for page in range(2, total_pages + 1):
-                result = client.fetch(add_page_param(search_url, page))
-                pages.append((page, result.html))
+            pages = _fetch_result_pages(client, scrape, stats, retries, watermark)
         except (AccessBlocked, RateLimited, CaptchaDetected) as exc:
             stats.stopped_reason = exc.__class__.__name__
+            stats.retry_after_seconds = getattr(exc, "retry_after_seconds", None)
             LOGGER.warning("Stopping listing-page fetch: %s", exc)
             return stats
-        except FetchFailed as exc:
+        if pages is None:
             stats.stopped_reason = "FetchFailed"
-            LOGGER.warning("Stopping listing-page fetch after transient failure: %s", exc)
+            LOGGER.warning("Stopping listing-page fetch: the first results page could not be fetched")
             return stats
 
-        for _page, html in pages:
+        candidates: dict[str, ListingRef] = {}
+        for _page, refs in sorted(pages.items()):
             stats.pages_visited += 1
-            refs = parse_listing_page(html, base_url=scrape.base_url)
             stats.listings_found += len(refs)
             for ref in refs:
-                if len(records) >= scrape.max_listings:
-                    stats.stopped_reason = "max_listings"
-                    break
-                if ref.advert_id in existing_ids:
+                if ref.advert_id in candidates:
                     stats.skipped_duplicates += 1
-                    continue
-                try:
-                    detail = client.fetch(ref.url)
-                    if scrape.save_html_debug:
-                        client.save_debug_html(detail.html, config.raw_html_dir, f"offer_{ref.advert_id}.html")
-                    raw = parse_offer_page(detail.html, source_url=ref.url, advert_id=ref.advert_id)
-                    records.append(normalize_listing(raw))
-                    existing_ids.add(ref.advert_id)
+                else:
+                    candidates[ref.advert_id] = ref
+        stored = repo.listing_states(
+            scrape.source, [advert_id for advert_id in candidates if advert_id in existing_ids]
+        )
+        score = scorer or DetailScorer.for_target(repo, scrape)
+        queue = DetailQueue()
+        for advert_id, ref in candidates.items():
+            candidate = DetailCandidate(ref, known=advert_id in existing_ids, stored=stored.get(advert_id))
+            if not queue.push(candidate, score(candidate)):
+                stats.skipped_duplicates += 1
+
+        # Deferred retries only come up once the queue is empty, so they run at the end of the run.
+        while queue or retries:
+            if len(records) >= scrape.max_listings:
+                stats.stopped_reason = "max_listings"
+                break
+            candidate, attempt = (queue.pop(), 1) if queue else retries.pop()
+            ref = candidate.ref
+            try:
+                detail = client.fetch(ref.url)
+                if scrape.save_html_debug:
+                    client.save_debug_html(detail.html, config.raw_html_dir, f"offer_{ref.advert_id}.html")
+                raw = parse_offer_page(detail.html, source_url=ref.url, advert_id=ref.advert_id)
+                records.append(normalize_listing(raw))
+                fetched_ids.append(ref.advert_id)
+                if candidate.known:
+                    stats.refreshed_listings += 1
+                else:
                     stats.new_listings += 1
-                except (AccessBlocked, RateLimited, CaptchaDetected) as exc:
-                    stats.stopped_reason = exc.__class__.__name__
-                    LOGGER.warning("Stopping detail-page fetch: %s", exc)
-                    break
-                except Exception:
-                    stats.parse_errors += 1
-                    LOGGER.exception("Could not parse listing %s", ref.advert_id)
-            if stats.stopped_reason:
+                if attempt > 1:
+                    stats.retries_recovered += 1
+            except (AccessBlocked, RateLimited, CaptchaDetected) as exc:
+                stats.stopped_reason = exc.__class__.__name__
+                stats.retry_after_seconds = getattr(exc, "retry_after_seconds", None)
+                LOGGER.warning("Stopping detail-page fetch: %s", exc)
                 break
+            except FetchFailed as exc:
+                _defer(retries, candidate, attempt, stats, exc)
+            except Exception:
+                stats.parse_errors += 1
+                LOGGER.exception("Could not parse listing %s", ref.advert_id)
 
         stats.saved_records = repo.upsert_many(records)
 
+    # Only after the commit: a failed upsert must leave these IDs unknown to the next target of a batch.
+    existing_ids.update(fetched_ids)
     LOGGER.info(
-        "Finished pipeline pages=%s found=%s new=%s duplicates=%s parse_errors=%s saved=%s stopped=%s",
+        "Finished pipeline pages=%s skipped_pages=%s found=%s new=%s refreshed=%s duplicates=%s parse_errors=%s "
+        "saved=%s stopped=%s",
         stats.pages_visited,
+        stats.pages_skipped,
         stats.listings_found,
         stats.new_listings,
+        stats.refreshed_listings,
         stats.skipped_duplicates,
         stats.parse_errors,
         stats.saved_records,
         stats.stopped_reason,
     )
     return stats
+
+
+def _fetch_result_pages(
+    client: OtomotoClient,
+    scrape: ScrapeConfig,
+    stats: PipelineStats,
+    retries: RetryQueue,
+    watermark: KnownIdWatermark | None,
+) -> dict[int, list[ListingRef]] | None:
+    """Listing refs by page number; ``None`` if the first page, which gives the page count, never loads.
+
+    Pages that fail transiently are retried after the other pages. Blocking errors propagate.
+    """
+    search_url = scrape.search_url()
+    pages: dict[int, list[ListingRef]] = {}
+    total_pages = 1
+    next_page = 1
+    while True:
+        if next_page <= total_pages:
+            page, attempt = next_page, 1
+            next_page += 1
+        elif retries:
+            page, attempt = retries.pop()
+        else:
+            return pages
+        try:
+            html = client.fetch(add_page_param(search_url, page)).html
+        except FetchFailed as exc:
+            if not _defer(retries, page, attempt, stats, exc) and page == 1:
+                return None
+            continue
+        if attempt > 1:
+            stats.retries_recovered += 1
+        if page == 1:
+            total_pages = min(parse_total_pages(html), scrape.max_pages)
+        pages[page] = parse_listing_page(html, base_url=scrape.base_url)
+        if watermark is not None and next_page <= total_pages and watermark.reached(pages[page]):
+            stats.pages_skipped = total_pages - next_page + 1
+            LOGGER.info("Reached known adverts on page %s; skipping %s pages", page, stats.pages_skipped)
+            total_pages = next_page - 1
+
+
+def _defer(retries: RetryQueue, item: object, attempt: int, stats: PipelineStats, exc: FetchFailed) -> bool:
+    stats.fetch_failures += 1
+    if retries.defer(item, attempt):
+        LOGGER.info("Deferring retry %s after transient failure: %s", attempt + 1, exc)
+        return True
+    stats.retries_dropped += 1
+    LOGGER.warning("Giving up after %s attempts or an empty retry budget: %s", attempt, exc)
+    return False
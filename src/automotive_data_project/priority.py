@@ -0,0 +1,100 @@
+"""Ranking of discovered listings for the detail-fetch budget of a pipeline run.
+
+Every listing found on the result pages becomes a ``DetailCandidate`` and gets a score from a scorer, which is
+any callable taking a candidate and returning a float. Candidates scoring above zero go into a ``DetailQueue``.
+The pipeline fetches them highest score first until ``max_listings`` records are collected. Equal scores keep
+page order, so with the default weights a run without stored listings fetches in the same order as before.
+
+``DetailScorer`` is the default. It only reads what is known before a detail request: the stored row and the
+price and year printed on the results card.
+"""
+
+from __future__ import annotations
+
+import heapq
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from itertools import count
+
+from automotive_data_project.config import ScrapeConfig
+from automotive_data_project.scraping.models import ListingRef
+from automotive_data_project.storage.repositories import ListingRepository, ListingState
+from automotive_data_project.transformation.catalog import load_catalog
+from automotive_data_project.transformation.cleaning import clean_int, clean_price
+
+
+@dataclass(frozen=True)
+class DetailCandidate:
+    ref: ListingRef
+    known: bool
+    stored: ListingState | None = None
+
+
+Scorer = Callable[[DetailCandidate], float]
+
+
+@dataclass(frozen=True)
+class DetailScorer:
+    """Weighted sum of: never stored, card price differs from the stored price, ``last_seen_at`` older than
+    ``stale_after``. Candidates with any of these also get up to ``segment_weight`` more when their card year has
+    fewer than ``segment_target`` stored listings of the target's make and model. Known listings with none of
+    them score zero and are not fetched.
+    """
+
+    now: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+    segment_counts: dict[int, int] = field(default_factory=dict)
+    stale_after: timedelta = timedelta(days=7)
+    segment_target: int = 30
+    new_weight: float = 100.0
+    price_change_weight: float = 50.0
+    stale_weight: float = 10.0
+    segment_weight: float = 20.0
+
+    @classmethod
+    def for_target(cls, repo: ListingRepository, scrape: ScrapeConfig, **kwargs) -> DetailScorer:
+        make, model = load_catalog().resolve(scrape.make, scrape.model)
+        return cls(segment_counts=repo.segment_counts(make.name, model.name), **kwargs)
+
+    def __call__(self, candidate: DetailCandidate) -> float:
+        stored = candidate.stored
+        score = 0.0
+        if not candidate.known:
+            score += self.new_weight
+        elif stored is not None:
+            card_price = clean_price(candidate.ref.price_raw)
+            if card_price is not None and stored.price is not None and card_price != stored.price:
+                score += self.price_change_weight
+            if stored.last_seen_at is not None and self.now - _aware(stored.last_seen_at) >= self.stale_after:
+                score += self.stale_weight
+        year = clean_int(candidate.ref.production_year_raw)
+        if score and year is not None and self.segment_target > 0:
+            shortfall = 1 - self.segment_counts.get(year, 0) / self.segment_target
+            score += self.segment_weight * max(shortfall, 0)
+        return score
+
+
+def _aware(value: datetime) -> datetime:
+    # SQLite hands back naive datetimes; they were written in UTC.
+    return value if value.tzinfo is not None else value.replace(tzinfo=timezone.utc)
+
+
+class DetailQueue:
+    """Max-priority queue of candidates; ties come out in insertion order."""
+
+    def __init__(self) -> None:
+        self._heap: list[tuple[float, int, DetailCandidate]] = []
+        self._order = count()
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def push(self, candidate: DetailCandidate, score: float) -> bool:
+        """Queue ``candidate`` if ``score`` is positive; returns whether it was queued."""
+        if score <= 0:
+            return False
+        heapq.heappush(self._heap, (-score, next(self._order), candidate))
+        return True
+
+    def pop(self) -> DetailCandidate:
+        return heapq.heappop(self._heap)[2]
@@ -0,0 +1,226 @@
+"""Resident scheduler that runs scrape targets on an interval from one long-lived process.
+
+Unlike a cron job that starts the CLI for each run, the scheduler keeps its ``PipelineResources`` (engine pool,
+HTTP session) and the parser and cleaning caches warm between runs. Known advert IDs are reloaded at the start of
+each run, so listings written by other processes in the meantime count as known. Targets run one at a time
+in due order. When a run stops on a blocking signal, no target runs until the cooldown has passed: the
+``Retry-After`` of the response when there was one, otherwise ``ScrapeConfig.cooldown_seconds``.
+
+Time only comes from ``clock`` and ``sleep_func``, so tests drive the loop with a fake clock. The same
+``sleep_func`` is handed to the HTTP client, which uses it for request delays.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, field, fields
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from automotive_data_project.config import AppConfig, ScrapeConfig
+from automotive_data_project.pipeline import BLOCKING_STOP_REASONS, PipelineResources, PipelineStats, run_pipeline
+from automotive_data_project.transformation.cleaning import cleaning_cache_stats
+
+LOGGER = logging.getLogger(__name__)
+
+DEFAULT_INTERVAL_SECONDS = 30 * 60
+DEFAULT_STATUS_PORT = 8765
+
+
+@dataclass
+class ScheduledTarget:
+    scrape: ScrapeConfig
+    next_run_at: float = 0.0
+    runs: int = 0
+    errors: int = 0
+    totals: PipelineStats = field(default_factory=PipelineStats)
+    last_stats: PipelineStats | None = None
+    last_error: str | None = None
+
+    @property
+    def label(self) -> str:
+        return f"{self.scrape.make} {self.scrape.model} {self.scrape.year_from}-{self.scrape.year_to}"
+
+
+class Scheduler:
+    """Runs each target every ``interval_seconds``, measured from the start of its previous run."""
+
+    def __init__(
+        self,
+        config: AppConfig,
+        targets: list[ScrapeConfig],
+        interval_seconds: float = DEFAULT_INTERVAL_SECONDS,
+        resources: PipelineResources | None = None,
+        clock: Callable[[], float] = time.monotonic,
+        sleep_func: Callable[[float], None] = time.sleep,
+        max_sleep_seconds: float = 60.0,
+    ) -> None:
+        for target in targets:
+            target.validate_target()
+        self.config = config
+        self.interval_seconds = interval_seconds
+        self.clock = clock
+        self.sleep_func = sleep_func
+        self.max_sleep_seconds = max_sleep_seconds
+        self.started_at = clock()
+        self.targets = [ScheduledTarget(target, next_run_at=self.started_at) for target in targets]
+        self.runs = 0
+        self.cooldowns = 0
+        self.cooldown_until = self.started_at
+        self.cooldown_reason: str | None = None
+        self._owns_resources = resources is None
+        self._resources = resources
+        # The status server reads from another thread; it only sees state between two complete updates.
+        self._lock = threading.Lock()
+
+    @property
+    def resources(self) -> PipelineResources:
+        if self._resources is None:
+            self._resources = PipelineResources.open(self.config, sleep_func=self.sleep_func)
+        return self._resources
+
+    def close(self) -> None:
+        if self._owns_resources and self._resources is not None:
+            self._resources.close()
+            self._resources = None
+
+    def serve(self, max_runs: int | None = None) -> None:
+        """Run due targets and sleep until the next one is due, forever or until ``max_runs`` runs are done."""
+        LOGGER.info("Scheduler started with %s targets every %.0f seconds", len(self.targets), self.interval_seconds)
+        try:
+            while max_runs is None or self.runs < max_runs:
+                self.run_due(None if max_runs is None else max_runs - self.runs)
+                if max_runs is not None and self.runs >= max_runs:
+                    break
+                wait = self.seconds_until_next_run()
+                if wait > 0:
+                    self.sleep_func(min(wait, self.max_sleep_seconds))
+        finally:
+            self.close()
+
+    def run_due(self, limit: int | None = None) -> int:
+        """Run every target that is due now, oldest deadline first; returns how many ran."""
+        ran = 0
+        for target in sorted(self.targets, key=lambda target: target.next_run_at):
+            now = self.clock()
+            if now < self.cooldown_until or target.next_run_at > now or (limit is not None and ran >= limit):
+                break
+            self._run(target, now)
+            ran += 1
+        return ran
+
+    def seconds_until_next_run(self) -> float:
+        next_run_at = min((target.next_run_at for target in self.targets), default=float("inf"))
+        return max(next_run_at, self.cooldown_until) - self.clock()
+
+    def _run(self, target: ScheduledTarget, started: float) -> None:
+        self.resources.known_advert_ids.clear()
+        try:
+            stats = run_pipeline(self.config, target.scrape, self.resources)
+        except Exception as exc:
+            LOGGER.exception("Scheduled run of %s failed", target.label)
+            with self._lock:
+                target.errors += 1
+                target.last_error = f"{exc.__class__.__name__}: {exc}"
+                stats = None
+        with self._lock:
+            self.runs += 1
+            target.runs += 1
+            target.next_run_at = started + self.interval_seconds
+            if stats is None:
+                return
+            target.last_stats = stats
+            target.last_error = None
+            target.totals.add(stats)
+            if stats.stopped_reason in BLOCKING_STOP_REASONS:
+                seconds = stats.retry_after_seconds or target.scrape.cooldown_seconds
+                self.cooldown_until = max(self.cooldown_until, self.clock() + seconds)
+                self.cooldown_reason = stats.stopped_reason
+                self.cooldowns += 1
+                LOGGER.warning("Pausing all targets for %.0f seconds after %s", seconds, stats.stopped_reason)
+
+    def health(self) -> dict[str, object]:
+        now = self.clock()
+        with self._lock:
+            cooling_down = now < self.cooldown_until
+            return {
+                "status": "cooling_down" if cooling_down else "ok",
+                "uptime_seconds": round(now - self.started_at, 1),
+                "runs": self.runs,
+                "cooldown_remaining_seconds": round(max(self.cooldown_until - now, 0), 1),
+                "cooldown_reason": self.cooldown_reason if cooling_down else None,
+                "targets": [
+                    {
+                        "target": target.label,
+                        "runs": target.runs,
+                        "errors": target.errors,
+                        "next_run_in_seconds": round(max(target.next_run_at - now, 0), 1),
+                        "last_stopped_reason": target.last_stats.stopped_reason if target.last_stats else None,
+                        "last_error": target.last_error,
+                    }
+                    for target in self.targets
+                ],
+            }
+
+    def metrics_text(self) -> str:
+        """Counters and gauges in the Prometheus text exposition format."""
+        now = self.clock()
+        with self._lock:
+            lines = [
+                "# TYPE automotive_scheduler_uptime_seconds gauge",
+                f"automotive_scheduler_uptime_seconds {now - self.started_at:.1f}",
+                "# TYPE automotive_scheduler_cooldowns_total counter",
+                f"automotive_scheduler_cooldowns_total {self.cooldowns}",
+                "# TYPE automotive_scheduler_cooldown_remaining_seconds gauge",
+                f"automotive_scheduler_cooldown_remaining_seconds {max(self.cooldown_until - now, 0):.1f}",
+            ]
+            per_target = {"runs": lambda target: target.runs, "errors": lambda target: target.errors}
+            for stat in fields(PipelineStats):
+                if stat.type == "int":
+                    per_target[stat.name] = lambda target, name=stat.name: getattr(target.totals, name)
+            for name, value in per_target.items():
+                lines.append(f"# TYPE automotive_scheduler_{name}_total counter")
+                lines.extend(
+                    f'automotive_scheduler_{name}_total{{target="{target.label}"}} {value(target)}'
+                    for target in self.targets
+                )
+        lines.append("# TYPE automotive_cleaning_cache_hit_ratio gauge")
+        lines.extend(
+            f'automotive_cleaning_cache_hit_ratio{{cache="{name}"}} {cache.hit_ratio:.4f}'
+            for name, cache in cleaning_cache_stats().items()
+        )
+        return "\n".join(lines) + "\n"
+
+
+def start_status_server(
+    scheduler: Scheduler, host: str = "127.0.0.1", port: int = DEFAULT_STATUS_PORT
+) -> ThreadingHTTPServer:
+    """Serve ``/health`` (JSON) and ``/metrics`` (Prometheus text) from a daemon thread."""
+
+    class StatusHandler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            if self.path == "/health":
+                body = json.dumps(scheduler.health(), ensure_ascii=False).encode("utf-8")
+                content_type = "application/json"
+            elif self.path == "/metrics":
+                body = scheduler.metrics_text().encode("utf-8")
+                content_type = "text/plain; version=0.0.4"
+            else:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format: str, *args) -> None:
+            LOGGER.debug("Status request %s", format % args)
+
+    server = ThreadingHTTPServer((host, port), StatusHandler)
+    threading.Thread(target=server.serve_forever, name="scheduler-status", daemon=True).start()
+    LOGGER.info("Scheduler status on http://%s:%s/health and /metrics", *server.server_address[:2])
+    return server
@@ -12,6 +12,7 @@ import requests
 from automotive_data_project.config import ScrapeConfig
 from automotive_data_project.scraping.exceptions import AccessBlocked, CaptchaDetected, FetchFailed, RateLimited
 from automotive_data_project.scraping.parser import is_captcha_html
+from automotive_data_project.scraping.politeness import SharedTokenBucket
 
 LOGGER = logging.getLogger(__name__)
 
@@ -39,19 +40,45 @@ class OtomotoClient:
         session: requests.Session | None = None,
         sleep_func=time.sleep,
         rng: random.Random | None = None,
+        limiter: SharedTokenBucket | None = None,
+        clock=time.time,
     ) -> None:
         self.config = config
         self.session = session or requests.Session()
         self.sleep_func = sleep_func
         self.rng = rng or random.Random()
+        # A limiter built here owns a private engine that close() has to dispose; a passed-in one is the caller's.
+        self._owns_limiter = limiter is None
+        if limiter is None and config.rate_limit_url and config.request_delay_seconds > 0:
+            limiter = SharedTokenBucket.for_url(
+                config.rate_limit_url,
+                config.base_url,
+                config.request_delay_seconds,
+                clock=clock,
+                sleep_func=sleep_func,
+            )
+        self.limiter = limiter
 
     def _pause(self) -> None:
         delay = self.config.request_delay_seconds + self.rng.uniform(0, self.config.request_jitter_seconds)
         LOGGER.debug("Sleeping %.2f seconds before request", delay)
         self.sleep_func(delay)
+        if self.limiter is not None:
+            # The local delay keeps this client's own spacing; the shared bucket caps all processes together at
+            # one request per request_delay_seconds. A lone client has a full bucket by now and does not wait.
+            self.limiter.acquire()
 
     def fetch(self, url: str) -> FetchResult:
         self._pause()
+        try:
+            return self._get(url)
+        except (AccessBlocked, RateLimited, CaptchaDetected) as exc:
+            if self.limiter is not None:
+                retry_after = getattr(exc, "retry_after_seconds", None)
+                self.limiter.cooldown(retry_after or self.config.cooldown_seconds, exc.__class__.__name__)
+            raise
+
+    def _get(self, url: str) -> FetchResult:
         try:
             response = self.session.get(
                 url,
@@ -75,6 +102,11 @@ class OtomotoClient:
             raise CaptchaDetected(f"CAPTCHA detected for {url}")
         return FetchResult(url=url, html=response.text, status_code=response.status_code)
 
+    def close(self) -> None:
+        self.session.close()
+        if self._owns_limiter and self.limiter is not None:
+            self.limiter.engine.dispose()
+
     def save_debug_html(self, html: str, target_dir: Path, name: str) -> Path:
         target_dir.mkdir(parents=True, exist_ok=True)
         path = target_dir / name
@@ -20,3 +20,7 @@ class CaptchaDetected(ScrapingError):
 
 class FetchFailed(ScrapingError):
     """A transient fetch failure exceeded retry limits."""
+
+
+class CooldownActive(RateLimited):
+    """Another client sharing the politeness budget was blocked or rate limited; wait before sending more."""
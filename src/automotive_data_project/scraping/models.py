@@ -8,6 +8,9 @@ from datetime import datetime
 class ListingRef:
     advert_id: str
     url: str
+    # Shown on the results card, so available before the detail page is fetched.
+    price_raw: str | None = None
+    production_year_raw: str | None = None
 
 
 @dataclass(frozen=True)
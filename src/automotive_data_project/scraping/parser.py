@@ -35,7 +35,7 @@ def is_captcha_html(html: str) -> bool:
 
 
 def parse_listing_page(html: str, base_url: str = "https://www.otomoto.pl") -> list[ListingRef]:
-    """Extract advert IDs and detail URLs from a search results page."""
+    """Extract advert IDs, detail URLs and the card's price and year from a search results page."""
     soup = BeautifulSoup(html, "html.parser")
     refs: list[ListingRef] = []
     seen: set[str] = set()
@@ -47,10 +47,22 @@ def parse_listing_page(html: str, base_url: str = "https://www.otomoto.pl") -> l
         if advert_id in seen:
             continue
         seen.add(advert_id)
-        refs.append(ListingRef(advert_id=advert_id, url=urljoin(base_url, str(link["href"]))))
+        refs.append(
+            ListingRef(
+                advert_id=advert_id,
+                url=urljoin(base_url, str(link["href"])),
+                price_raw=_card_text(article, "[data-testid='ad-price'], [data-sentry-element='Price']"),
+                production_year_raw=_card_text(article, "[data-parameter='year']"),
+            )
+        )
     return refs
 
 
+def _card_text(article: Tag, selector: str) -> str | None:
+    element = article.select_one(selector)
+    return normalize_text(element.get_text()) or None if element else None
+
+
 def parse_total_pages(html: str) -> int:
     """Return the largest numeric pagination item, or 1 when absent."""
     soup = BeautifulSoup(html, "html.parser")
@@ -0,0 +1,149 @@
+"""Split a broad search into non-overlapping shards that each stay under a page budget.
+
+Otomoto stops paginating at 500 pages, so a wide search silently loses everything past that point. The planner
+measures a search with one request (the first results page), and if it is over budget splits it: year ranges are
+halved first, then a single year is split by gearbox and finally by fuel type. The gearbox and fuel splits only
+cover the values in ``GEARBOXES`` and ``FUEL_TYPES``, and Otomoto has no filter for "any other value", so listings
+outside them cannot get a shard of their own. When the children of a split add up to fewer pages than their
+parent, the planner logs the gap and records it in ``ShardPlanner.coverage_gaps``. A first page without listing
+cards counts as 0 pages and gets no shard. Page counts are cached with a TTL, optionally in a JSON file, so
+re-planning the same search within the TTL sends no requests.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, replace
+from pathlib import Path
+
+from automotive_data_project.config import FUEL_TYPES, GEARBOXES, ScrapeConfig
+from automotive_data_project.scraping.client import add_page_param
+from automotive_data_project.scraping.parser import parse_listing_page, parse_total_pages
+
+LOGGER = logging.getLogger(__name__)
+
+OTOMOTO_PAGE_CAP = 500
+PAGE_COUNT_TTL_SECONDS = 6 * 60 * 60
+
+
+class PageCountCache:
+    """Search URL -> total pages with an expiry time; persisted to ``path`` when one is given."""
+
+    def __init__(
+        self,
+        ttl_seconds: float = PAGE_COUNT_TTL_SECONDS,
+        path: Path | None = None,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.path = path
+        self.clock = clock
+        self._entries: dict[str, tuple[int, float]] = {}
+        if path is not None and path.exists():
+            stored = json.loads(path.read_text(encoding="utf-8"))
+            self._entries = {url: (int(pages), float(at)) for url, (pages, at) in stored.items()}
+
+    def get(self, url: str) -> int | None:
+        entry = self._entries.get(url)
+        if entry is None or self.clock() - entry[1] > self.ttl_seconds:
+            return None
+        return entry[0]
+
+    def put(self, url: str, pages: int) -> None:
+        self._entries[url] = (pages, self.clock())
+
+    def save(self) -> None:
+        if self.path is None:
+            return
+        now = self.clock()
+        live = {url: entry for url, entry in self._entries.items() if now - entry[1] <= self.ttl_seconds}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        tmp_path.write_text(json.dumps(live, indent=1, sort_keys=True), encoding="utf-8")
+        os.replace(tmp_path, self.path)
+
+
+@dataclass(frozen=True)
+class Shard:
+    config: ScrapeConfig
+    pages: int
+
+    @property
+    def oversized(self) -> bool:
+        """Still over the budget after every available split; only the first pages can be reached."""
+        return self.pages > self.config.max_pages
+
+    def as_dict(self) -> dict[str, object]:
+        return {
+            "url": self.config.search_url(),
+            "year_from": self.config.year_from,
+            "year_to": self.config.year_to,
+            "gearbox": self.config.gearbox,
+            "fuel_type": self.config.fuel_type,
+            "pages": self.pages,
+            "oversized": self.oversized,
+        }
+
+
+class ShardPlanner:
+    """Plans shards for a ``ScrapeConfig`` using any client with ``fetch(url)``, e.g. ``OtomotoClient``."""
+
+    def __init__(self, client, cache: PageCountCache | None = None, page_budget: int = OTOMOTO_PAGE_CAP) -> None:
+        self.client = client
+        self.cache = cache or PageCountCache()
+        self.page_budget = page_budget
+        self.requests_sent = 0
+        self.coverage_gaps: list[dict[str, object]] = []
+
+    def page_count(self, config: ScrapeConfig) -> int:
+        url = config.search_url()
+        pages = self.cache.get(url)
+        if pages is None:
+            html = self.client.fetch(add_page_param(url, 1)).html
+            # An empty result page has no pagination either, which parse_total_pages reads as one page.
+            pages = parse_total_pages(html) if parse_listing_page(html, base_url=config.base_url) else 0
+            self.requests_sent += 1
+            self.cache.put(url, pages)
+        return pages
+
+    def plan(self, config: ScrapeConfig) -> list[Shard]:
+        """Shards covering ``config`` in year order; each one's ``max_pages`` is its page count."""
+        shards = self._split(config)
+        self.cache.save()
+        return shards
+
+    def _split(self, config: ScrapeConfig) -> list[Shard]:
+        pages = self.page_count(config)
+        if pages <= self.page_budget:
+            return [Shard(replace(config, max_pages=pages), pages)] if pages else []
+        parts = _split_config(config)
+        if not parts:
+            LOGGER.warning("Shard %s has %s pages and cannot be split further", config.search_url(), pages)
+            return [Shard(replace(config, max_pages=self.page_budget), pages)]
+        LOGGER.info("Splitting %s (%s pages) into %s shards", config.search_url(), pages, len(parts))
+        # The children are measured here anyway; the recursion below reads their counts from the cache.
+        covered = sum(self.page_count(part) for part in parts)
+        if covered < pages:
+            LOGGER.warning(
+                "Shards of %s cover %s of its %s pages; the rest has a gearbox or fuel type outside the known values",
+                config.search_url(),
+                covered,
+                pages,
+            )
+            self.coverage_gaps.append({"url": config.search_url(), "pages": pages, "covered_pages": covered})
+        return [shard for part in parts for shard in self._split(part)]
+
+
+def _split_config(config: ScrapeConfig) -> list[ScrapeConfig]:
+    if config.year_from < config.year_to:
+        middle = (config.year_from + config.year_to) // 2
+        return [replace(config, year_to=middle), replace(config, year_from=middle + 1)]
+    if config.gearbox is None:
+        return [replace(config, gearbox=gearbox) for gearbox in GEARBOXES]
+    if config.fuel_type is None:
+        return [replace(config, fuel_type=fuel_type) for fuel_type in FUEL_TYPES]
+    return []
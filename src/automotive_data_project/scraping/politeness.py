@@ -0,0 +1,118 @@
+"""Request budget shared by every client process that talks to the same host.
+
+``SharedTokenBucket`` keeps one row per host in ``politeness_buckets``: a token count refilled at ``rate`` tokens
+per second up to ``burst``, and a cooldown deadline. A client takes a token before each request and sleeps
+until one is available. The database holding the row decides who shares the budget: a local SQLite file covers
+all processes on one host, the project's PostgreSQL database covers every host that writes to it.
+
+Each acquisition locks the row for one short transaction. The first statement is an UPDATE, so the lock is taken
+before the row is read: SQLite takes its write lock there and PostgreSQL takes a row lock.
+
+When any client sees ``RateLimited``, ``AccessBlocked`` or a CAPTCHA it records a cooldown on the row, and every
+other client's next ``acquire`` raises ``CooldownActive`` until it has passed.
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+from collections.abc import Callable
+from urllib.parse import urlsplit
+
+from sqlalchemy import Connection, Engine, Row, inspect, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import DBAPIError
+
+from automotive_data_project.scraping.exceptions import CooldownActive
+from automotive_data_project.storage.database import make_engine
+from automotive_data_project.storage.models import PolitenessBucket
+
+LOGGER = logging.getLogger(__name__)
+
+
+class SharedTokenBucket:
+    def __init__(
+        self,
+        engine: Engine,
+        host: str,
+        rate: float,
+        burst: float = 1.0,
+        clock: Callable[[], float] = time.time,
+        sleep_func: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self.engine = engine
+        self.host = host
+        self.rate = rate
+        self.burst = burst
+        self.clock = clock
+        self.sleep_func = sleep_func
+        try:
+            PolitenessBucket.__table__.create(engine, checkfirst=True)
+        except DBAPIError:
+            # Another process created the table between the check and the CREATE.
+            if not inspect(engine).has_table(PolitenessBucket.__tablename__):
+                raise
+
+    @classmethod
+    def for_url(cls, database_url: str, base_url: str, delay_seconds: float, **kwargs) -> SharedTokenBucket:
+        """Bucket for ``base_url``'s host allowing one request per ``delay_seconds`` across all sharing clients."""
+        return cls(make_engine(database_url), urlsplit(base_url).netloc, rate=1 / delay_seconds, **kwargs)
+
+    def acquire(self) -> None:
+        """Block until a token is taken; raises ``CooldownActive`` while the host is cooling down."""
+        while True:
+            wait = self._take()
+            if wait <= 0:
+                return
+            LOGGER.debug("Shared budget for %s empty, waiting %.2f seconds", self.host, wait)
+            self.sleep_func(wait)
+
+    def cooldown(self, seconds: float, reason: str) -> None:
+        until = self.clock() + seconds
+        with self.engine.begin() as conn:
+            row = self._locked_row(conn)
+            if until > row.cooldown_until:
+                conn.execute(
+                    update(PolitenessBucket)
+                    .where(PolitenessBucket.host == self.host)
+                    .values(cooldown_until=until, cooldown_reason=reason)
+                )
+        LOGGER.warning("Cooling down %s for %.0f seconds after %s", self.host, seconds, reason)
+
+    def _take(self) -> float:
+        now = self.clock()
+        with self.engine.begin() as conn:
+            row = self._locked_row(conn)
+            if row.cooldown_until > now:
+                remaining = row.cooldown_until - now
+                raise CooldownActive(
+                    f"{self.host} cooling down for {remaining:.0f}s after {row.cooldown_reason}",
+                    retry_after_seconds=int(remaining) + 1,
+                )
+            tokens = min(self.burst, row.tokens + max(now - row.updated_at, 0) * self.rate)
+            wait = 0.0 if tokens >= 1 else (1 - tokens) / self.rate
+            if not wait:
+                tokens -= 1
+            conn.execute(
+                update(PolitenessBucket).where(PolitenessBucket.host == self.host).values(tokens=tokens, updated_at=now)
+            )
+        return wait
+
+    def _locked_row(self, conn: Connection) -> Row:
+        touch = update(PolitenessBucket).where(PolitenessBucket.host == self.host).values(host=PolitenessBucket.host)
+        if conn.execute(touch).rowcount == 0:
+            insert = pg_insert if conn.dialect.name == "postgresql" else sqlite_insert
+            conn.execute(
+                insert(PolitenessBucket)
+                .values(host=self.host, tokens=self.burst, updated_at=self.clock(), cooldown_until=0.0)
+                .on_conflict_do_nothing(index_elements=["host"])
+            )
+            conn.execute(touch)
+        columns = (
+            PolitenessBucket.tokens,
+            PolitenessBucket.updated_at,
+            PolitenessBucket.cooldown_until,
+            PolitenessBucket.cooldown_reason,
+        )
+        return conn.execute(select(*columns).where(PolitenessBucket.host == self.host)).one()
@@ -0,0 +1,52 @@
+"""Deferred retries for transient fetch failures within one pipeline run.
+
+A ``FetchFailed`` (HTTP 5xx or a connection error) does not say anything about the listing, so instead of
+dropping it the pipeline defers it here and carries on with other work. A deferred fetch becomes due after
+``backoff_seconds * 2 ** (attempt - 1)``; ``pop`` sleeps until the earliest one is due. ``budget`` caps the retries
+of a whole run, so a failing source costs at most that many extra requests. Blocking signals never come here.
+"""
+
+from __future__ import annotations
+
+import heapq
+import time
+from collections.abc import Callable
+from itertools import count
+
+
+class RetryQueue:
+    def __init__(
+        self,
+        budget: int,
+        max_attempts: int,
+        backoff_seconds: float,
+        clock: Callable[[], float] = time.monotonic,
+        sleep_func: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self.budget_left = budget
+        self.max_attempts = max_attempts
+        self.backoff_seconds = backoff_seconds
+        self.clock = clock
+        self.sleep_func = sleep_func
+        self._heap: list[tuple[float, int, int, object]] = []
+        self._order = count()
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def defer(self, item: object, attempt: int) -> bool:
+        """Schedule another try of ``item`` after its ``attempt``-th failure; ``False`` when it is given up."""
+        if attempt >= self.max_attempts or self.budget_left <= 0:
+            return False
+        self.budget_left -= 1
+        due = self.clock() + self.backoff_seconds * 2 ** (attempt - 1)
+        heapq.heappush(self._heap, (due, next(self._order), attempt + 1, item))
+        return True
+
+    def pop(self) -> tuple[object, int]:
+        """Wait until the earliest deferred item is due; returns it with the number of its next attempt."""
+        due, _, attempt, item = heapq.heappop(self._heap)
+        wait = due - self.clock()
+        if wait > 0:
+            self.sleep_func(wait)
+        return item, attempt
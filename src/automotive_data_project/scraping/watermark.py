@@ -0,0 +1,34 @@
+"""Stop condition for newest-first incremental crawls.
+
+With ``search[order]=created_at_first:desc`` new adverts come first, so once a crawl reaches adverts that are
+already stored, the pages after it hold only older, known adverts. Promoted adverts are pinned to the top of
+every page whatever their age, which is why a few known IDs in a row do not stop the crawl on their own: it
+stops after a whole page of known IDs, or after ``stop_after`` known IDs in a row.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterable
+
+from automotive_data_project.scraping.models import ListingRef
+
+
+class KnownIdWatermark:
+    def __init__(self, known_ids: set[str], stop_after: int = 0) -> None:
+        self.known_ids = known_ids
+        self.stop_after = stop_after
+        self.streak = 0
+
+    def reached(self, refs: Iterable[ListingRef]) -> bool:
+        """Feed one results page in order; ``True`` once later pages are not worth fetching."""
+        seen = new = 0
+        stop = False
+        for ref in refs:
+            seen += 1
+            if ref.advert_id in self.known_ids:
+                self.streak += 1
+            else:
+                self.streak = 0
+                new += 1
+            stop = stop or bool(self.stop_after) and self.streak >= self.stop_after
+        return stop or (seen > 0 and new == 0)
@@ -0,0 +1,360 @@
+from __future__ import annotations
+
+from collections import Counter
+from dataclasses import dataclass, field
+from decimal import Decimal
+
+from sqlalchemy import (
+    Connection,
+    Integer,
+    and_,
+    case,
+    cast,
+    delete,
+    false,
+    func,
+    insert,
+    literal_column,
+    select,
+    text,
+    tuple_,
+    update,
+)
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from automotive_data_project.storage.models import Listing, MarketPriceHistogram, MarketSegmentStats
+
+SEGMENT_COLUMNS = ("make", "model", "production_year", "fuel_type")
+TRACKED_COLUMNS = (*SEGMENT_COLUMNS, "price", "mileage_km")
+MONEY_COLUMNS = {"price_sum", "price_min", "price_max"}
+PRICE_BUCKET_PLN = 10_000
+UNKNOWN_TEXT = ""
+UNKNOWN_YEAR = 0
+
+SegmentKey = tuple[str, str, int, str]
+
+
+def segment_key(row: dict[str, object]) -> SegmentKey:
+    """Segment of a listing; missing values map to '' or year 0 so they can be primary key parts."""
+    return (
+        str(row.get("make") or UNKNOWN_TEXT),
+        str(row.get("model") or UNKNOWN_TEXT),
+        int(row.get("production_year") or UNKNOWN_YEAR),
+        str(row.get("fuel_type") or UNKNOWN_TEXT),
+    )
+
+
+def price_bucket(price: object) -> int:
+    return int(Decimal(str(price)) // PRICE_BUCKET_PLN) * PRICE_BUCKET_PLN
+
+
+@dataclass
+class SegmentDelta:
+    listing_count: int = 0
+    priced_count: int = 0
+    price_sum: Decimal = Decimal(0)
+    mileage_count: int = 0
+    mileage_sum: int = 0
+    added_prices: list[Decimal] = field(default_factory=list)
+    added_mileages: list[int] = field(default_factory=list)
+    removed_prices: list[Decimal] = field(default_factory=list)
+    removed_mileages: list[int] = field(default_factory=list)
+    buckets: Counter[int] = field(default_factory=Counter)
+
+    def add(self, row: dict[str, object], sign: int) -> None:
+        self.listing_count += sign
+        price = row.get("price")
+        if price is not None:
+            value = Decimal(str(price))
+            self.priced_count += sign
+            self.price_sum += sign * value
+            self.buckets[price_bucket(value)] += sign
+            (self.added_prices if sign > 0 else self.removed_prices).append(value)
+        mileage = row.get("mileage_km")
+        if mileage is not None:
+            self.mileage_count += sign
+            self.mileage_sum += sign * int(mileage)
+            (self.added_mileages if sign > 0 else self.removed_mileages).append(int(mileage))
+
+
+def _tracked(row: dict[str, object]) -> dict[str, object]:
+    return {column: row.get(column) for column in TRACKED_COLUMNS}
+
+
+def _identity(row: dict[str, object]) -> tuple[str, str]:
+    return str(row.get("source") or "otomoto"), str(row["advert_id"])
+
+
+def lock_listings(conn: Connection, records: list[dict[str, object]]) -> None:
+    """Serialize writers of the same listings until this transaction ends, including listings not stored yet.
+
+    Without it, two transactions upserting one advert could both read the same previous row and both subtract
+    it from the aggregates. PostgreSQL takes a transaction-scoped advisory lock per (source, advert_id), in
+    sorted order so that two batches cannot deadlock. SQLite has one writer at a time, so an empty UPDATE that
+    takes the write lock is enough; the snapshot read after it sees every committed write.
+    """
+    if conn.dialect.name == "postgresql":
+        keys = sorted({"{}:{}".format(*_identity(record)) for record in records})
+        for start in range(0, len(keys), 500):
+            conn.execute(
+                text(
+                    "SELECT pg_advisory_xact_lock(hashtextextended(key, 0)) FROM unnest(CAST(:keys AS text[])) AS key"
+                ),
+                {"keys": keys[start : start + 500]},
+            )
+    else:
+        conn.execute(update(Listing).where(false()).values(id=Listing.id))
+
+
+def snapshot_rows(conn: Connection, records: list[dict[str, object]]) -> dict[tuple[str, str], dict[str, object]]:
+    """Current tracked values of the listings these records will overwrite, keyed by (source, advert_id).
+
+    The listings are locked first (see ``lock_listings``), so the values stay current until the transaction ends.
+    """
+    lock_listings(conn, records)
+    ids_by_source: dict[str, list[str]] = {}
+    for record in records:
+        source, advert_id = _identity(record)
+        ids_by_source.setdefault(source, []).append(advert_id)
+    columns = [getattr(Listing, column) for column in TRACKED_COLUMNS]
+    snapshot: dict[tuple[str, str], dict[str, object]] = {}
+    for source, advert_ids in ids_by_source.items():
+        ids = list(dict.fromkeys(advert_ids))
+        for start in range(0, len(ids), 500):
+            statement = select(Listing.advert_id, *columns).where(
+                Listing.source == source, Listing.advert_id.in_(ids[start : start + 500])
+            )
+            if conn.dialect.name == "postgresql":
+                statement = statement.with_for_update()
+            for row in conn.execute(statement).mappings():
+                snapshot[(source, row["advert_id"])] = _tracked(row)
+    return snapshot
+
+
+def compute_deltas(
+    previous: dict[tuple[str, str], dict[str, object]],
+    records: list[dict[str, object]],
+) -> dict[SegmentKey, SegmentDelta]:
+    """Per-segment changes caused by upserting records over the previous (source, advert_id) state."""
+    state = dict(previous)
+    deltas: dict[SegmentKey, SegmentDelta] = {}
+    for record in records:
+        identity = _identity(record)
+        new = _tracked(record)
+        old = state.get(identity)
+        if old == new:
+            continue
+        if old is not None:
+            deltas.setdefault(segment_key(old), SegmentDelta()).add(old, -1)
+        deltas.setdefault(segment_key(new), SegmentDelta()).add(new, 1)
+        state[identity] = new
+    return deltas
+
+
+def _insert_factory(conn: Connection):
+    return pg_insert if conn.dialect.name == "postgresql" else sqlite_insert
+
+
+def _least(current, incoming):
+    return case(
+        (current.is_(None), incoming), (incoming.is_(None), current), (incoming < current, incoming), else_=current
+    )
+
+
+def _greatest(current, incoming):
+    return case(
+        (current.is_(None), incoming), (incoming.is_(None), current), (incoming > current, incoming), else_=current
+    )
+
+
+def _segment_filter(table, key: SegmentKey):
+    return and_(*(getattr(table, column) == value for column, value in zip(SEGMENT_COLUMNS, key, strict=True)))
+
+
+def _listing_segment_filter(key: SegmentKey):
+    conditions = []
+    for column, value in zip(SEGMENT_COLUMNS, key, strict=True):
+        attribute = getattr(Listing, column)
+        unknown = UNKNOWN_YEAR if column == "production_year" else UNKNOWN_TEXT
+        conditions.append(attribute.is_(None) | (attribute == value) if value == unknown else attribute == value)
+    return and_(*conditions)
+
+
+def _refresh_extremes(conn: Connection, key: SegmentKey) -> None:
+    statement = select(
+        func.min(Listing.price), func.max(Listing.price), func.min(Listing.mileage_km), func.max(Listing.mileage_km)
+    ).where(_listing_segment_filter(key))
+    price_min, price_max, mileage_min, mileage_max = conn.execute(statement).one()
+    conn.execute(
+        MarketSegmentStats.__table__.update()
+        .where(_segment_filter(MarketSegmentStats, key))
+        .values(price_min=price_min, price_max=price_max, mileage_min=mileage_min, mileage_max=mileage_max)
+    )
+
+
+def apply_deltas(conn: Connection, deltas: dict[SegmentKey, SegmentDelta]) -> None:
+    """Fold segment deltas into the aggregate tables inside the caller's transaction."""
+    if not deltas:
+        return
+    factory = _insert_factory(conn)
+    stats = MarketSegmentStats.__table__
+    histogram = MarketPriceHistogram.__table__
+    for key, delta in deltas.items():
+        keys = dict(zip(SEGMENT_COLUMNS, key, strict=True))
+        values = {
+            **keys,
+            "listing_count": delta.listing_count,
+            "priced_count": delta.priced_count,
+            "price_sum": delta.price_sum,
+            "price_min": min(delta.added_prices, default=None),
+            "price_max": max(delta.added_prices, default=None),
+            "mileage_count": delta.mileage_count,
+            "mileage_sum": delta.mileage_sum,
+            "mileage_min": min(delta.added_mileages, default=None),
+            "mileage_max": max(delta.added_mileages, default=None),
+        }
+        statement = factory(stats).values(**values)
+        excluded = statement.excluded
+        conn.execute(
+            statement.on_conflict_do_update(
+                index_elements=list(SEGMENT_COLUMNS),
+                set_={
+                    "listing_count": stats.c.listing_count + excluded.listing_count,
+                    "priced_count": stats.c.priced_count + excluded.priced_count,
+                    "price_sum": stats.c.price_sum + excluded.price_sum,
+                    "price_min": _least(stats.c.price_min, excluded.price_min),
+                    "price_max": _greatest(stats.c.price_max, excluded.price_max),
+                    "mileage_count": stats.c.mileage_count + excluded.mileage_count,
+                    "mileage_sum": stats.c.mileage_sum + excluded.mileage_sum,
+                    "mileage_min": _least(stats.c.mileage_min, excluded.mileage_min),
+                    "mileage_max": _greatest(stats.c.mileage_max, excluded.mileage_max),
+                },
+            )
+        )
+        for bucket, change in delta.buckets.items():
+            if change == 0:
+                continue
+            bucket_statement = factory(histogram).values(**keys, bucket_start=bucket, listing_count=change)
+            conn.execute(
+                bucket_statement.on_conflict_do_update(
+                    index_elements=[*SEGMENT_COLUMNS, "bucket_start"],
+                    set_={"listing_count": histogram.c.listing_count + bucket_statement.excluded.listing_count},
+                )
+            )
+        if delta.removed_prices or delta.removed_mileages:
+            _refresh_extremes(conn, key)
+
+    touched = tuple_(*(stats.c[column] for column in SEGMENT_COLUMNS)).in_(list(deltas))
+    conn.execute(delete(stats).where(touched, stats.c.listing_count <= 0))
+    touched_buckets = tuple_(*(histogram.c[column] for column in SEGMENT_COLUMNS)).in_(list(deltas))
+    conn.execute(delete(histogram).where(touched_buckets, histogram.c.listing_count <= 0))
+
+
+def listing_segment_columns():
+    return [
+        func.coalesce(Listing.make, UNKNOWN_TEXT).label("make"),
+        func.coalesce(Listing.model, UNKNOWN_TEXT).label("model"),
+        func.coalesce(Listing.production_year, UNKNOWN_YEAR).label("production_year"),
+        func.coalesce(Listing.fuel_type, UNKNOWN_TEXT).label("fuel_type"),
+    ]
+
+
+def _expected_stats_select():
+    segment = listing_segment_columns()
+    return select(
+        *segment,
+        func.count().label("listing_count"),
+        func.count(Listing.price).label("priced_count"),
+        func.coalesce(func.sum(Listing.price), 0).label("price_sum"),
+        func.min(Listing.price).label("price_min"),
+        func.max(Listing.price).label("price_max"),
+        func.count(Listing.mileage_km).label("mileage_count"),
+        func.coalesce(func.sum(Listing.mileage_km), 0).label("mileage_sum"),
+        func.min(Listing.mileage_km).label("mileage_min"),
+        func.max(Listing.mileage_km).label("mileage_max"),
+    ).group_by(*segment)
+
+
+def _expected_histogram_select(conn: Connection):
+    segment = listing_segment_columns()
+    width = literal_column(str(PRICE_BUCKET_PLN))
+    if conn.dialect.name == "postgresql":
+        bucket = cast(func.floor(Listing.price / width), Integer) * width
+    else:
+        bucket = cast(Listing.price / width, Integer) * width
+    bucket = bucket.label("bucket_start")
+    return (
+        select(*segment, bucket, func.count().label("listing_count"))
+        .where(Listing.price.is_not(None))
+        .group_by(*segment, bucket)
+    )
+
+
+def rebuild_aggregates(conn: Connection) -> dict[str, int]:
+    """Recompute both aggregate tables from the full listings table."""
+    conn.execute(delete(MarketSegmentStats))
+    conn.execute(delete(MarketPriceHistogram))
+    for model, expected_select in (
+        (MarketSegmentStats, _expected_stats_select()),
+        (MarketPriceHistogram, _expected_histogram_select(conn)),
+    ):
+        names = [column.name for column in expected_select.selected_columns]
+        conn.execute(insert(model).from_select(names, expected_select))
+    return {
+        "segments": conn.execute(select(func.count()).select_from(MarketSegmentStats)).scalar_one(),
+        "histogram_buckets": conn.execute(select(func.count()).select_from(MarketPriceHistogram)).scalar_one(),
+    }
+
+
+def _normalized(row: dict[str, object]) -> dict[str, object]:
+    result: dict[str, object] = {}
+    for name, value in row.items():
+        if name in MONEY_COLUMNS and value is not None:
+            value = Decimal(str(value)).quantize(Decimal("0.01"))
+        result[name] = value
+    return result
+
+
+def verify_aggregates(conn: Connection) -> list[str]:
+    """Compare stored aggregates with a fresh GROUP BY; returns human-readable mismatches."""
+    problems: list[str] = []
+    checks = [
+        (MarketSegmentStats, _expected_stats_select(), SEGMENT_COLUMNS),
+        (MarketPriceHistogram, _expected_histogram_select(conn), (*SEGMENT_COLUMNS, "bucket_start")),
+    ]
+    for model, expected_select, key_columns in checks:
+        expected = {
+            tuple(row[column] for column in key_columns): _normalized(dict(row))
+            for row in conn.execute(expected_select).mappings()
+        }
+        stored_columns = [model.__table__.c[column.name] for column in expected_select.selected_columns]
+        stored = {
+            tuple(row[column] for column in key_columns): _normalized(dict(row))
+            for row in conn.execute(select(*stored_columns)).mappings()
+        }
+        table = model.__tablename__
+        for key in sorted(expected.keys() - stored.keys(), key=str):
+            problems.append(f"{table}: missing {key}")
+        for key in sorted(stored.keys() - expected.keys(), key=str):
+            problems.append(f"{table}: unexpected {key}")
+        for key in sorted(expected.keys() & stored.keys(), key=str):
+            if expected[key] != stored[key]:
+                problems.append(f"{table}: {key} stored={stored[key]} expected={expected[key]}")
+    return problems
+
+
+def read_segment_stats(conn: Connection, make: str | None = None, model: str | None = None) -> list[dict[str, object]]:
+    """Precomputed segment figures for dashboards, with mean price and mileage derived on read."""
+    statement = select(MarketSegmentStats.__table__)
+    if make is not None:
+        statement = statement.where(MarketSegmentStats.make == make)
+    if model is not None:
+        statement = statement.where(MarketSegmentStats.model == model)
+    rows = []
+    for row in conn.execute(statement.order_by(*SEGMENT_COLUMNS)).mappings():
+        item = dict(row)
+        item["price_mean"] = Decimal(str(row["price_sum"])) / row["priced_count"] if row["priced_count"] else None
+        item["mileage_mean"] = row["mileage_sum"] / row["mileage_count"] if row["mileage_count"] else None
+        rows.append(item)
+    return rows
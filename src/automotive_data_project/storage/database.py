@@ -1,13 +1,109 @@
 from __future__ import annotations
 
-from sqlalchemy import Engine, create_engine
+from dataclasses import dataclass, field
+
+from sqlalchemy import Engine, create_engine, event
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import Session, sessionmaker
 
+from automotive_data_project.storage.migrations import apply_migrations
 from automotive_data_project.storage.models import Base
 
 
-def make_engine(database_url: str) -> Engine:
-    return create_engine(database_url, future=True)
+@dataclass(frozen=True)
+class EngineProfile:
+    """Dialect-specific engine tuning selected by name from configuration."""
+
+    name: str
+    sqlite_pragmas: dict[str, str | int] = field(default_factory=dict)
+    pool_size: int | None = None
+    max_overflow: int | None = None
+    pool_pre_ping: bool = False
+    pool_recycle_seconds: int | None = None
+    statement_timeout_ms: int | None = None
+    executemany_mode: str | None = None
+
+
+ENGINE_PROFILES = {
+    "plain": EngineProfile(name="plain"),
+    "default": EngineProfile(
+        name="default",
+        sqlite_pragmas={
+            "journal_mode": "WAL",
+            "synchronous": "NORMAL",
+            "mmap_size": 268_435_456,
+            "cache_size": -65_536,
+            "temp_store": "MEMORY",
+        },
+        pool_size=5,
+        max_overflow=5,
+        pool_pre_ping=True,
+        pool_recycle_seconds=1800,
+        statement_timeout_ms=60_000,
+        executemany_mode="values_plus_batch",
+    ),
+    "bulk": EngineProfile(
+        name="bulk",
+        sqlite_pragmas={
+            "journal_mode": "WAL",
+            "synchronous": "OFF",
+            "mmap_size": 1_073_741_824,
+            "cache_size": -262_144,
+            "temp_store": "MEMORY",
+        },
+        pool_size=2,
+        max_overflow=0,
+        pool_pre_ping=True,
+        pool_recycle_seconds=1800,
+        statement_timeout_ms=600_000,
+        executemany_mode="values_plus_batch",
+    ),
+}
+
+
+def get_engine_profile(name: str) -> EngineProfile:
+    try:
+        return ENGINE_PROFILES[name]
+    except KeyError:
+        known = ", ".join(sorted(ENGINE_PROFILES))
+        raise ValueError(f"Unknown engine profile {name!r}; expected one of: {known}") from None
+
+
+def _install_sqlite_pragmas(engine: Engine, pragmas: dict[str, str | int]) -> None:
+    @event.listens_for(engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record) -> None:
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+
+def make_engine(database_url: str, profile: str | EngineProfile = "default") -> Engine:
+    """Create an engine tuned for the URL's dialect using a named profile."""
+    selected = get_engine_profile(profile) if isinstance(profile, str) else profile
+    backend = make_url(database_url).get_backend_name()
+
+    if backend == "sqlite":
+        engine = create_engine(database_url, future=True)
+        if selected.sqlite_pragmas:
+            _install_sqlite_pragmas(engine, selected.sqlite_pragmas)
+        return engine
+
+    kwargs: dict[str, object] = {"future": True, "pool_pre_ping": selected.pool_pre_ping}
+    if selected.pool_size is not None:
+        kwargs["pool_size"] = selected.pool_size
+    if selected.max_overflow is not None:
+        kwargs["max_overflow"] = selected.max_overflow
+    if selected.pool_recycle_seconds is not None:
+        kwargs["pool_recycle"] = selected.pool_recycle_seconds
+    if backend == "postgresql":
+        if selected.statement_timeout_ms is not None:
+            kwargs["connect_args"] = {"options": f"-c statement_timeout={selected.statement_timeout_ms}"}
+        if selected.executemany_mode is not None and make_url(database_url).get_driver_name() == "psycopg2":
+            kwargs["executemany_mode"] = selected.executemany_mode
+    return create_engine(database_url, **kwargs)
 
 
 def make_session_factory(engine: Engine) -> sessionmaker[Session]:
@@ -15,9 +111,11 @@ def make_session_factory(engine: Engine) -> sessionmaker[Session]:
 
 
 def init_schema(engine: Engine) -> None:
+    """Create missing tables, then apply pending migrations to existing ones."""
     Base.metadata.create_all(engine)
+    apply_migrations(engine)
 
 
 def reset_schema(engine: Engine) -> None:
     Base.metadata.drop_all(engine)
-    Base.metadata.create_all(engine)
+    init_schema(engine)
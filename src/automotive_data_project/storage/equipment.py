@@ -0,0 +1,220 @@
+"""Equipment dictionary and per-listing equipment bitmasks.
+
+Every equipment name gets a small integer ID in ``equipment_options``. A listing stores its equipment as
+``equipment_mask``, a little-endian bitset where bit ``n`` is set when the listing has option ``n``. The IDs
+seeded from the packaged ``data/equipment_options.csv`` match the legacy relational export; ID 0 (the empty name) is
+never used. Filtering by required and excluded options then reads only ``(id, equipment_mask)`` and
+compares integers instead of parsing the JSON ``equipment`` list of every row.
+"""
+
+from __future__ import annotations
+
+import csv
+from collections.abc import Iterable
+from importlib.resources import files
+from typing import TYPE_CHECKING
+
+from sqlalchemy import ColumnElement, Connection, and_, case, false, func, inspect, not_, select, text, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from automotive_data_project.storage.models import EquipmentOption, Listing
+
+if TYPE_CHECKING:
+    from importlib.resources.abc import Traversable
+
+EQUIPMENT_OPTIONS_CSV = files("automotive_data_project") / "data" / "equipment_options.csv"
+
+
+def normalize_equipment_name(name: str) -> str:
+    return name.strip().lower()
+
+
+def option_bits(option_ids: Iterable[int]) -> int:
+    bits = 0
+    for option_id in option_ids:
+        bits |= 1 << option_id
+    return bits
+
+
+def encode_mask(option_ids: Iterable[int]) -> bytes | None:
+    bits = option_bits(option_ids)
+    if not bits:
+        return None
+    return bits.to_bytes((bits.bit_length() + 7) // 8, "little")
+
+
+def decode_mask(mask: bytes | None) -> int:
+    return int.from_bytes(mask, "little") if mask else 0
+
+
+def mask_option_ids(mask: bytes | None) -> set[int]:
+    bits = decode_mask(mask)
+    return {index for index in range(bits.bit_length()) if bits >> index & 1}
+
+
+def _insert(conn: Connection):
+    return pg_insert if conn.dialect.name == "postgresql" else sqlite_insert
+
+
+def lock_equipment_options(conn: Connection) -> None:
+    """Serialize ID allocation in ``equipment_options`` until this transaction ends.
+
+    PostgreSQL takes a transaction-scoped advisory lock on the table name. SQLite has one writer at a time, so an
+    empty UPDATE that takes the write lock is enough, and the ``max(id)`` read after it sees every committed option.
+    """
+    if conn.dialect.name == "postgresql":
+        conn.execute(text("SELECT pg_advisory_xact_lock(hashtextextended('equipment_options', 0))"))
+    else:
+        conn.execute(update(EquipmentOption).where(false()).values(id=EquipmentOption.id))
+
+
+class EquipmentDictionary:
+    """Cached name -> ID lookup over ``equipment_options`` that registers unseen names on demand."""
+
+    def __init__(self) -> None:
+        self._ids: dict[str, int] = {}
+
+    def load(self, conn: Connection) -> None:
+        self._ids = dict(conn.execute(select(EquipmentOption.name, EquipmentOption.id)).all())
+
+    def lookup(self, conn: Connection, names: Iterable[str]) -> dict[str, int]:
+        """IDs of names already in the dictionary; unknown names are left out."""
+        wanted = {normalize_equipment_name(name) for name in names} - {""}
+        if wanted - self._ids.keys():
+            self.load(conn)
+        return {name: self._ids[name] for name in wanted if name in self._ids}
+
+    def ids_for(self, conn: Connection, names: Iterable[str]) -> list[int]:
+        """IDs for all names, inserting new options with the next free IDs.
+
+        New names are registered under ``lock_equipment_options``, so concurrent writers take turns picking
+        ``max(id) + 1``. The insert skips names another writer has added meanwhile, and the IDs are read back
+        from the table.
+        """
+        wanted = {normalize_equipment_name(name) for name in names} - {""}
+        missing = wanted - self._ids.keys()
+        if missing:
+            self.load(conn)
+            missing = wanted - self._ids.keys()
+        if missing:
+            lock_equipment_options(conn)
+            next_id = (conn.execute(select(func.max(EquipmentOption.id))).scalar() or 0) + 1
+            rows = [{"id": next_id + offset, "name": name} for offset, name in enumerate(sorted(missing))]
+            conn.execute(_insert(conn)(EquipmentOption).on_conflict_do_nothing(index_elements=["name"]), rows)
+            statement = select(EquipmentOption.name, EquipmentOption.id).where(EquipmentOption.name.in_(missing))
+            self._ids.update(conn.execute(statement).all())
+        return sorted(self._ids[name] for name in wanted)
+
+    def mask_for(self, conn: Connection, names: Iterable[str] | None) -> bytes | None:
+        return encode_mask(self.ids_for(conn, names or ()))
+
+
+def seed_equipment_options(conn: Connection, path: Traversable = EQUIPMENT_OPTIONS_CSV) -> int:
+    """Insert options from an ``id,name`` CSV that are not in the table yet; returns the number added.
+
+    A missing file raises ``FileNotFoundError``: without the seed, new names would take IDs that disagree
+    with the legacy export.
+    """
+    if not path.is_file():
+        raise FileNotFoundError(f"Equipment options seed not found: {path}")
+    known_ids = set(conn.execute(select(EquipmentOption.id)).scalars())
+    known_names = set(conn.execute(select(EquipmentOption.name)).scalars())
+    rows = []
+    with path.open(encoding="utf-8", newline="") as handle:
+        for row in csv.DictReader(handle):
+            option_id, name = int(row["id"]), normalize_equipment_name(row["name"])
+            if name and option_id not in known_ids and name not in known_names:
+                rows.append({"id": option_id, "name": name})
+                known_ids.add(option_id)
+                known_names.add(name)
+    if rows:
+        conn.execute(EquipmentOption.__table__.insert(), rows)
+    return len(rows)
+
+
+def backfill_equipment_masks(conn: Connection, batch_size: int = 5_000) -> int:
+    """Compute ``equipment_mask`` from the JSON ``equipment`` list for every listing; returns rows updated."""
+    dictionary = EquipmentDictionary()
+    table = Listing.__table__
+    updated = 0
+    last_id = 0
+    while True:
+        statement = (
+            select(table.c.id, table.c.equipment)
+            .where(table.c.id > last_id, table.c.equipment.is_not(None))
+            .order_by(table.c.id)
+            .limit(batch_size)
+        )
+        rows = conn.execute(statement).all()
+        if not rows:
+            return updated
+        for row in rows:
+            mask = dictionary.mask_for(conn, row.equipment)
+            conn.execute(update(table).where(table.c.id == row.id).values(equipment_mask=mask))
+        updated += len(rows)
+        last_id = rows[-1].id
+
+
+def add_equipment_masks(conn: Connection) -> None:
+    """Migration: add ``listings.equipment_mask`` where missing, seed the dictionary and backfill masks."""
+    columns = {column["name"] for column in inspect(conn).get_columns("listings")}
+    if "equipment_mask" not in columns:
+        column_type = Listing.__table__.c.equipment_mask.type.compile(dialect=conn.dialect)
+        conn.execute(text(f"ALTER TABLE listings ADD COLUMN equipment_mask {column_type}"))
+    EquipmentOption.__table__.create(conn, checkfirst=True)
+    seed_equipment_options(conn)
+    backfill_equipment_masks(conn)
+
+
+def _has_option(option_id: int) -> ColumnElement[bool]:
+    # PostgreSQL get_bit numbers bits from the least significant end of each byte, like the little-endian mask.
+    # CASE keeps get_bit away from masks too short to hold the bit, where it would raise.
+    mask = Listing.equipment_mask
+    return case((func.length(mask) > option_id // 8, func.get_bit(mask, option_id)), else_=0) == 1
+
+
+def listing_ids_with_equipment(
+    conn: Connection,
+    required: Iterable[str] = (),
+    excluded: Iterable[str] = (),
+    batch_size: int = 20_000,
+) -> list[int]:
+    """IDs of listings that have every required option and none of the excluded ones.
+
+    On PostgreSQL the bit tests run in the query and only matching IDs are returned. SQLite has no function to
+    read a bit from a blob, so there every ``(id, equipment_mask)`` pair is streamed to Python in batches of
+    ``batch_size`` and tested with two bitwise ANDs; the transfer grows with the table, not with the matches.
+    Unknown required names match nothing; unknown excluded names are ignored.
+    """
+    required = list(required)
+    dictionary = EquipmentDictionary()
+    required_ids = dictionary.lookup(conn, required)
+    if len(required_ids) < len({normalize_equipment_name(name) for name in required} - {""}):
+        return []
+    excluded_ids = dictionary.lookup(conn, excluded)
+
+    if conn.dialect.name == "postgresql":
+        statement = (
+            select(Listing.id)
+            .where(
+                and_(
+                    *(_has_option(option_id) for option_id in required_ids.values()),
+                    *(not_(_has_option(option_id)) for option_id in excluded_ids.values()),
+                )
+            )
+            .order_by(Listing.id)
+        )
+        return list(conn.execute(statement).scalars())
+
+    required_bits = option_bits(required_ids.values())
+    excluded_bits = option_bits(excluded_ids.values())
+    statement = select(Listing.id, Listing.equipment_mask).order_by(Listing.id)
+    if required_bits:
+        statement = statement.where(Listing.equipment_mask.is_not(None))
+    matches = []
+    for row in conn.execution_options(yield_per=batch_size).execute(statement):
+        bits = decode_mask(row.equipment_mask)
+        if bits & required_bits == required_bits and not bits & excluded_bits:
+            matches.append(row.id)
+    return matches
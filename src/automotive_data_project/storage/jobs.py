@@ -0,0 +1,186 @@
+"""Database-backed work queue for crawl workers.
+
+Jobs live in ``crawl_jobs`` and move ``pending`` -> ``running`` -> ``done`` or ``failed``. A claim sets a lease;
+workers extend it with heartbeats while they work. A ``running`` job whose lease has expired belongs to a
+crashed or stuck worker and can be claimed again, up to ``max_attempts`` claims.
+
+Claiming is one ``UPDATE ... WHERE id IN (SELECT ... LIMIT n) RETURNING`` statement. On PostgreSQL the inner
+select takes ``FOR UPDATE SKIP LOCKED``, so concurrent workers skip each other's rows instead of waiting. SQLite
+has no row locks. It runs writes one at a time under its database lock, so the same statement is just as
+exclusive there; other workers wait on the lock for the length of one short transaction.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import Connection, Engine, and_, case, func, or_, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from automotive_data_project.storage.models import CrawlJob
+
+DEFAULT_LEASE_SECONDS = 300
+DEFAULT_MAX_ATTEMPTS = 3
+
+
+@dataclass(frozen=True)
+class ClaimedJob:
+    id: int
+    kind: str
+    payload: dict[str, object]
+    attempts: int
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _insert(conn: Connection):
+    return pg_insert if conn.dialect.name == "postgresql" else sqlite_insert
+
+
+class JobQueue:
+    """Short transactions over ``crawl_jobs``; each call commits before returning."""
+
+    def __init__(
+        self,
+        engine: Engine,
+        lease_seconds: float = DEFAULT_LEASE_SECONDS,
+        max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+        clock: Callable[[], datetime] = _utcnow,
+    ) -> None:
+        self.engine = engine
+        self.lease = timedelta(seconds=lease_seconds)
+        self.max_attempts = max_attempts
+        self.clock = clock
+
+    def enqueue(self, kind: str, jobs: Iterable[tuple[str, dict[str, object]]], requeue_finished: bool = False) -> int:
+        """Add ``(job_key, payload)`` pairs; returns how many were new or requeued.
+
+        Keys already in the table are left alone, unless ``requeue_finished`` is set and the job is done or
+        failed, in which case it goes back to ``pending`` with the new payload.
+        """
+        rows = [{"kind": kind, "job_key": key, "payload": payload, "status": "pending"} for key, payload in jobs]
+        if not rows:
+            return 0
+        keys = [row["job_key"] for row in rows]
+        finished_statuses = ("done", "failed")
+        with self.engine.begin() as conn:
+            existing = dict(
+                conn.execute(select(CrawlJob.job_key, CrawlJob.status).where(CrawlJob.job_key.in_(keys))).all()
+            )
+            statement = _insert(conn)(CrawlJob)
+            if requeue_finished:
+                statement = statement.on_conflict_do_update(
+                    index_elements=["job_key"],
+                    set_={
+                        "payload": statement.excluded.payload,
+                        "status": "pending",
+                        "attempts": 0,
+                        "error": None,
+                        "finished_at": None,
+                    },
+                    where=CrawlJob.status.in_(finished_statuses),
+                )
+            else:
+                statement = statement.on_conflict_do_nothing(index_elements=["job_key"])
+            conn.execute(statement, rows)
+        requeued = (
+            {key for key, status in existing.items() if status in finished_statuses} if requeue_finished else set()
+        )
+        return len({key for key in keys if key not in existing or key in requeued})
+
+    def claim(self, worker_id: str, limit: int = 1, kind: str | None = None) -> list[ClaimedJob]:
+        now = self.clock()
+        expired = and_(CrawlJob.status == "running", CrawlJob.lease_expires_at < now)
+        with self.engine.begin() as conn:
+            # Jobs whose lease ran out too often are poison (they keep killing workers); stop handing them out.
+            conn.execute(
+                update(CrawlJob)
+                .where(expired, CrawlJob.attempts >= self.max_attempts)
+                .values(status="failed", error="lease expired", worker_id=None, finished_at=now)
+            )
+            candidates = select(CrawlJob.id).where(or_(CrawlJob.status == "pending", expired))
+            if kind is not None:
+                candidates = candidates.where(CrawlJob.kind == kind)
+            candidates = candidates.order_by(CrawlJob.id).limit(limit).with_for_update(skip_locked=True)
+            statement = (
+                update(CrawlJob)
+                .where(CrawlJob.id.in_(candidates))
+                .values(
+                    status="running",
+                    worker_id=worker_id,
+                    attempts=CrawlJob.attempts + 1,
+                    lease_expires_at=now + self.lease,
+                    heartbeat_at=now,
+                )
+                .returning(CrawlJob.id, CrawlJob.kind, CrawlJob.payload, CrawlJob.attempts)
+            )
+            claimed = [ClaimedJob(*row) for row in conn.execute(statement)]
+        return sorted(claimed, key=lambda job: job.id)
+
+    def _owned(self, job_ids: Iterable[int], worker_id: str):
+        return and_(CrawlJob.id.in_(list(job_ids)), CrawlJob.worker_id == worker_id, CrawlJob.status == "running")
+
+    def heartbeat(self, worker_id: str, job_ids: Iterable[int]) -> set[int]:
+        """Extend the leases of jobs this worker still holds; returns their IDs."""
+        now = self.clock()
+        with self.engine.begin() as conn:
+            statement = (
+                update(CrawlJob)
+                .where(self._owned(job_ids, worker_id))
+                .values(lease_expires_at=now + self.lease, heartbeat_at=now)
+                .returning(CrawlJob.id)
+            )
+            return set(conn.execute(statement).scalars())
+
+    def complete(self, worker_id: str, job_id: int, result: dict[str, object] | None = None) -> bool:
+        """Mark a job done; ``False`` if the lease was lost and another worker owns it now."""
+        with self.engine.begin() as conn:
+            statement = (
+                update(CrawlJob)
+                .where(self._owned([job_id], worker_id))
+                .values(status="done", result=result, error=None, lease_expires_at=None, finished_at=self.clock())
+            )
+            return conn.execute(statement).rowcount == 1
+
+    def fail(self, worker_id: str, job_id: int, error: str) -> bool:
+        """Record a failed attempt; the job is retried until it has been claimed ``max_attempts`` times."""
+        exhausted = CrawlJob.attempts >= self.max_attempts
+        with self.engine.begin() as conn:
+            statement = (
+                update(CrawlJob)
+                .where(self._owned([job_id], worker_id))
+                .values(
+                    status=case((exhausted, "failed"), else_="pending"),
+                    worker_id=case((exhausted, CrawlJob.worker_id), else_=None),
+                    finished_at=case((exhausted, self.clock()), else_=None),
+                    lease_expires_at=None,
+                    error=error,
+                )
+            )
+            return conn.execute(statement).rowcount == 1
+
+    def release(self, worker_id: str, job_ids: Iterable[int]) -> int:
+        """Hand unfinished jobs back without counting the attempt, e.g. when the source blocks us."""
+        with self.engine.begin() as conn:
+            statement = (
+                update(CrawlJob)
+                .where(self._owned(job_ids, worker_id))
+                .values(status="pending", worker_id=None, lease_expires_at=None, attempts=CrawlJob.attempts - 1)
+            )
+            return conn.execute(statement).rowcount
+
+    def counts(self) -> dict[str, dict[str, int]]:
+        """Job counts by kind and status."""
+        with self.engine.connect() as conn:
+            rows = conn.execute(
+                select(CrawlJob.kind, CrawlJob.status, func.count()).group_by(CrawlJob.kind, CrawlJob.status)
+            ).all()
+        summary: dict[str, dict[str, int]] = {}
+        for kind, status, count in rows:
+            summary.setdefault(kind, {})[status] = count
+        return summary
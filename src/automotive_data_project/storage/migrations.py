@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import logging
+from collections.abc import Callable
+from dataclasses import dataclass
+
+from sqlalchemy import Connection, Engine, Index, insert, select
+
+from automotive_data_project.storage.aggregates import rebuild_aggregates
+from automotive_data_project.storage.equipment import add_equipment_masks
+from automotive_data_project.storage.models import Listing, SchemaMigration
+from automotive_data_project.storage.sketches import rebuild_sketches
+
+LOGGER = logging.getLogger(__name__)
+
+ANALYTICAL_INDEXES = (
+    "ix_listings_make_model_year",
+    "ix_listings_last_seen_at",
+    "ix_listings_priced_year",
+    "ix_listings_priced_fuel",
+    "ix_listings_priced_mileage",
+)
+
+
+@dataclass(frozen=True)
+class Migration:
+    """One forward-only schema change, applied at most once per database."""
+
+    version: int
+    name: str
+    upgrade: Callable[[Connection], object]
+
+
+def _listing_index(name: str) -> Index:
+    for index in Listing.__table__.indexes:
+        if index.name == name:
+            return index
+    raise KeyError(name)
+
+
+def _create_analytical_indexes(conn: Connection) -> None:
+    for name in ANALYTICAL_INDEXES:
+        _listing_index(name).create(conn, checkfirst=True)
+
+
+MIGRATIONS: list[Migration] = [
+    Migration(1, "analytical_listing_indexes", _create_analytical_indexes),
+    Migration(2, "market_segment_aggregates", rebuild_aggregates),
+    Migration(3, "market_quantile_sketches", rebuild_sketches),
+    Migration(4, "listing_equipment_masks", add_equipment_masks),
+]
+
+
+def applied_versions(conn: Connection) -> set[int]:
+    SchemaMigration.__table__.create(conn, checkfirst=True)
+    return set(conn.execute(select(SchemaMigration.version)).scalars())
+
+
+def apply_migrations(engine: Engine) -> list[Migration]:
+    """Apply pending migrations in version order, each in its own transaction."""
+    with engine.begin() as conn:
+        done = applied_versions(conn)
+    applied: list[Migration] = []
+    for migration in sorted(MIGRATIONS, key=lambda item: item.version):
+        if migration.version in done:
+            continue
+        with engine.begin() as conn:
+            migration.upgrade(conn)
+            conn.execute(insert(SchemaMigration).values(version=migration.version, name=migration.name))
+        LOGGER.info("Applied migration %s %s", migration.version, migration.name)
+        applied.append(migration)
+    return applied
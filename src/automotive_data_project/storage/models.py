@@ -1,6 +1,18 @@
 from __future__ import annotations
 
-from sqlalchemy import JSON, DateTime, Index, Integer, Numeric, String, Text
+from sqlalchemy import (
+    JSON,
+    BigInteger,
+    DateTime,
+    Float,
+    Index,
+    Integer,
+    LargeBinary,
+    Numeric,
+    String,
+    Text,
+    text,
+)
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
 from sqlalchemy.sql import func
 
@@ -11,7 +23,32 @@ class Base(DeclarativeBase):
 
 class Listing(Base):
     __tablename__ = "listings"
-    __table_args__ = (Index("uq_listings_source_advert_id", "source", "advert_id", unique=True),)
+    __table_args__ = (
+        Index("uq_listings_source_advert_id", "source", "advert_id", unique=True),
+        Index("ix_listings_make_model_year", "make", "model", "production_year"),
+        Index("ix_listings_last_seen_at", "last_seen_at"),
+        Index(
+            "ix_listings_priced_year",
+            "production_year",
+            "price",
+            postgresql_where=text("price IS NOT NULL"),
+            sqlite_where=text("price IS NOT NULL"),
+        ),
+        Index(
+            "ix_listings_priced_fuel",
+            "fuel_type",
+            "price",
+            postgresql_where=text("price IS NOT NULL"),
+            sqlite_where=text("price IS NOT NULL"),
+        ),
+        Index(
+            "ix_listings_priced_mileage",
+            "mileage_km",
+            "price",
+            postgresql_where=text("price IS NOT NULL"),
+            sqlite_where=text("price IS NOT NULL"),
+        ),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     advert_id: Mapped[str] = mapped_column(String(64), nullable=False)
@@ -34,4 +71,105 @@ class Listing(Base):
     last_seen_at: Mapped[object] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     scraped_at: Mapped[object | None] = mapped_column(DateTime(timezone=True))
     equipment: Mapped[list[str] | None] = mapped_column(JSON)
+    equipment_mask: Mapped[bytes | None] = mapped_column(LargeBinary)
     raw_parameters: Mapped[dict[str, str] | None] = mapped_column(JSON)
+
+
+# Columns derived from other listing columns for indexing; exports and analysis frames leave them out.
+DERIVED_LISTING_COLUMNS = frozenset({"equipment_mask"})
+
+
+class EquipmentOption(Base):
+    """Equipment dictionary; ``id`` is the bit position in ``listings.equipment_mask``."""
+
+    __tablename__ = "equipment_options"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+    name: Mapped[str] = mapped_column(String(255), nullable=False, unique=True)
+
+
+class SchemaMigration(Base):
+    __tablename__ = "schema_migrations"
+
+    version: Mapped[int] = mapped_column(Integer, primary_key=True)
+    name: Mapped[str] = mapped_column(String(100), nullable=False)
+    applied_at: Mapped[object] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+
+class MarketSegmentStats(Base):
+    """Running totals per market segment, maintained alongside listing upserts."""
+
+    __tablename__ = "market_segment_stats"
+
+    make: Mapped[str] = mapped_column(String(100), primary_key=True)
+    model: Mapped[str] = mapped_column(String(100), primary_key=True)
+    production_year: Mapped[int] = mapped_column(Integer, primary_key=True)
+    fuel_type: Mapped[str] = mapped_column(String(100), primary_key=True)
+    listing_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    priced_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    price_sum: Mapped[object] = mapped_column(Numeric(16, 2), nullable=False, default=0)
+    price_min: Mapped[object | None] = mapped_column(Numeric(12, 2))
+    price_max: Mapped[object | None] = mapped_column(Numeric(12, 2))
+    mileage_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    mileage_sum: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    mileage_min: Mapped[int | None] = mapped_column(Integer)
+    mileage_max: Mapped[int | None] = mapped_column(Integer)
+
+
+class MarketPriceHistogram(Base):
+    __tablename__ = "market_price_histogram"
+
+    make: Mapped[str] = mapped_column(String(100), primary_key=True)
+    model: Mapped[str] = mapped_column(String(100), primary_key=True)
+    production_year: Mapped[int] = mapped_column(Integer, primary_key=True)
+    fuel_type: Mapped[str] = mapped_column(String(100), primary_key=True)
+    bucket_start: Mapped[int] = mapped_column(Integer, primary_key=True)
+    listing_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+
+class MarketQuantileSketch(Base):
+    """Serialized relative-error quantile sketch for one segment and metric."""
+
+    __tablename__ = "market_quantile_sketches"
+
+    make: Mapped[str] = mapped_column(String(100), primary_key=True)
+    model: Mapped[str] = mapped_column(String(100), primary_key=True)
+    production_year: Mapped[int] = mapped_column(Integer, primary_key=True)
+    fuel_type: Mapped[str] = mapped_column(String(100), primary_key=True)
+    metric: Mapped[str] = mapped_column(String(20), primary_key=True)
+    value_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    zero_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    bins: Mapped[dict[str, int]] = mapped_column(JSON, nullable=False, default=dict)
+
+
+class CrawlJob(Base):
+    """One unit of crawl work (a search shard or a detail URL) claimed by workers under a lease."""
+
+    __tablename__ = "crawl_jobs"
+    __table_args__ = (Index("ix_crawl_jobs_claim", "status", "lease_expires_at", "id"),)
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    kind: Mapped[str] = mapped_column(String(20), nullable=False)
+    job_key: Mapped[str] = mapped_column(String(1000), nullable=False, unique=True)
+    payload: Mapped[dict[str, object]] = mapped_column(JSON, nullable=False)
+    status: Mapped[str] = mapped_column(String(20), nullable=False, default="pending")
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    worker_id: Mapped[str | None] = mapped_column(String(200))
+    lease_expires_at: Mapped[object | None] = mapped_column(DateTime(timezone=True))
+    heartbeat_at: Mapped[object | None] = mapped_column(DateTime(timezone=True))
+    result: Mapped[dict[str, object] | None] = mapped_column(JSON)
+    error: Mapped[str | None] = mapped_column(Text)
+    created_at: Mapped[object] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    finished_at: Mapped[object | None] = mapped_column(DateTime(timezone=True))
+
+
+class PolitenessBucket(Base):
+    """Shared request budget per source host; see ``scraping.politeness``."""
+
+    __tablename__ = "politeness_buckets"
+
+    host: Mapped[str] = mapped_column(String(255), primary_key=True)
+    tokens: Mapped[float] = mapped_column(Float, nullable=False)
+    updated_at: Mapped[float] = mapped_column(Float, nullable=False)
+    cooldown_until: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    cooldown_reason: Mapped[str | None] = mapped_column(Text)
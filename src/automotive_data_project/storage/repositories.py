@@ -1,14 +1,19 @@
 from __future__ import annotations
 
+from collections.abc import Iterable
+from dataclasses import dataclass
 from datetime import datetime, timezone
 from decimal import Decimal
 
-from sqlalchemy import select
+from sqlalchemy import func, select
 from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import Session
 
-from automotive_data_project.storage.models import Listing
+from automotive_data_project.storage.aggregates import apply_deltas, compute_deltas, snapshot_rows
+from automotive_data_project.storage.equipment import EquipmentDictionary, listing_ids_with_equipment
+from automotive_data_project.storage.models import Listing, MarketSegmentStats
+from automotive_data_project.storage.sketches import apply_sketch_deltas
 
 UPSERT_COLUMNS = [
     "source_url",
@@ -27,10 +32,19 @@ UPSERT_COLUMNS = [
     "advert_date",
     "scraped_at",
     "equipment",
+    "equipment_mask",
     "raw_parameters",
 ]
 
 
+@dataclass(frozen=True)
+class ListingState:
+    """What is stored for a listing, for deciding whether its detail page is worth fetching again."""
+
+    price: Decimal | None
+    last_seen_at: datetime | None
+
+
 def _serialize(value: object) -> object:
     if isinstance(value, Decimal):
         return value
@@ -46,21 +60,51 @@ def _payload(record: dict[str, object]) -> dict[str, object]:
 
 
 class ListingRepository:
-    def __init__(self, session: Session) -> None:
+    def __init__(self, session: Session, maintain_aggregates: bool = True) -> None:
         self.session = session
+        self.maintain_aggregates = maintain_aggregates
+        self.equipment_dictionary = EquipmentDictionary()
 
     def existing_advert_ids(self, source: str = "otomoto") -> set[str]:
         rows = self.session.execute(select(Listing.advert_id).where(Listing.source == source)).all()
         return {row[0] for row in rows}
 
+    def listing_states(self, source: str, advert_ids: Iterable[str]) -> dict[str, ListingState]:
+        ids = list(dict.fromkeys(advert_ids))
+        states: dict[str, ListingState] = {}
+        for start in range(0, len(ids), 500):
+            statement = select(Listing.advert_id, Listing.price, Listing.last_seen_at).where(
+                Listing.source == source, Listing.advert_id.in_(ids[start : start + 500])
+            )
+            for advert_id, price, last_seen_at in self.session.execute(statement):
+                states[advert_id] = ListingState(price=price, last_seen_at=last_seen_at)
+        return states
+
+    def segment_counts(self, make: str, model: str) -> dict[int, int]:
+        """Stored listings of one make and model per production year, from the maintained segment totals."""
+        statement = (
+            select(MarketSegmentStats.production_year, func.sum(MarketSegmentStats.listing_count))
+            .where(MarketSegmentStats.make == make, MarketSegmentStats.model == model)
+            .group_by(MarketSegmentStats.production_year)
+        )
+        return {year: int(count) for year, count in self.session.execute(statement)}
+
     def upsert_many(self, records: list[dict[str, object]]) -> int:
         if not records:
             return 0
         dialect = self.session.bind.dialect.name if self.session.bind is not None else ""
         statement_factory = pg_insert if dialect == "postgresql" else sqlite_insert
+        previous = snapshot_rows(self.session.connection(), records) if self.maintain_aggregates else {}
+        # One lookup for the whole batch; the per-record masks below are then served from the cache.
+        self.equipment_dictionary.ids_for(
+            self.session.connection(), [name for record in records for name in record.get("equipment") or ()]
+        )
         count = 0
         for record in records:
             values = _payload(record)
+            values["equipment_mask"] = self.equipment_dictionary.mask_for(
+                self.session.connection(), record.get("equipment")
+            )
             insert_stmt = statement_factory(Listing).values(**values)
             update_values = {column: getattr(insert_stmt.excluded, column) for column in UPSERT_COLUMNS}
             update_values["last_seen_at"] = values["last_seen_at"]
@@ -70,4 +114,12 @@ class ListingRepository:
             )
             self.session.execute(statement)
             count += 1
+        if self.maintain_aggregates:
+            deltas = compute_deltas(previous, records)
+            apply_deltas(self.session.connection(), deltas)
+            apply_sketch_deltas(self.session.connection(), deltas)
         return count
+
+    def ids_with_equipment(self, required: Iterable[str] = (), excluded: Iterable[str] = ()) -> list[int]:
+        """Listing IDs having all ``required`` and none of the ``excluded`` equipment options."""
+        return listing_ids_with_equipment(self.session.connection(), required, excluded)
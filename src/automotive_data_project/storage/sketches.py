@@ -0,0 +1,212 @@
+"""Mergeable quantile sketches for price and mileage per market segment.
+
+The sketch buckets positive values on a logarithmic grid with ratio ``gamma = (1 + a) / (1 - a)``,
+where ``a`` is the relative accuracy (``SKETCH_RELATIVE_ACCURACY``, 1%). For any quantile ``q`` the
+estimate ``v`` satisfies ``|v - x| <= a * x`` where ``x`` is the exact lower quantile, the sorted value
+at rank ``floor(q * (n - 1))``. Zero and negative values are counted exactly in a separate bucket.
+
+Unlike t-digest or KLL, bucket counts can be decremented exactly, so a price that changes on UPSERT is
+removed from its old bucket instead of lingering in the sketch. Merging two sketches adds bucket counts.
+The number of buckets grows with ``log(max / min)``, about 800 for values between 1 and 10 million, so
+answering a quantile query does not depend on how many listings a segment holds.
+"""
+
+from __future__ import annotations
+
+import math
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+
+from sqlalchemy import Connection, delete, select
+
+from automotive_data_project.storage.aggregates import (
+    SEGMENT_COLUMNS,
+    SegmentDelta,
+    SegmentKey,
+    listing_segment_columns,
+)
+from automotive_data_project.storage.models import Listing, MarketQuantileSketch
+
+SKETCH_RELATIVE_ACCURACY = 0.01
+SKETCH_METRICS = ("price", "mileage")
+
+
+@dataclass
+class QuantileSketch:
+    relative_accuracy: float = SKETCH_RELATIVE_ACCURACY
+    bins: dict[int, int] = field(default_factory=dict)
+    zero_count: int = 0
+
+    def __post_init__(self) -> None:
+        self._gamma = (1 + self.relative_accuracy) / (1 - self.relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+
+    @property
+    def count(self) -> int:
+        return self.zero_count + sum(self.bins.values())
+
+    def _index(self, value: float) -> int:
+        return math.ceil(math.log(value) / self._log_gamma)
+
+    def _value(self, index: int) -> float:
+        return 2 * self._gamma**index / (self._gamma + 1)
+
+    def add(self, value: float, weight: int = 1) -> None:
+        """Add (or with a negative weight, remove) one observation."""
+        value = float(value)
+        if value <= 0:
+            self.zero_count += weight
+            return
+        index = self._index(value)
+        remaining = self.bins.get(index, 0) + weight
+        if remaining:
+            self.bins[index] = remaining
+        else:
+            self.bins.pop(index, None)
+
+    def remove(self, value: float) -> None:
+        self.add(value, -1)
+
+    def merge(self, other: QuantileSketch) -> None:
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Cannot merge sketches with different relative accuracy")
+        self.zero_count += other.zero_count
+        for index, weight in other.bins.items():
+            remaining = self.bins.get(index, 0) + weight
+            if remaining:
+                self.bins[index] = remaining
+            else:
+                self.bins.pop(index, None)
+
+    def quantile(self, q: float) -> float | None:
+        total = self.count
+        if total <= 0:
+            return None
+        rank = math.floor(min(max(q, 0.0), 1.0) * (total - 1))
+        if rank < self.zero_count:
+            return 0.0
+        seen = self.zero_count
+        for index in sorted(self.bins):
+            seen += self.bins[index]
+            if seen > rank:
+                return self._value(index)
+        return self._value(max(self.bins))
+
+    def to_row(self) -> dict[str, object]:
+        return {
+            "value_count": self.count,
+            "zero_count": self.zero_count,
+            "bins": {str(index): weight for index, weight in sorted(self.bins.items())},
+        }
+
+    @classmethod
+    def from_row(cls, zero_count: int, bins: dict[str, int]) -> QuantileSketch:
+        return cls(bins={int(index): int(weight) for index, weight in bins.items()}, zero_count=int(zero_count))
+
+
+def _metric_changes(delta: SegmentDelta) -> dict[str, tuple[list, list]]:
+    return {
+        "price": (delta.added_prices, delta.removed_prices),
+        "mileage": (delta.added_mileages, delta.removed_mileages),
+    }
+
+
+def _sketch_filter(key: SegmentKey, metric: str):
+    columns = [getattr(MarketQuantileSketch, column) for column in SEGMENT_COLUMNS]
+    conditions = [column == value for column, value in zip(columns, key, strict=True)]
+    return [*conditions, MarketQuantileSketch.metric == metric]
+
+
+def apply_sketch_deltas(conn: Connection, deltas: dict[SegmentKey, SegmentDelta]) -> None:
+    """Add and remove the changed values of each segment from its stored sketches."""
+    table = MarketQuantileSketch.__table__
+    for key, delta in deltas.items():
+        for metric, (added, removed) in _metric_changes(delta).items():
+            if not added and not removed:
+                continue
+            statement = select(table.c.zero_count, table.c.bins).where(*_sketch_filter(key, metric)).with_for_update()
+            row = conn.execute(statement).first()
+            sketch = QuantileSketch.from_row(row.zero_count, row.bins) if row else QuantileSketch()
+            for value in added:
+                sketch.add(float(value))
+            for value in removed:
+                sketch.remove(float(value))
+            if row is None:
+                keys = dict(zip(SEGMENT_COLUMNS, key, strict=True))
+                conn.execute(table.insert().values(**keys, metric=metric, **sketch.to_row()))
+            elif sketch.count <= 0:
+                conn.execute(delete(table).where(*_sketch_filter(key, metric)))
+            else:
+                conn.execute(table.update().where(*_sketch_filter(key, metric)).values(**sketch.to_row()))
+
+
+def _sketches_from_listings(conn: Connection) -> dict[tuple[SegmentKey, str], QuantileSketch]:
+    sketches: dict[tuple[SegmentKey, str], QuantileSketch] = {}
+    statement = select(*listing_segment_columns(), Listing.price, Listing.mileage_km)
+    for row in conn.execution_options(yield_per=5000).execute(statement):
+        key: SegmentKey = (row[0], row[1], int(row[2]), row[3])
+        for metric, value in (("price", row.price), ("mileage", row.mileage_km)):
+            if value is not None:
+                sketches.setdefault((key, metric), QuantileSketch()).add(float(value))
+    return sketches
+
+
+def rebuild_sketches(conn: Connection) -> int:
+    """Recompute all sketches from listings; returns the number of stored sketches."""
+    conn.execute(delete(MarketQuantileSketch))
+    rows = [
+        {**dict(zip(SEGMENT_COLUMNS, key, strict=True)), "metric": metric, **sketch.to_row()}
+        for (key, metric), sketch in _sketches_from_listings(conn).items()
+    ]
+    if rows:
+        conn.execute(MarketQuantileSketch.__table__.insert(), rows)
+    return len(rows)
+
+
+def _stored_sketches(
+    conn: Connection, filters: Iterable = (), metric: str | None = None
+) -> dict[tuple[SegmentKey, str], QuantileSketch]:
+    table = MarketQuantileSketch.__table__
+    statement = select(table).where(*filters)
+    if metric is not None:
+        statement = statement.where(table.c.metric == metric)
+    return {
+        (tuple(row[column] for column in SEGMENT_COLUMNS), row["metric"]): QuantileSketch.from_row(
+            row["zero_count"], row["bins"]
+        )
+        for row in conn.execute(statement).mappings()
+    }
+
+
+def verify_sketches(conn: Connection) -> list[str]:
+    expected = _sketches_from_listings(conn)
+    stored = _stored_sketches(conn)
+    problems = [f"market_quantile_sketches: missing {key}" for key in sorted(expected.keys() - stored.keys(), key=str)]
+    problems += [
+        f"market_quantile_sketches: unexpected {key}" for key in sorted(stored.keys() - expected.keys(), key=str)
+    ]
+    for key in sorted(expected.keys() & stored.keys(), key=str):
+        if (expected[key].bins, expected[key].zero_count) != (stored[key].bins, stored[key].zero_count):
+            problems.append(f"market_quantile_sketches: {key} differs from listings")
+    return problems
+
+
+def segment_quantiles(
+    conn: Connection,
+    metric: str,
+    quantiles: Iterable[float] = (0.1, 0.5, 0.9),
+    make: str | None = None,
+    model: str | None = None,
+    production_year: int | None = None,
+    fuel_type: str | None = None,
+) -> dict[float, float | None]:
+    """Estimate quantiles for every segment matching the filters by merging their stored sketches."""
+    if metric not in SKETCH_METRICS:
+        raise ValueError(f"Unknown sketch metric {metric!r}; expected one of: {', '.join(SKETCH_METRICS)}")
+    table = MarketQuantileSketch.__table__
+    requested = {"make": make, "model": model, "production_year": production_year, "fuel_type": fuel_type}
+    filters = [table.c[column] == value for column, value in requested.items() if value is not None]
+    merged = QuantileSketch()
+    for sketch in _stored_sketches(conn, filters, metric).values():
+        merged.merge(sketch)
+    return {q: merged.quantile(q) for q in quantiles}
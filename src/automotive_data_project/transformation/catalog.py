@@ -0,0 +1,201 @@
+"""Canonical make/model index built from the packaged ``data/brands_and_models.csv`` and ``data/make_names.txt``.
+
+Every spelling of a make or model is reduced to a normalized key (diacritics stripped, ``&`` and ``+`` spelled
+out, everything else non-alphanumeric collapsed to ``-``), so ``"CITROEN"``, ``"Citroën"`` and ``"citroen "``
+share one entry. Lookups are single dict hits on that key; the prefix tries are only used to suggest names
+when a lookup misses. IDs follow the order of the source files and are stable as long as rows are appended.
+"""
+
+from __future__ import annotations
+
+import csv
+import re
+import unicodedata
+from collections.abc import Iterator
+from dataclasses import dataclass, field
+from functools import lru_cache
+from importlib.resources import files
+from itertools import islice
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from importlib.resources.abc import Traversable
+
+# Shipped inside the package, so the catalog also loads from a wheel or a non-editable install.
+PACKAGE_DATA = files("automotive_data_project") / "data"
+BRANDS_AND_MODELS_CSV = PACKAGE_DATA / "brands_and_models.csv"
+MAKE_NAMES_TXT = PACKAGE_DATA / "make_names.txt"
+
+# Otomoto paths that do not follow from the name, as in scripts/pipeline/makes_and_models_scraping.py.
+MAKE_SLUG_OVERRIDES = {
+    "BMW-ALPINA": "alpina",
+    "Warszawa": "marka_warszawa",
+}
+# Letters NFKD does not decompose into a base letter and a combining mark.
+_TRANSLITERATION = str.maketrans({"ł": "l", "Ł": "L", "ø": "o", "Ø": "O", "ß": "ss"})
+_SYMBOLS = {"&": " and ", "+": " plus "}
+_NON_ALPHANUMERIC = re.compile(r"[^a-z0-9]+")
+
+
+@lru_cache(maxsize=4096)
+def catalog_key(value: str) -> str:
+    """Normalized lookup key, also the default Otomoto slug: ``"Lynk & Co"`` -> ``"lynk-and-co"``."""
+    decomposed = unicodedata.normalize("NFKD", value.translate(_TRANSLITERATION))
+    text = "".join(char for char in decomposed if not unicodedata.combining(char)).lower()
+    for symbol, spelled in _SYMBOLS.items():
+        text = text.replace(symbol, spelled)
+    return _NON_ALPHANUMERIC.sub("-", text).strip("-")
+
+
+@dataclass(frozen=True)
+class CatalogMake:
+    id: int
+    name: str
+    slug: str
+
+
+@dataclass(frozen=True)
+class CatalogModel:
+    id: int
+    make_id: int
+    name: str
+    slug: str
+
+
+@dataclass
+class _TrieNode:
+    children: dict[str, _TrieNode] = field(default_factory=dict)
+    names: list[str] = field(default_factory=list)
+
+
+class PrefixTrie:
+    """Character trie over normalized keys; each terminal node keeps the display names stored under it."""
+
+    def __init__(self) -> None:
+        self._root = _TrieNode()
+
+    def insert(self, key: str, name: str) -> None:
+        node = self._root
+        for char in key:
+            node = node.children.setdefault(char, _TrieNode())
+        if name not in node.names:
+            node.names.append(name)
+
+    def complete(self, prefix: str, limit: int = 5) -> list[str]:
+        """Names whose key starts with ``prefix``, shortest keys first."""
+        node = self._root
+        for char in prefix:
+            node = node.children.get(char)
+            if node is None:
+                return []
+        return list(islice(_breadth_first(node), limit))
+
+    def suggest(self, key: str, limit: int = 5) -> list[str]:
+        """Completions of the longest prefix of ``key`` present in the trie."""
+        node = self._root
+        for char in key:
+            child = node.children.get(char)
+            if child is None:
+                break
+            node = child
+        if node is self._root:
+            return []
+        return list(islice(_breadth_first(node), limit))
+
+
+def _breadth_first(node: _TrieNode) -> Iterator[str]:
+    level = [node]
+    while level:
+        for current in level:
+            yield from current.names
+        level = [child for current in level for _, child in sorted(current.children.items())]
+
+
+class VehicleCatalog:
+    """Normalized-key dictionaries of makes and per-make models, plus prefix tries for suggestions."""
+
+    def __init__(self) -> None:
+        self._makes: dict[str, CatalogMake] = {}
+        self._models: dict[tuple[int, str], CatalogModel] = {}
+        self._make_trie = PrefixTrie()
+        self._model_tries: dict[int, PrefixTrie] = {}
+        self._model_count = 0
+
+    def __len__(self) -> int:
+        return self._model_count
+
+    @classmethod
+    def from_files(
+        cls, pairs_csv: Traversable = BRANDS_AND_MODELS_CSV, make_names: Traversable = MAKE_NAMES_TXT
+    ) -> VehicleCatalog:
+        catalog = cls()
+        if make_names.is_file():
+            for line in make_names.read_text(encoding="utf-8").splitlines():
+                if line.strip():
+                    catalog.add_make(line.strip())
+        with pairs_csv.open(encoding="utf-8", newline="") as handle:
+            for row in csv.DictReader(handle):
+                catalog.add_model(row["Brand"].strip(), row["Model"].strip())
+        return catalog
+
+    def add_make(self, name: str) -> CatalogMake:
+        key = catalog_key(name)
+        if key in self._makes:
+            return self._makes[key]
+        make = CatalogMake(id=len(self._model_tries) + 1, name=name, slug=MAKE_SLUG_OVERRIDES.get(name, key))
+        self._makes[key] = make
+        # The URL slug is accepted as a spelling too, so "alpina" finds BMW-ALPINA.
+        self._makes.setdefault(catalog_key(make.slug), make)
+        self._make_trie.insert(key, name)
+        self._model_tries[make.id] = PrefixTrie()
+        return make
+
+    def add_model(self, make_name: str, name: str) -> CatalogModel:
+        make = self.add_make(make_name)
+        key = catalog_key(name)
+        if (make.id, key) in self._models:
+            return self._models[make.id, key]
+        self._model_count += 1
+        model = CatalogModel(id=self._model_count, make_id=make.id, name=name, slug=key)
+        self._models[make.id, key] = model
+        self._model_tries[make.id].insert(key, name)
+        return model
+
+    def make(self, value: str | None) -> CatalogMake | None:
+        return self._makes.get(catalog_key(value)) if value else None
+
+    def model(self, make: CatalogMake | str | None, value: str | None) -> CatalogModel | None:
+        if isinstance(make, str):
+            make = self.make(make)
+        if make is None or not value:
+            return None
+        return self._models.get((make.id, catalog_key(value)))
+
+    def suggest_makes(self, value: str, limit: int = 5) -> list[str]:
+        return self._make_trie.suggest(catalog_key(value), limit)
+
+    def suggest_models(self, make: CatalogMake, value: str, limit: int = 5) -> list[str]:
+        return self._model_tries[make.id].suggest(catalog_key(value), limit)
+
+    def resolve(self, make_value: str, model_value: str) -> tuple[CatalogMake, CatalogModel]:
+        """Canonical make and model for a scrape target; raises ``ValueError`` with suggestions if unknown."""
+        make = self.make(make_value)
+        if make is None:
+            raise ValueError(_unknown("make", make_value, self.suggest_makes(make_value)))
+        model = self.model(make, model_value)
+        if model is None:
+            raise ValueError(_unknown(f"{make.name} model", model_value, self.suggest_models(make, model_value)))
+        return make, model
+
+
+def _unknown(kind: str, value: str, suggestions: list[str]) -> str:
+    message = f"Unknown {kind} {value!r}"
+    if suggestions:
+        message += f"; did you mean {', '.join(suggestions)}?"
+    return message
+
+
+@lru_cache(maxsize=1)
+def load_catalog() -> VehicleCatalog:
+    """The catalog built from the packaged data files, parsed once per process."""
+    return VehicleCatalog.from_files()
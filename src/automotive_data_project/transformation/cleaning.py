@@ -1,8 +1,16 @@
 from __future__ import annotations
 
 import re
+from dataclasses import dataclass
 from datetime import datetime
 from decimal import Decimal, InvalidOperation
+from functools import lru_cache
+
+from automotive_data_project.transformation.units import UNIT_RULES, parse_unit_value
+
+# Raw strings such as "150 KM" or an advert date repeat across thousands of listings, so each
+# cleaner memoises its results. The bound keeps memory flat on long crawls with noisy input.
+CLEANING_CACHE_SIZE = 4096
 
 POLISH_MONTHS = {
     "stycznia": 1,
@@ -24,6 +32,7 @@ def digits_only(value: str | None) -> str:
     return re.sub(r"\D+", "", value or "")
 
 
+@lru_cache(maxsize=CLEANING_CACHE_SIZE)
 def clean_price(value: str | None) -> Decimal | None:
     raw = digits_only(value)
     if not raw:
@@ -34,40 +43,32 @@ def clean_price(value: str | None) -> Decimal | None:
         return None
 
 
+@lru_cache(maxsize=CLEANING_CACHE_SIZE)
 def clean_mileage(value: str | None) -> int | None:
-    raw = digits_only(value)
-    return int(raw) if raw else None
+    number = parse_unit_value(value, UNIT_RULES["mileage"])
+    return int(number) if number is not None else None
 
 
+@lru_cache(maxsize=CLEANING_CACHE_SIZE)
 def clean_engine_capacity(value: str | None) -> int | None:
-    if not value:
-        return None
-    match = re.search(r"([\d\s]+)(?:cm3|cm³|ccm)?", value.lower())
-    if not match:
-        return None
-    raw = digits_only(match.group(1))
-    return int(raw) if raw else None
+    number = parse_unit_value(value, UNIT_RULES["engine_capacity"])
+    # Whole cm3 only, as before the shared rules: "1.6" is a litre figure and stays 1, not 2.
+    return int(number) if number is not None else None
 
 
+@lru_cache(maxsize=CLEANING_CACHE_SIZE)
 def clean_power_hp(value: str | None) -> int | None:
-    if not value:
-        return None
-    compact = value.replace(" ", "").replace(",", ".").lower()
-    match = re.search(r"(\d+(?:\.\d+)?)(kw|km|hp)?", compact)
-    if not match:
-        return None
-    number = float(match.group(1))
-    unit = match.group(2)
-    if unit == "kw":
-        number *= 1.35962
-    return round(number)
+    number = parse_unit_value(value, UNIT_RULES["power"])
+    return round(number) if number is not None else None
 
 
+@lru_cache(maxsize=CLEANING_CACHE_SIZE)
 def clean_int(value: str | None) -> int | None:
     raw = digits_only(value)
     return int(raw) if raw else None
 
 
+@lru_cache(maxsize=CLEANING_CACHE_SIZE)
 def parse_polish_advert_date(value: str | None) -> datetime | None:
     if not value:
         return None
@@ -79,3 +80,39 @@ def parse_polish_advert_date(value: str | None) -> datetime | None:
     if not month:
         return None
     return datetime(int(year), month, int(day), int(hour or 0), int(minute or 0))
+
+
+CACHED_CLEANERS = (
+    clean_price,
+    clean_mileage,
+    clean_engine_capacity,
+    clean_power_hp,
+    clean_int,
+    parse_polish_advert_date,
+)
+
+
+@dataclass(frozen=True)
+class CacheStats:
+    hits: int
+    misses: int
+    size: int
+
+    @property
+    def hit_ratio(self) -> float:
+        calls = self.hits + self.misses
+        return self.hits / calls if calls else 0.0
+
+
+def cleaning_cache_stats() -> dict[str, CacheStats]:
+    """Cumulative memo-cache statistics per cleaner since the process started or the last clear."""
+    stats = {}
+    for cleaner in CACHED_CLEANERS:
+        info = cleaner.cache_info()
+        stats[cleaner.__name__] = CacheStats(hits=info.hits, misses=info.misses, size=info.currsize)
+    return stats
+
+
+def clear_cleaning_caches() -> None:
+    for cleaner in CACHED_CLEANERS:
+        cleaner.cache_clear()
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 from automotive_data_project.scraping.models import RawListing
+from automotive_data_project.transformation.catalog import load_catalog
 from automotive_data_project.transformation.cleaning import (
     clean_engine_capacity,
     clean_int,
@@ -42,4 +43,17 @@ def normalize_listing(raw: RawListing) -> dict[str, object]:
     for source_label, target_name in LABEL_MAP.items():
         if target_name not in record:
             record[target_name] = fields.get(source_label)
+    _canonicalize_make_model(record)
     return record
+
+
+def _canonicalize_make_model(record: dict[str, object]) -> None:
+    """Replace known make/model spellings with the catalog names; unknown values are kept as scraped."""
+    catalog = load_catalog()
+    make = catalog.make(record["make"])
+    if make is None:
+        return
+    record["make"] = make.name
+    model = catalog.model(make, record["model"])
+    if model is not None:
+        record["model"] = model.name
@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import logging
+import re
+from dataclasses import dataclass, field
+
+LOGGER = logging.getLogger(__name__)
+
+KW_TO_HP = 1.35962
+NUMBER = r"\d+(?:[.,]\d+)?"
+# "45.000" and "45,000" are thousands, not decimals; a plain run of digits still matches the second branch.
+GROUPED_NUMBER = r"\d{1,3}(?:[.,]\d{3})+|\d+"
+SPACES = re.compile(r"\s+")
+
+
+@dataclass(frozen=True)
+class UnitRule:
+    """How one raw column is parsed: its number format, accepted units and factors to the target unit.
+
+    The first number in the value is read together with the unit right after it; anything later, such as the
+    "(110 kW)" of "150 KM (110 kW)", is ignored. Units are compared lowercase, known ones first so that
+    "110kW/150KM" reads as kW. A value without a unit is taken to be in the target unit, and a word that is
+    not a known unit is reported as unexpected.
+    """
+
+    label: str
+    units: dict[str, float]
+    number: str = NUMBER
+    thousands: bool = False
+    dtype: str = "float64"
+    regex: re.Pattern[str] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        known = "|".join(re.escape(unit) for unit in sorted(self.units, key=len, reverse=True))
+        pattern = rf"(?i)(?P<value>{self.number})(?P<unit>{known}|[^\W\d_]+)?"
+        object.__setattr__(self, "regex", re.compile(pattern))
+
+    def number_text(self, value: str) -> str:
+        """The matched number in ``float()`` syntax."""
+        return value.replace(".", "").replace(",", "") if self.thousands else value.replace(",", ".")
+
+
+UNIT_RULES = {
+    "battery_capacity": UnitRule("battery capacity", {"kwh": 1.0}),
+    "range": UnitRule("range data", {"km": 1.0}),
+    "engine_capacity": UnitRule("engine displacement", {"cm3": 1.0, "cm³": 1.0, "ccm": 1.0}),
+    "power": UnitRule("power data", {"km": 1.0, "hp": 1.0, "kw": KW_TO_HP}),
+    "co2_emissions": UnitRule("CO2 emissions", {"g/km": 1.0}),
+    "fuel_consumption": UnitRule("fuel consumption", {"l/100km": 1.0}),
+    "mileage": UnitRule("mileage data", {"km": 1.0}, number=GROUPED_NUMBER, thousands=True, dtype="Int64"),
+    "energy_consumption": UnitRule("average energy consumption", {"kwh/100km": 1.0}),
+    "battery_health": UnitRule("battery health data", {"%": 1.0}),
+    "electric_power": UnitRule("max electric power", {"hp": 1.0, "km": 1.0, "kw": KW_TO_HP}),
+}
+
+
+def parse_unit_value(value: str | None, rule: UnitRule) -> float | None:
+    """Scalar path: parse one raw string, returning None when it has no number or an unknown unit."""
+    if not value:
+        return None
+    match = rule.regex.search(SPACES.sub("", value))
+    if not match:
+        return None
+    unit = (match.group("unit") or "").lower()
+    if unit and unit not in rule.units:
+        return None
+    return float(rule.number_text(match.group("value"))) * rule.units.get(unit, 1.0)
+
+
+def clean_series(series, rule: UnitRule):
+    """Batch path: each distinct raw value is parsed once and the results are mapped back by code.
+
+    Raises ValueError listing unexpected units, as the legacy per-column cleaners did.
+    """
+    import pandas as pd
+
+    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+    LOGGER.debug(
+        "Cleaning %s: %s distinct values for %s rows (%.1f%% reused)",
+        rule.label,
+        len(uniques),
+        len(series),
+        100 * (1 - len(uniques) / len(series)) if len(series) else 0.0,
+    )
+    cleaned = _clean_distinct(pd.Series(uniques, dtype="object"), rule)
+    return pd.Series(cleaned.array.take(codes, allow_fill=True), index=series.index, dtype=rule.dtype)
+
+
+def _clean_distinct(values, rule: UnitRule):
+    """One compiled extraction over the distinct values, units converted with NumPy factor lookups."""
+    import numpy as np
+    import pandas as pd
+
+    compact = values.astype("string").str.replace(SPACES, "", regex=True)
+    extracted = compact.str.extract(rule.regex)
+    units = extracted["unit"].str.lower()
+
+    known = list(rule.units)
+    unexpected = units[units.notna() & ~units.isin(known)].unique()
+    if len(unexpected) > 0:
+        raise ValueError(f"Unexpected units in {rule.label}: {list(unexpected)}")
+    codes = pd.Categorical(units, categories=known).codes
+
+    numbers = pd.to_numeric(extracted["value"].map(rule.number_text, na_action="ignore"), errors="coerce")
+    factors = np.asarray([rule.units[unit] for unit in known], dtype="float64")
+    scale = np.where(codes >= 0, factors[np.maximum(codes, 0)], 1.0)
+    result = pd.Series(numbers.to_numpy(dtype="float64", na_value=np.nan) * scale)
+    return result.round().astype(rule.dtype) if rule.dtype.startswith("Int") else result.astype(rule.dtype)
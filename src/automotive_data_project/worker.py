@@ -0,0 +1,182 @@
+from __future__ import annotations
+
+import logging
+import os
+import socket
+import time
+from dataclasses import dataclass, replace
+
+from automotive_data_project.config import AppConfig, ScrapeConfig
+from automotive_data_project.scraping.client import OtomotoClient, add_page_param
+from automotive_data_project.scraping.exceptions import AccessBlocked, CaptchaDetected, FetchFailed, RateLimited
+from automotive_data_project.scraping.parser import parse_listing_page, parse_offer_page, parse_total_pages
+from automotive_data_project.scraping.planner import Shard
+from automotive_data_project.scraping.watermark import KnownIdWatermark
+from automotive_data_project.storage.database import make_session_factory
+from automotive_data_project.storage.jobs import ClaimedJob, JobQueue
+from automotive_data_project.storage.repositories import ListingRepository
+from automotive_data_project.transformation.normalization import normalize_listing
+
+LOGGER = logging.getLogger(__name__)
+
+SHARD_JOB = "shard"
+DETAIL_JOB = "detail"
+SHARD_FIELDS = ("make", "model", "year_from", "year_to", "gearbox", "fuel_type", "max_pages")
+BLOCKING_ERRORS = (AccessBlocked, RateLimited, CaptchaDetected)
+
+
+@dataclass
+class WorkerStats:
+    jobs_claimed: int = 0
+    shards_done: int = 0
+    details_done: int = 0
+    detail_jobs_enqueued: int = 0
+    saved_records: int = 0
+    failed_attempts: int = 0
+    lost_leases: int = 0
+    stopped_reason: str | None = None
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def enqueue_shards(queue: JobQueue, shards: list[Shard]) -> int:
+    """Queue planned shards; finished shards with the same search URL are queued again for a re-crawl."""
+    jobs = [
+        (shard.config.search_url(), {name: getattr(shard.config, name) for name in SHARD_FIELDS}) for shard in shards
+    ]
+    return queue.enqueue(SHARD_JOB, jobs, requeue_finished=True)
+
+
+class Worker:
+    """Claims jobs from ``crawl_jobs`` until the queue is empty, a job limit is hit or the source blocks us.
+
+    Shard jobs walk the shard's result pages and queue one detail job per advert that is not stored yet.
+    Detail jobs are claimed ``batch_size`` at a time, fetched and parsed one by one, and upserted together in one
+    transaction before they are marked done. A crash between the upsert and the completion only means the
+    detail is fetched again after the lease expires; the upsert is idempotent.
+    """
+
+    def __init__(
+        self,
+        config: AppConfig,
+        queue: JobQueue,
+        worker_id: str | None = None,
+        batch_size: int = 10,
+        sleep_func=time.sleep,
+    ) -> None:
+        self.config = config
+        self.queue = queue
+        self.worker_id = worker_id or default_worker_id()
+        self.batch_size = batch_size
+        self.sleep_func = sleep_func
+        self.client = OtomotoClient(config.scrape, sleep_func=sleep_func)
+        self.session_factory = make_session_factory(queue.engine)
+        self.stats = WorkerStats()
+        with self.session_factory() as session:
+            self.known_ids = ListingRepository(session).existing_advert_ids(config.scrape.source)
+
+    def run(self, max_jobs: int | None = None, wait: bool = False, poll_seconds: float = 30.0) -> WorkerStats:
+        LOGGER.info("Worker %s started", self.worker_id)
+        while max_jobs is None or self.stats.jobs_claimed < max_jobs:
+            limit = self.batch_size if max_jobs is None else min(self.batch_size, max_jobs - self.stats.jobs_claimed)
+            jobs = self.queue.claim(self.worker_id, limit, kind=DETAIL_JOB) or self.queue.claim(
+                self.worker_id, 1, kind=SHARD_JOB
+            )
+            if not jobs:
+                if not wait:
+                    self.stats.stopped_reason = "queue_empty"
+                    break
+                self.sleep_func(poll_seconds)
+                continue
+            self.stats.jobs_claimed += len(jobs)
+            try:
+                if jobs[0].kind == SHARD_JOB:
+                    self._run_shard(jobs[0])
+                else:
+                    self._run_details(jobs)
+            except BLOCKING_ERRORS as exc:
+                self.queue.release(self.worker_id, [job.id for job in jobs])
+                self.stats.stopped_reason = exc.__class__.__name__
+                LOGGER.warning("Worker %s stopping: %s", self.worker_id, exc)
+                break
+        else:
+            self.stats.stopped_reason = "max_jobs"
+        LOGGER.info("Worker %s finished %s", self.worker_id, self.stats)
+        return self.stats
+
+    def _held(self, job_ids: list[int]) -> set[int]:
+        held = self.queue.heartbeat(self.worker_id, job_ids)
+        self.stats.lost_leases += len(set(job_ids) - held)
+        return held
+
+    def _run_shard(self, job: ClaimedJob) -> None:
+        scrape: ScrapeConfig = replace(self.config.scrape, **{name: job.payload[name] for name in SHARD_FIELDS})
+        search_url = scrape.search_url()
+        watermark = KnownIdWatermark(self.known_ids, scrape.known_id_stop) if scrape.incremental else None
+        try:
+            first_page = self.client.fetch(add_page_param(search_url, 1))
+            pages = [parse_listing_page(first_page.html, base_url=scrape.base_url)]
+            for page in range(2, min(parse_total_pages(first_page.html), scrape.max_pages) + 1):
+                if watermark is not None and watermark.reached(pages[-1]):
+                    break
+                if not self._held([job.id]):
+                    return
+                html = self.client.fetch(add_page_param(search_url, page)).html
+                pages.append(parse_listing_page(html, base_url=scrape.base_url))
+        except FetchFailed as exc:
+            self._fail(job, exc)
+            return
+
+        refs = {ref.advert_id: ref for page_refs in pages for ref in page_refs}
+        new_refs = [ref for advert_id, ref in refs.items() if advert_id not in self.known_ids]
+        enqueued = self.queue.enqueue(
+            DETAIL_JOB,
+            [(f"{scrape.source}:{ref.advert_id}", {"advert_id": ref.advert_id, "url": ref.url}) for ref in new_refs],
+        )
+        self.stats.detail_jobs_enqueued += enqueued
+        result = {"pages": len(pages), "listings_found": len(refs), "detail_jobs_enqueued": enqueued}
+        if self.queue.complete(self.worker_id, job.id, result):
+            self.stats.shards_done += 1
+
+    def _run_details(self, jobs: list[ClaimedJob]) -> None:
+        parsed: list[tuple[ClaimedJob, dict[str, object]]] = []
+        active = {job.id for job in jobs}
+        for index, job in enumerate(jobs):
+            if index:
+                active = self._held(sorted(active))
+            if job.id not in active:
+                continue
+            url = str(job.payload["url"])
+            try:
+                detail = self.client.fetch(url)
+                raw = parse_offer_page(detail.html, source_url=url, advert_id=str(job.payload["advert_id"]))
+                parsed.append((job, normalize_listing(raw)))
+            except BLOCKING_ERRORS:
+                # Keep what was already fetched; the caller releases the rest of the batch.
+                self._save(parsed)
+                raise
+            except Exception as exc:
+                LOGGER.exception("Could not fetch or parse listing %s", job.payload["advert_id"])
+                self._fail(job, exc)
+                active.discard(job.id)
+        self._save(parsed)
+
+    def _save(self, parsed: list[tuple[ClaimedJob, dict[str, object]]]) -> None:
+        if not parsed:
+            return
+        with self.session_factory.begin() as session:
+            self.stats.saved_records += ListingRepository(session).upsert_many([record for _, record in parsed])
+        for job, record in parsed:
+            self.known_ids.add(str(record["advert_id"]))
+            if self.queue.complete(self.worker_id, job.id, {"advert_id": record["advert_id"]}):
+                self.stats.details_done += 1
+            else:
+                self.stats.lost_leases += 1
+        parsed.clear()
+
+    def _fail(self, job: ClaimedJob, exc: Exception) -> None:
+        self.stats.failed_attempts += 1
+        if not self.queue.fail(self.worker_id, job.id, f"{exc.__class__.__name__}: {exc}"):
+            self.stats.lost_leases += 1
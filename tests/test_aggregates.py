@@ -0,0 +1,123 @@
+import random
+import threading
+import time
+from decimal import Decimal
+
+from sqlalchemy import select, update
+
+import automotive_data_project.storage.repositories as repositories_module
+from automotive_data_project.storage.aggregates import read_segment_stats, rebuild_aggregates, verify_aggregates
+from automotive_data_project.storage.database import init_schema, make_engine, make_session_factory
+from automotive_data_project.storage.models import MarketPriceHistogram, MarketSegmentStats
+from automotive_data_project.storage.repositories import ListingRepository
+
+
+def _record(advert_id: str, rng: random.Random) -> dict[str, object]:
+    return {
+        "advert_id": advert_id,
+        "source": "otomoto",
+        "source_url": f"https://example.test/{advert_id}",
+        "make": "Toyota",
+        "model": rng.choice(["Corolla", "Yaris"]),
+        "production_year": rng.choice([2019, 2020, None]),
+        "fuel_type": rng.choice(["Benzyna", "Hybryda"]),
+        "price": rng.choice([None, Decimal(rng.randint(30_000, 120_000))]),
+        "mileage_km": rng.choice([None, rng.randint(0, 200_000)]),
+    }
+
+
+def _session_factory(tmp_path):
+    engine = make_engine(f"sqlite+pysqlite:///{tmp_path / 'test.sqlite3'}")
+    init_schema(engine)
+    return make_session_factory(engine)
+
+
+def test_incremental_aggregates_match_full_recompute(tmp_path) -> None:
+    session_factory = _session_factory(tmp_path)
+    rng = random.Random(11)
+
+    for _ in range(6):
+        batch = [_record(str(rng.randint(1, 40)), rng) for _ in range(25)]
+        with session_factory.begin() as session:
+            ListingRepository(session).upsert_many(batch)
+
+    with session_factory.begin() as session:
+        assert verify_aggregates(session.connection()) == []
+
+
+def test_price_change_moves_histogram_bucket_and_extremes(tmp_path) -> None:
+    session_factory = _session_factory(tmp_path)
+    base = {
+        "source": "otomoto",
+        "make": "Toyota",
+        "model": "Corolla",
+        "production_year": 2020,
+        "fuel_type": "Hybryda",
+        "mileage_km": 40_000,
+    }
+    with session_factory.begin() as session:
+        repo = ListingRepository(session)
+        repo.upsert_many(
+            [
+                {**base, "advert_id": "1", "source_url": "u1", "price": Decimal("81000")},
+                {**base, "advert_id": "2", "source_url": "u2", "price": Decimal("99000")},
+            ]
+        )
+        repo.upsert_many([{**base, "advert_id": "2", "source_url": "u2", "price": Decimal("85000")}])
+
+    with session_factory() as session:
+        stats = read_segment_stats(session.connection(), make="Toyota", model="Corolla")
+        buckets = session.execute(select(MarketPriceHistogram.bucket_start, MarketPriceHistogram.listing_count)).all()
+
+    assert len(stats) == 1
+    assert stats[0]["listing_count"] == 2
+    assert stats[0]["price_max"] == Decimal("85000")
+    assert stats[0]["price_mean"] == Decimal("83000")
+    assert sorted(buckets) == [(80000, 2)]
+
+
+def test_rebuild_repairs_drifted_aggregates(tmp_path) -> None:
+    session_factory = _session_factory(tmp_path)
+    rng = random.Random(5)
+    with session_factory.begin() as session:
+        ListingRepository(session).upsert_many([_record(str(index), rng) for index in range(30)])
+        session.execute(update(MarketSegmentStats).values(listing_count=MarketSegmentStats.listing_count + 1))
+
+    with session_factory.begin() as session:
+        conn = session.connection()
+        assert verify_aggregates(conn)
+        rebuild_aggregates(conn)
+        assert verify_aggregates(conn) == []
+
+
+def test_concurrent_upserts_of_one_advert_do_not_double_count(tmp_path, monkeypatch) -> None:
+    session_factory = _session_factory(tmp_path)
+    a_snapshotted = threading.Event()
+    real_snapshot = repositories_module.snapshot_rows
+
+    def slow_snapshot(conn, records):
+        snapshot = real_snapshot(conn, records)
+        if threading.current_thread() is threading.main_thread():
+            a_snapshotted.set()
+            # Give the other writer time to commit between this snapshot and the upsert, if nothing blocks it.
+            time.sleep(0.3)
+        return snapshot
+
+    monkeypatch.setattr(repositories_module, "snapshot_rows", slow_snapshot)
+    rng = random.Random(3)
+    first, second = _record("7", rng), {**_record("7", rng), "price": Decimal(61_000)}
+
+    def other_writer() -> None:
+        a_snapshotted.wait()
+        with session_factory.begin() as session:
+            ListingRepository(session).upsert_many([second])
+
+    thread = threading.Thread(target=other_writer)
+    thread.start()
+    with session_factory.begin() as session:
+        ListingRepository(session).upsert_many([first])
+    thread.join()
+
+    with session_factory.begin() as session:
+        assert verify_aggregates(session.connection()) == []
+        assert sum(row.listing_count for row in session.scalars(select(MarketSegmentStats))) == 1
@@ -0,0 +1,42 @@
+import pytest
+
+from automotive_data_project.config import ScrapeConfig, slugify
+from automotive_data_project.transformation.catalog import VehicleCatalog, catalog_key, load_catalog
+
+
+def test_catalog_key_handles_diacritics_symbols_and_case() -> None:
+    assert catalog_key("Citroën") == "citroen"
+    assert catalog_key(" Lynk & Co ") == "lynk-and-co"
+    assert catalog_key("Wołga") == "wolga"
+    assert catalog_key("Prius+") == "prius-plus"
+    assert slugify("Mercedes-Benz") == "mercedes-benz"
+
+
+def test_catalog_resolves_spellings_and_suggests_on_miss(tmp_path) -> None:
+    pairs = tmp_path / "pairs.csv"
+    pairs.write_text(
+        "Brand,Model\nToyota,Corolla\nToyota,Corolla Cross\nToyota,Prius\nToyota,Prius+\nBMW-ALPINA,B3\n",
+        encoding="utf-8",
+    )
+    catalog = VehicleCatalog.from_files(pairs, tmp_path / "missing.txt")
+
+    assert catalog.make("TOYOTA ").name == "Toyota"
+    assert catalog.make("alpina").slug == "alpina"
+    assert catalog.model("toyota", "prius +").name == "Prius+"
+    assert catalog.model("toyota", "prius").name == "Prius"
+    assert catalog.model("BMW-ALPINA", "Corolla") is None
+
+    with pytest.raises(ValueError, match="did you mean Toyota"):
+        catalog.resolve("Toyot", "Corolla")
+    with pytest.raises(ValueError, match="did you mean Corolla, Corolla Cross"):
+        catalog.resolve("Toyota", "Corola")
+
+
+def test_search_url_uses_catalog_slugs_and_validation_rejects_unknown_targets() -> None:
+    assert len(load_catalog()) > 2000
+    assert "/osobowe/alpina/b3?" in ScrapeConfig(make="BMW-ALPINA", model="B3").search_url()
+    assert "/osobowe/citroen/c-elysee?" in ScrapeConfig(make="Citroën", model="C-Elysée").search_url()
+
+    ScrapeConfig(make="toyota", model="corolla").validate_target()
+    with pytest.raises(ValueError, match="Unknown Toyota model"):
+        ScrapeConfig(make="Toyota", model="Corola").validate_target()
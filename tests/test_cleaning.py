@@ -1,10 +1,14 @@
 from decimal import Decimal
 
+import pytest
+
 from automotive_data_project.transformation.cleaning import (
     clean_engine_capacity,
     clean_mileage,
     clean_power_hp,
     clean_price,
+    cleaning_cache_stats,
+    clear_cleaning_caches,
 )
 
 
@@ -23,3 +27,29 @@ def test_clean_power_hp_from_hp_and_kw() -> None:
 
 def test_clean_engine_capacity() -> None:
     assert clean_engine_capacity("1 798 cm3") == 1798
+
+
+@pytest.mark.parametrize(
+    ("cleaner", "raw", "expected"),
+    [
+        (clean_mileage, "45.000 km", 45000),
+        (clean_mileage, "45,000 km", 45000),
+        (clean_power_hp, "150 KM (110 kW)", 150),
+        (clean_power_hp, "110 kW / 150 KM", 150),
+        (clean_engine_capacity, "1.6", 1),
+    ],
+)
+def test_cleaners_keep_separator_and_trailing_text_handling(cleaner, raw, expected) -> None:
+    assert cleaner(raw) == expected
+
+
+def test_cleaners_memoise_repeated_raw_values() -> None:
+    clear_cleaning_caches()
+
+    for _ in range(4):
+        assert clean_power_hp("150 KM") == 150
+    assert clean_power_hp("90 kW") == 122
+
+    stats = cleaning_cache_stats()["clean_power_hp"]
+    assert (stats.hits, stats.misses, stats.size) == (3, 2, 2)
+    assert stats.hit_ratio == 0.6
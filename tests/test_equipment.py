@@ -0,0 +1,139 @@
+import threading
+import time
+
+import pytest
+from sqlalchemy import Column, Index, MetaData, Table, insert, inspect, select
+
+from automotive_data_project.storage.database import init_schema, make_engine, make_session_factory
+from automotive_data_project.storage.equipment import (
+    EquipmentDictionary,
+    decode_mask,
+    encode_mask,
+    mask_option_ids,
+    seed_equipment_options,
+)
+from automotive_data_project.storage.models import EquipmentOption, Listing
+from automotive_data_project.storage.repositories import ListingRepository
+
+
+def _record(advert_id: str, equipment: list[str] | None) -> dict[str, object]:
+    return {
+        "advert_id": advert_id,
+        "source": "otomoto",
+        "source_url": f"https://example.test/{advert_id}",
+        "make": "Toyota",
+        "equipment": equipment,
+    }
+
+
+def _session_factory(tmp_path):
+    engine = make_engine(f"sqlite+pysqlite:///{tmp_path / 'test.sqlite3'}")
+    init_schema(engine)
+    return make_session_factory(engine)
+
+
+def test_mask_round_trip() -> None:
+    mask = encode_mask([1, 9, 170])
+
+    assert mask_option_ids(mask) == {1, 9, 170}
+    assert decode_mask(mask) == (1 << 1) | (1 << 9) | (1 << 170)
+    assert encode_mask([]) is None
+
+
+def test_filter_by_required_and_excluded_equipment(tmp_path) -> None:
+    session_factory = _session_factory(tmp_path)
+    with session_factory.begin() as session:
+        ListingRepository(session).upsert_many(
+            [
+                _record("1", ["ABS", "Android Auto", "Apple CarPlay", "Tempomat aktywny"]),
+                _record("2", ["abs", "Apple CarPlay"]),
+                _record("3", ["Apple CarPlay", "Tempomat aktywny", "Hak"]),
+                _record("4", None),
+            ]
+        )
+
+    with session_factory.begin() as session:
+        repo = ListingRepository(session)
+        advert_ids = dict(session.execute(select(Listing.id, Listing.advert_id)).all())
+
+        def adverts(**filters) -> list[str]:
+            return sorted(advert_ids[listing_id] for listing_id in repo.ids_with_equipment(**filters))
+
+        assert adverts(required=["apple carplay", "tempomat aktywny"]) == ["1", "3"]
+        assert adverts(required=["Apple CarPlay"], excluded=["hak"]) == ["1", "2"]
+        assert adverts(excluded=["abs"]) == ["3", "4"]
+        assert adverts(required=["apple carplay", "not an option"]) == []
+
+
+def test_new_names_extend_the_seeded_dictionary_and_updates_rewrite_the_mask(tmp_path) -> None:
+    session_factory = _session_factory(tmp_path)
+    with session_factory.begin() as session:
+        seeded_max = session.execute(select(EquipmentOption.id).order_by(EquipmentOption.id.desc())).scalars().first()
+        repo = ListingRepository(session)
+        repo.upsert_many([_record("1", ["abs", "Brand new gadget"])])
+        repo.upsert_many([_record("1", ["Brand new gadget"])])
+
+    with session_factory.begin() as session:
+        options = dict(session.execute(select(EquipmentOption.name, EquipmentOption.id)).all())
+        mask = session.execute(select(Listing.equipment_mask)).scalar_one()
+
+    assert options["abs"] == 1
+    assert options["brand new gadget"] == (seeded_max or 0) + 1
+    assert mask_option_ids(mask) == {options["brand new gadget"]}
+
+
+def test_migration_adds_and_backfills_equipment_masks(tmp_path) -> None:
+    engine = make_engine(f"sqlite+pysqlite:///{tmp_path / 'legacy.sqlite3'}")
+    metadata = MetaData()
+    legacy_columns = [
+        Column(column.name, column.type, primary_key=column.primary_key, server_default=column.server_default)
+        for column in Listing.__table__.columns
+        if column.name != "equipment_mask"
+    ]
+    table = Table("listings", metadata, *legacy_columns)
+    Index("uq_listings_source_advert_id", table.c.source, table.c.advert_id, unique=True)
+    metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(insert(table), [_record("1", ["ABS", "Hak"]), _record("2", [])])
+
+    init_schema(engine)
+
+    assert "equipment_mask" in {column["name"] for column in inspect(engine).get_columns("listings")}
+    with make_session_factory(engine).begin() as session:
+        repo = ListingRepository(session)
+        assert len(repo.ids_with_equipment(required=["abs", "hak"])) == 1
+        assert len(repo.ids_with_equipment(excluded=["abs"])) == 1
+
+
+def test_missing_equipment_seed_fails_loudly(tmp_path) -> None:
+    engine = make_engine(f"sqlite+pysqlite:///{tmp_path / 'test.sqlite3'}")
+    init_schema(engine)
+
+    with engine.begin() as conn, pytest.raises(FileNotFoundError, match="missing.csv"):
+        seed_equipment_options(conn, tmp_path / "missing.csv")
+
+
+def test_concurrent_writers_register_new_options_without_id_collisions(tmp_path) -> None:
+    engine = make_engine(f"sqlite+pysqlite:///{tmp_path / 'test.sqlite3'}")
+    init_schema(engine)
+    first_registered = threading.Event()
+    other_ids: list[int] = []
+
+    def other_writer() -> None:
+        first_registered.wait()
+        with engine.begin() as conn:
+            other_ids.extend(EquipmentDictionary().ids_for(conn, ["Second gadget"]))
+
+    thread = threading.Thread(target=other_writer)
+    thread.start()
+    with engine.begin() as conn:
+        first_ids = EquipmentDictionary().ids_for(conn, ["First gadget"])
+        first_registered.set()
+        # Keep the first registration uncommitted while the other writer picks its ID.
+        time.sleep(0.3)
+    thread.join()
+
+    with engine.connect() as conn:
+        options = dict(conn.execute(select(EquipmentOption.name, EquipmentOption.id)).all())
+    assert other_ids == [first_ids[0] + 1]
+    assert (options["first gadget"], options["second gadget"]) == (first_ids[0], other_ids[0])
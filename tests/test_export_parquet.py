@@ -0,0 +1,105 @@
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import insert, update
+
+from automotive_data_project.storage.database import init_schema, make_engine
+from automotive_data_project.storage.models import Listing
+
+pa = pytest.importorskip("pyarrow")
+ds = pytest.importorskip("pyarrow.dataset")
+
+from automotive_data_project.export.parquet import _utc, export_parquet, read_watermark  # noqa: E402
+
+
+def _rows(start: datetime) -> list[dict[str, object]]:
+    return [
+        {
+            "advert_id": str(index),
+            "source": "otomoto",
+            "source_url": f"https://example.test/{index}",
+            "make": "Toyota" if index % 2 else "Skoda",
+            "model": "Corolla" if index % 2 else "Octavia",
+            "production_year": 2019 + index % 2,
+            "price": Decimal("50000") + index,
+            "equipment": ["ABS", "Apple CarPlay"],
+            "raw_parameters": {"Marka pojazdu": "Toyota"},
+            "first_seen_at": start,
+            "last_seen_at": start + timedelta(minutes=index),
+        }
+        for index in range(10)
+    ]
+
+
+def test_export_partitions_decodes_json_and_advances_watermark(tmp_path) -> None:
+    engine = make_engine(f"sqlite+pysqlite:///{tmp_path / 'test.sqlite3'}")
+    init_schema(engine)
+    start = datetime(2026, 5, 1, tzinfo=timezone.utc)
+    with engine.begin() as conn:
+        conn.execute(insert(Listing), _rows(start))
+    output = tmp_path / "parquet"
+
+    first = export_parquet(engine, output, batch_size=4)
+    table = ds.dataset(output, format="parquet", partitioning="hive").to_table()
+
+    assert first.rows == 10
+    assert (output / "make=Toyota" / "production_year=2020").is_dir()
+    assert read_watermark(output) == start + timedelta(minutes=9)
+    assert table.schema.field("equipment").type == pa.list_(pa.string())
+    assert table.column("equipment").to_pylist()[0] == ["ABS", "Apple CarPlay"]
+    assert dict(table.column("raw_parameters").to_pylist()[0]) == {"Marka pojazdu": "Toyota"}
+    assert pa.types.is_dictionary(table.schema.field("model").type)
+
+    with engine.begin() as conn:
+        conn.execute(update(Listing).where(Listing.advert_id == "3").values(last_seen_at=start + timedelta(hours=1)))
+    second = export_parquet(engine, output)
+
+    assert second.rows == 1
+    assert second.previous_watermark == start + timedelta(minutes=9)
+    assert ds.dataset(output, format="parquet", partitioning="hive").count_rows() == 11
+
+
+def test_overlap_window_exports_late_commits_once(tmp_path) -> None:
+    engine = make_engine(f"sqlite+pysqlite:///{tmp_path / 'test.sqlite3'}")
+    init_schema(engine)
+    start = datetime(2026, 5, 1, tzinfo=timezone.utc)
+    rows = _rows(start)
+    with engine.begin() as conn:
+        conn.execute(insert(Listing), rows[:9])
+    output = tmp_path / "parquet"
+    export_parquet(engine, output)
+
+    # Stamped one minute before the watermark but committed after the first export.
+    late = dict(rows[9], last_seen_at=start + timedelta(minutes=7))
+    with engine.begin() as conn:
+        conn.execute(insert(Listing), [late])
+    second = export_parquet(engine, output, overlap=timedelta(minutes=5))
+    third = export_parquet(engine, output, overlap=timedelta(minutes=5))
+
+    assert second.rows == 1
+    assert second.skipped_overlap == 5
+    assert second.watermark == start + timedelta(minutes=8)
+    assert third.rows == 0
+    table = ds.dataset(output, format="parquet", partitioning="hive").to_table()
+    assert sorted(table.column("advert_id").to_pylist()) == sorted(str(index) for index in range(10))
+
+
+def test_full_export_refuses_a_non_empty_output_directory(tmp_path) -> None:
+    engine = make_engine(f"sqlite+pysqlite:///{tmp_path / 'test.sqlite3'}")
+    init_schema(engine)
+    with engine.begin() as conn:
+        conn.execute(insert(Listing), _rows(datetime(2026, 5, 1, tzinfo=timezone.utc)))
+    output = tmp_path / "parquet"
+
+    assert export_parquet(engine, output, incremental=False).rows == 10
+    with pytest.raises(FileExistsError):
+        export_parquet(engine, output, incremental=False)
+    assert ds.dataset(output, format="parquet", partitioning="hive").count_rows() == 10
+
+
+def test_utc_converts_aware_values_from_other_time_zones() -> None:
+    warsaw = timezone(timedelta(hours=2))
+
+    assert _utc(datetime(2026, 5, 1, 12, tzinfo=warsaw)).isoformat() == "2026-05-01T10:00:00+00:00"
+    assert _utc(datetime(2026, 5, 1, 12)).isoformat() == "2026-05-01T12:00:00+00:00"
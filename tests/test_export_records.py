@@ -0,0 +1,72 @@
+import csv
+import io
+import json
+from datetime import datetime, timezone
+from decimal import Decimal
+
+from sqlalchemy import insert
+
+from automotive_data_project.cli import main
+from automotive_data_project.export.records import ExportFilters, export_listings, iter_listings
+from automotive_data_project.storage.database import init_schema, make_engine
+from automotive_data_project.storage.models import Listing
+
+
+def _engine(tmp_path):
+    engine = make_engine(f"sqlite+pysqlite:///{tmp_path / 'test.sqlite3'}")
+    init_schema(engine)
+    rows = [
+        {
+            "advert_id": str(index),
+            "source": "otomoto",
+            "source_url": f"https://example.test/{index}",
+            "make": "Toyota",
+            "model": "Corolla" if index < 7 else "Yaris",
+            "production_year": 2015 + index,
+            "price": Decimal("40000") + index,
+            "equipment": ["ABS"],
+            "last_seen_at": datetime(2026, 5, 1 + index, tzinfo=timezone.utc),
+        }
+        for index in range(10)
+    ]
+    with engine.begin() as conn:
+        conn.execute(insert(Listing), rows)
+    return engine
+
+
+def test_keyset_pages_cover_every_row_once(tmp_path) -> None:
+    engine = _engine(tmp_path)
+
+    ids = [row["id"] for row in iter_listings(engine, page_size=3)]
+
+    assert ids == sorted(set(ids))
+    assert len(ids) == 10
+
+
+def test_filters_and_ndjson_output(tmp_path) -> None:
+    engine = _engine(tmp_path)
+    stream = io.StringIO()
+    filters = ExportFilters(
+        make="Toyota", model="Corolla", year_from=2017, year_to=2021, seen_since=datetime(2026, 5, 4)
+    )
+
+    count = export_listings(engine, stream, "ndjson", filters, page_size=2)
+    rows = [json.loads(line) for line in stream.getvalue().splitlines()]
+
+    assert count == 4
+    assert [row["production_year"] for row in rows] == [2018, 2019, 2020, 2021]
+    assert rows[0]["price"] == "40003.00"
+    assert rows[0]["equipment"] == ["ABS"]
+
+
+def test_cli_writes_csv_file(tmp_path, monkeypatch) -> None:
+    _engine(tmp_path).dispose()
+    monkeypatch.setenv("DATABASE_URL", f"sqlite+pysqlite:///{tmp_path / 'test.sqlite3'}")
+    target = tmp_path / "listings.csv"
+
+    main(["export", "--format", "csv", "--output", str(target), "--model", "Yaris"])
+
+    with target.open(encoding="utf-8", newline="") as stream:
+        rows = list(csv.DictReader(stream))
+    assert [row["advert_id"] for row in rows] == ["7", "8", "9"]
+    assert json.loads(rows[0]["equipment"]) == ["ABS"]
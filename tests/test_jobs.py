@@ -0,0 +1,139 @@
+from dataclasses import replace
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import automotive_data_project.worker as worker_module
+from automotive_data_project.config import AppConfig, ScrapeConfig
+from automotive_data_project.scraping.client import FetchResult
+from automotive_data_project.scraping.exceptions import RateLimited
+from automotive_data_project.scraping.planner import Shard
+from automotive_data_project.storage.database import init_schema, make_engine, make_session_factory
+from automotive_data_project.storage.jobs import JobQueue
+from automotive_data_project.storage.repositories import ListingRepository
+from automotive_data_project.worker import Worker, enqueue_shards
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+    def __call__(self) -> datetime:
+        return self.now
+
+
+def make_queue(tmp_path, clock=None, **kwargs) -> JobQueue:
+    engine = make_engine(f"sqlite+pysqlite:///{tmp_path / 'jobs.sqlite3'}")
+    init_schema(engine)
+    return JobQueue(engine, clock=clock or FakeClock(), **kwargs)
+
+
+def test_claims_are_exclusive_and_expired_leases_are_reclaimed(tmp_path) -> None:
+    clock = FakeClock()
+    queue = make_queue(tmp_path, clock, lease_seconds=60, max_attempts=2)
+    assert queue.enqueue("detail", [(f"otomoto:{n}", {"n": n}) for n in range(3)]) == 3
+    assert queue.enqueue("detail", [("otomoto:0", {"n": 0})]) == 0
+
+    first = queue.claim("a", limit=2)
+    second = queue.claim("b", limit=2)
+    assert [job.payload["n"] for job in first] == [0, 1]
+    assert [job.payload["n"] for job in second] == [2]
+    assert queue.claim("c") == []
+
+    clock.now += timedelta(seconds=30)
+    assert queue.heartbeat("a", [first[0].id]) == {first[0].id}
+    assert queue.complete("b", second[0].id, {"ok": True})
+
+    # "a" stops heartbeating job 1, so it can be taken over once the lease runs out.
+    clock.now += timedelta(seconds=45)
+    reclaimed = queue.claim("c")
+    assert [(job.id, job.attempts) for job in reclaimed] == [(first[1].id, 2)]
+    assert not queue.complete("a", first[1].id)
+    assert queue.heartbeat("a", [first[0].id, first[1].id]) == {first[0].id}
+
+    # A job that keeps losing its lease is given up after max_attempts claims.
+    clock.now += timedelta(seconds=120)
+    assert [job.id for job in queue.claim("d", limit=5)] == [first[0].id]
+    assert queue.counts() == {"detail": {"done": 1, "failed": 1, "running": 1}}
+
+
+def test_failures_retry_until_max_attempts_and_release_keeps_attempts(tmp_path) -> None:
+    queue = make_queue(tmp_path, max_attempts=2)
+    queue.enqueue("detail", [("otomoto:1", {})])
+
+    job = queue.claim("a")[0]
+    assert queue.release("a", [job.id]) == 1
+    job = queue.claim("a")[0]
+    assert job.attempts == 1
+    assert queue.fail("a", job.id, "FetchFailed: HTTP 503")
+    job = queue.claim("a")[0]
+    assert queue.fail("a", job.id, "FetchFailed: HTTP 503")
+    assert queue.claim("a") == []
+    assert queue.counts() == {"detail": {"failed": 1}}
+
+    assert queue.enqueue("detail", [("otomoto:1", {})], requeue_finished=True) == 1
+    assert queue.claim("a")[0].attempts == 1
+
+
+class FakeClient:
+    blocked_after: int | None = None
+
+    def __init__(self, config: ScrapeConfig, **kwargs) -> None:
+        self.config = config
+        self.detail_fetches = 0
+
+    def fetch(self, url: str) -> FetchResult:
+        if "page=" in url:
+            return FetchResult(url, (FIXTURES / "listing_page.html").read_text(encoding="utf-8"), 200)
+        if self.blocked_after is not None and self.detail_fetches >= self.blocked_after:
+            raise RateLimited(f"HTTP 429 for {url}")
+        self.detail_fetches += 1
+        fixture = "offer_complete.html" if "1001" in url else "offer_missing_field.html"
+        return FetchResult(url, (FIXTURES / fixture).read_text(encoding="utf-8"), 200)
+
+
+def worker_config(tmp_path) -> AppConfig:
+    return AppConfig(
+        database_url=f"sqlite+pysqlite:///{tmp_path / 'jobs.sqlite3'}",
+        data_dir=tmp_path,
+        raw_html_dir=tmp_path / "html",
+        scrape=replace(ScrapeConfig(), request_delay_seconds=0, request_jitter_seconds=0),
+    )
+
+
+def test_worker_expands_shards_into_detail_jobs_and_upserts_them(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(worker_module, "OtomotoClient", FakeClient)
+    config = worker_config(tmp_path)
+    queue = make_queue(tmp_path)
+    assert enqueue_shards(queue, [Shard(replace(config.scrape, max_pages=1), 1)]) == 1
+
+    stats = Worker(config, queue, worker_id="w1", batch_size=5).run()
+
+    assert stats.shards_done == 1
+    assert stats.detail_jobs_enqueued == 2
+    assert stats.details_done == 2
+    assert stats.stopped_reason == "queue_empty"
+    with make_session_factory(queue.engine)() as session:
+        # The second detail fixture carries its own advert ID, 1003.
+        assert ListingRepository(session).existing_advert_ids() == {"1001", "1003"}
+
+    # Re-planning the same shard queues it again; adverts already stored get no new detail jobs.
+    assert enqueue_shards(queue, [Shard(replace(config.scrape, max_pages=1), 1)]) == 1
+    rerun = Worker(config, queue, worker_id="w2").run()
+    assert rerun.shards_done == 1 and rerun.detail_jobs_enqueued == 0
+
+
+def test_worker_releases_unfinished_jobs_on_blocking_signal(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(worker_module, "OtomotoClient", FakeClient)
+    monkeypatch.setattr(FakeClient, "blocked_after", 1)
+    config = worker_config(tmp_path)
+    queue = make_queue(tmp_path)
+    queue.enqueue("detail", [(f"otomoto:{n}", {"advert_id": str(n), "url": f"https://x.test/{n}"}) for n in (1, 2, 3)])
+
+    stats = Worker(config, queue, worker_id="w1", batch_size=3).run()
+
+    assert stats.stopped_reason == "RateLimited"
+    assert stats.details_done == 1
+    assert queue.counts() == {"detail": {"done": 1, "pending": 2}}
+    assert [job.attempts for job in queue.claim("w2", limit=3)] == [1, 1]
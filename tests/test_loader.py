@@ -0,0 +1,62 @@
+from datetime import datetime, timezone
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import insert
+
+from automotive_data_project.storage.database import init_schema, make_engine
+from automotive_data_project.storage.models import Listing
+
+pd = pytest.importorskip("pandas")
+pytest.importorskip("pyarrow")
+
+from automotive_data_project.analysis import loader  # noqa: E402
+
+
+def _insert(engine, start: int, count: int) -> None:
+    rows = [
+        {
+            "advert_id": str(index),
+            "source": "otomoto",
+            "source_url": f"https://example.test/{index}",
+            "make": "Toyota" if index % 3 else "Skoda",
+            "model": f"Model {index % 4}",
+            "production_year": 2010 + index % 10,
+            "price": Decimal("30000") + index,
+            "mileage_km": None if index % 5 == 0 else index * 1000,
+            "equipment": ["ABS"],
+            "last_seen_at": datetime(2026, 5, 1, 12, index % 60, tzinfo=timezone.utc),
+        }
+        for index in range(start, start + count)
+    ]
+    with engine.begin() as conn:
+        conn.execute(insert(Listing), rows)
+
+
+def test_loader_applies_dtypes_across_chunks_and_reuses_cache(tmp_path, monkeypatch) -> None:
+    engine = make_engine(f"sqlite+pysqlite:///{tmp_path / 'test.sqlite3'}")
+    init_schema(engine)
+    _insert(engine, 0, 25)
+    cache_dir = tmp_path / "cache"
+
+    frame = loader.load_listings_frame(engine, cache_dir, chunksize=7)
+
+    assert len(frame) == 25
+    assert frame["make"].dtype == "category"
+    assert set(frame["make"].cat.categories) == {"Toyota", "Skoda"}
+    assert str(frame["production_year"].dtype) == "Int16"
+    assert str(frame["mileage_km"].dtype) == "Int32"
+    assert frame["price"].dtype == "float32"
+
+    def fail(*args, **kwargs):
+        raise AssertionError("cache was not used")
+
+    monkeypatch.setattr(loader.pd, "read_sql_query", fail)
+    cached = loader.load_listings_frame(engine, cache_dir)
+    pd.testing.assert_frame_equal(cached, frame)
+
+    monkeypatch.undo()
+    _insert(engine, 25, 5)
+    refreshed = loader.load_listings_frame(engine, cache_dir)
+    assert len(refreshed) == 30
+    assert len(list(cache_dir.glob("listings-*.feather"))) == 1
@@ -0,0 +1,39 @@
+from sqlalchemy import Column, Index, MetaData, Table, inspect, select
+
+from automotive_data_project.storage.database import init_schema, make_engine
+from automotive_data_project.storage.migrations import ANALYTICAL_INDEXES, MIGRATIONS
+from automotive_data_project.storage.models import Listing, SchemaMigration
+
+
+def _create_legacy_listings(engine) -> None:
+    metadata = MetaData()
+    legacy_columns = [
+        Column(column.name, column.type, primary_key=column.primary_key, server_default=column.server_default)
+        for column in Listing.__table__.columns
+    ]
+    table = Table("listings", metadata, *legacy_columns)
+    Index("uq_listings_source_advert_id", table.c.source, table.c.advert_id, unique=True)
+    metadata.create_all(engine)
+
+
+def test_init_schema_adds_indexes_to_existing_listings_table(tmp_path) -> None:
+    engine = make_engine(f"sqlite+pysqlite:///{tmp_path / 'legacy.sqlite3'}")
+    _create_legacy_listings(engine)
+    before = {index["name"] for index in inspect(engine).get_indexes("listings")}
+
+    init_schema(engine)
+    after = {index["name"] for index in inspect(engine).get_indexes("listings")}
+
+    assert not before & set(ANALYTICAL_INDEXES)
+    assert set(ANALYTICAL_INDEXES) <= after
+
+
+def test_migrations_are_recorded_once(tmp_path) -> None:
+    engine = make_engine(f"sqlite+pysqlite:///{tmp_path / 'test.sqlite3'}")
+
+    init_schema(engine)
+    init_schema(engine)
+
+    with engine.connect() as conn:
+        versions = conn.execute(select(SchemaMigration.version)).scalars().all()
+    assert sorted(versions) == [migration.version for migration in MIGRATIONS]
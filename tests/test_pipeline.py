@@ -1,9 +1,15 @@
 from dataclasses import replace
 from pathlib import Path
 
+import pytest
+
 import automotive_data_project.pipeline as pipeline_module
-from automotive_data_project.config import AppConfig, ScrapeConfig
+from automotive_data_project.config import AppConfig, ScrapeConfig, load_targets
 from automotive_data_project.scraping.client import FetchResult
+from automotive_data_project.scraping.exceptions import FetchFailed, RateLimited
+from automotive_data_project.scraping.models import ListingRef
+from automotive_data_project.scraping.retry import RetryQueue
+from automotive_data_project.scraping.watermark import KnownIdWatermark
 from automotive_data_project.storage.database import init_schema, make_engine, make_session_factory
 from automotive_data_project.storage.repositories import ListingRepository
 
@@ -21,6 +27,9 @@ class FakeClient:
             return FetchResult(url, (FIXTURES / "offer_complete.html").read_text(encoding="utf-8"), 200)
         return FetchResult(url, (FIXTURES / "offer_missing_field.html").read_text(encoding="utf-8"), 200)
 
+    def close(self) -> None:
+        pass
+
     def save_debug_html(self, html: str, target_dir: Path, name: str) -> Path:
         target_dir.mkdir(parents=True, exist_ok=True)
         path = target_dir / name
@@ -63,3 +72,184 @@ def test_repository_deduplication_reads_existing_ids(tmp_path) -> None:
             ]
         )
         assert repo.existing_advert_ids("otomoto") == {"1001"}
+
+
+def test_run_batch_shares_one_client_and_stops_on_blocking_signal(tmp_path, monkeypatch) -> None:
+    clients: list[FakeClient] = []
+
+    class TrackingClient(FakeClient):
+        def __init__(self, config: ScrapeConfig) -> None:
+            super().__init__(config)
+            clients.append(self)
+
+        def fetch(self, url: str) -> FetchResult:
+            if "/honda/" in url:
+                raise RateLimited(f"HTTP 429 for {url}")
+            return super().fetch(url)
+
+    monkeypatch.setattr(pipeline_module, "OtomotoClient", TrackingClient)
+    targets_csv = tmp_path / "targets.csv"
+    targets_csv.write_text(
+        "make,model,year_from,max_listings\nToyota,Corolla,2019,1\nToyota,Corolla,2020,\nHonda,Civic,,\nBMW,X3,,\n",
+        encoding="utf-8",
+    )
+    base = replace(ScrapeConfig(), max_pages=1, max_listings=5, request_delay_seconds=0, request_jitter_seconds=0)
+    targets = load_targets(targets_csv, base)
+    assert [(t.make, t.year_from, t.max_listings) for t in targets][:2] == [("Toyota", 2019, 1), ("Toyota", 2020, 5)]
+    config = AppConfig(
+        database_url=f"sqlite+pysqlite:///{tmp_path / 'test.sqlite3'}",
+        data_dir=tmp_path,
+        raw_html_dir=tmp_path / "html",
+        scrape=base,
+    )
+
+    batch = pipeline_module.run_batch(config, targets)
+
+    assert len(clients) == 1
+    assert [stats.saved_records for _, stats in batch.targets] == [1, 1, 0]
+    assert batch.targets[1][1].skipped_duplicates == 1
+    assert batch.stopped_reason == "RateLimited"
+    assert batch.total.saved_records == 2
+    assert batch.total.pages_visited == 2
+
+
+def test_load_targets_reads_yaml(tmp_path) -> None:
+    pytest.importorskip("yaml")
+    path = tmp_path / "targets.yaml"
+    path.write_text("targets:\n  - {make: Toyota, model: Corolla, gearbox: automatic}\n", encoding="utf-8")
+
+    (target,) = load_targets(path, ScrapeConfig(year_from=2015))
+
+    assert (target.make, target.gearbox, target.year_from) == ("Toyota", "automatic", 2015)
+    with pytest.raises(ValueError, match="unknown fields colour"):
+        path.write_text("- {make: Toyota, colour: red}\n", encoding="utf-8")
+        load_targets(path, ScrapeConfig())
+
+
+def test_incremental_crawl_orders_newest_first_and_stops_at_known_ids(tmp_path, monkeypatch) -> None:
+    fetched: list[str] = []
+
+    class RecordingClient(FakeClient):
+        def fetch(self, url: str) -> FetchResult:
+            fetched.append(url)
+            return super().fetch(url)
+
+    monkeypatch.setattr(pipeline_module, "OtomotoClient", RecordingClient)
+    scrape = replace(ScrapeConfig(), max_pages=5, request_delay_seconds=0, incremental=True)
+    config = AppConfig(
+        database_url=f"sqlite+pysqlite:///{tmp_path / 'test.sqlite3'}",
+        data_dir=tmp_path,
+        raw_html_dir=tmp_path / "html",
+        scrape=scrape,
+    )
+    engine = make_engine(config.database_url)
+    init_schema(engine)
+    with make_session_factory(engine).begin() as session:
+        ListingRepository(session).upsert_many(
+            [
+                {"advert_id": advert_id, "source": "otomoto", "source_url": "https://example.test"}
+                for advert_id in ("1001", "1002")
+            ]
+        )
+
+    stats = pipeline_module.run_pipeline(config)
+
+    assert "search%5Border%5D=created_at_first%3Adesc" in scrape.search_url()
+    assert len(fetched) == 1
+    assert (stats.pages_visited, stats.pages_skipped, stats.skipped_duplicates) == (1, 1, 2)
+
+
+def test_known_id_watermark_stops_on_known_page_or_streak() -> None:
+    def refs(*advert_ids: str) -> list[ListingRef]:
+        return [ListingRef(advert_id, f"https://example.test/{advert_id}") for advert_id in advert_ids]
+
+    assert not KnownIdWatermark({"1", "2"}).reached(refs("1", "9", "2"))
+    assert KnownIdWatermark({"1", "2"}).reached(refs("2", "1"))
+    assert not KnownIdWatermark({"1", "2"}).reached([])
+    streak = KnownIdWatermark({"1", "2", "3"}, stop_after=3)
+    assert not streak.reached(refs("9", "1", "2"))
+    assert streak.reached(refs("3", "8"))
+
+
+def test_transient_failures_are_retried_at_end_and_blocking_still_stops(tmp_path, monkeypatch) -> None:
+    failures = {"page=2": 1, "ID1001": 99, "ID1002": 2}
+    blocked: set[str] = set()
+
+    class FlakyClient(FakeClient):
+        def fetch(self, url: str) -> FetchResult:
+            for marker, remaining in failures.items():
+                if marker in url and remaining:
+                    failures[marker] -= 1
+                    raise FetchFailed(f"HTTP 503 for {url}")
+            for marker in blocked:
+                if marker in url:
+                    raise RateLimited(f"HTTP 429 for {url}", retry_after_seconds=60)
+            return super().fetch(url)
+
+    monkeypatch.setattr(pipeline_module, "OtomotoClient", FlakyClient)
+    scrape = replace(ScrapeConfig(), max_pages=2, request_delay_seconds=0, retry_backoff_seconds=0)
+    config = AppConfig(
+        database_url=f"sqlite+pysqlite:///{tmp_path / 'test.sqlite3'}",
+        data_dir=tmp_path,
+        raw_html_dir=tmp_path / "html",
+        scrape=scrape,
+    )
+
+    stats = pipeline_module.run_pipeline(config)
+
+    assert (stats.pages_visited, stats.new_listings, stats.parse_errors) == (2, 1, 0)
+    assert (stats.fetch_failures, stats.retries_recovered, stats.retries_dropped) == (6, 2, 1)
+    assert stats.stopped_reason is None
+
+    failures.update({"ID1001": 1})
+    blocked.add("ID1001")
+    stats = pipeline_module.run_pipeline(config, replace(scrape, year_from=2020))
+
+    # 1001 fails once, 1002 is saved, and the deferred retry of 1001 hits a 429 and ends the run.
+    assert (stats.stopped_reason, stats.retry_after_seconds) == ("RateLimited", 60)
+    assert (stats.new_listings, stats.fetch_failures, stats.retries_recovered) == (1, 1, 0)
+
+
+def test_retry_queue_backs_off_exponentially_within_budget() -> None:
+    now = [0.0]
+    sleeps: list[float] = []
+
+    def sleep(seconds: float) -> None:
+        sleeps.append(seconds)
+        now[0] += seconds
+
+    retries = RetryQueue(budget=2, max_attempts=3, backoff_seconds=10, clock=lambda: now[0], sleep_func=sleep)
+
+    assert retries.defer("a", attempt=1)
+    assert retries.pop() == ("a", 2)
+    assert retries.defer("a", attempt=2)
+    assert not retries.defer("b", attempt=1)
+    assert retries.pop() == ("a", 3)
+    assert sleeps == [10, 20]
+    assert not RetryQueue(budget=5, max_attempts=3, backoff_seconds=10).defer("c", attempt=3)
+
+
+def test_known_ids_are_shared_only_after_the_upsert_commits(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(pipeline_module, "OtomotoClient", FakeClient)
+    config = AppConfig(
+        database_url=f"sqlite+pysqlite:///{tmp_path / 'test.sqlite3'}",
+        data_dir=tmp_path,
+        raw_html_dir=tmp_path / "html",
+        scrape=replace(ScrapeConfig(), max_pages=1, request_delay_seconds=0, request_jitter_seconds=0),
+    )
+    resources = pipeline_module.PipelineResources.open(config)
+
+    def failing_upsert(self, records):
+        raise RuntimeError("database unavailable")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(ListingRepository, "upsert_many", failing_upsert)
+        with pytest.raises(RuntimeError):
+            pipeline_module.run_pipeline(config, resources=resources)
+    assert resources.known_advert_ids["otomoto"] == set()
+
+    stats = pipeline_module.run_pipeline(config, resources=resources)
+    resources.close()
+
+    assert stats.new_listings == stats.saved_records == 2
+    assert resources.known_advert_ids["otomoto"] == {"1001", "1002"}
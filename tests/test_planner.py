@@ -0,0 +1,106 @@
+from urllib.parse import parse_qs, urlsplit
+
+from automotive_data_project.config import FUEL_TYPES, ScrapeConfig
+from automotive_data_project.scraping.client import FetchResult
+from automotive_data_project.scraping.planner import PageCountCache, ShardPlanner
+
+
+def pagination(pages: int) -> str:
+    """A results page with one listing card and pagination up to ``pages``; an empty result page for 0."""
+    if not pages:
+        return "<main><p>No results</p></main>"
+    card = '<article data-id="1"><h2><a href="/osobowe/oferta/car-ID1.html">Car</a></h2></article>'
+    return card + "<ul>" + "".join(f"<li>{page}</li>" for page in (1, pages)) + "</ul>"
+
+
+class CountingClient:
+    """Page counts per year: 2019 is too big for one shard until it is also split by gearbox."""
+
+    PAGES_PER_YEAR = {2017: 80, 2018: 90, 2019: 300, 2020: 100}
+
+    def __init__(self) -> None:
+        self.urls: list[str] = []
+
+    def fetch(self, url: str) -> FetchResult:
+        self.urls.append(url)
+        params = {key: values[0] for key, values in parse_qs(urlsplit(url).query).items()}
+        years = range(int(params["search[filter_float_year:from]"]), int(params["search[filter_float_year:to]"]) + 1)
+        pages = sum(self.PAGES_PER_YEAR.get(year, 0) for year in years)
+        if "search[filter_enum_gearbox]" in params:
+            pages //= 2
+        return FetchResult(url, pagination(pages), 200)
+
+
+def test_planner_splits_years_then_gearbox_under_budget() -> None:
+    client = CountingClient()
+    planner = ShardPlanner(client, page_budget=200)
+
+    shards = planner.plan(ScrapeConfig(year_from=2017, year_to=2020))
+
+    assert [(s.config.year_from, s.config.year_to, s.config.gearbox, s.pages) for s in shards] == [
+        (2017, 2018, None, 170),
+        (2019, 2019, "manual", 150),
+        (2019, 2019, "automatic", 150),
+        (2020, 2020, None, 100),
+    ]
+    assert all(shard.config.max_pages == shard.pages and not shard.oversized for shard in shards)
+    assert sum(shard.pages for shard in shards) == sum(CountingClient.PAGES_PER_YEAR.values())
+    assert all("page=1" in url for url in client.urls)
+
+
+def test_page_counts_are_reused_within_ttl_and_persisted(tmp_path) -> None:
+    now = [1_000.0]
+    path = tmp_path / "page_counts.json"
+    config = ScrapeConfig(year_from=2017, year_to=2020)
+
+    client = CountingClient()
+    ShardPlanner(client, PageCountCache(60, path, clock=lambda: now[0]), page_budget=200).plan(config)
+    first_requests = len(client.urls)
+
+    replan = CountingClient()
+    planner = ShardPlanner(replan, PageCountCache(60, path, clock=lambda: now[0]), page_budget=200)
+    assert len(planner.plan(config)) == 4
+    assert replan.urls == [] and planner.requests_sent == 0
+
+    now[0] += 61
+    expired = ShardPlanner(replan, PageCountCache(60, path, clock=lambda: now[0]), page_budget=200)
+    expired.plan(config)
+    assert expired.requests_sent == first_requests
+
+
+def test_planner_records_pages_the_fuel_split_does_not_cover() -> None:
+    class UnknownFuelClient(CountingClient):
+        PAGES_PER_YEAR = {2019: 900}
+
+        def fetch(self, url: str) -> FetchResult:
+            result = super().fetch(url)
+            if "fuel_type" not in url:
+                return result
+            # A tenth of the listings has a fuel type outside FUEL_TYPES.
+            return FetchResult(url, pagination(450 * 9 // 10 // len(FUEL_TYPES)), 200)
+
+    planner = ShardPlanner(UnknownFuelClient(), page_budget=200)
+
+    shards = planner.plan(ScrapeConfig(year_from=2019, year_to=2019))
+
+    assert len(shards) == 2 * len(FUEL_TYPES)
+    assert [(gap["pages"], gap["covered_pages"]) for gap in planner.coverage_gaps] == [(450, 400), (450, 400)]
+
+
+def test_children_without_listings_count_as_zero_pages() -> None:
+    class SparseClient(CountingClient):
+        # Only manual cars in 2019, so the automatic shard is an empty result page.
+        def fetch(self, url: str) -> FetchResult:
+            if "automatic" in url:
+                self.urls.append(url)
+                return FetchResult(url, pagination(0), 200)
+            return super().fetch(url)
+
+    planner = ShardPlanner(SparseClient(), page_budget=200)
+
+    shards = planner.plan(ScrapeConfig(year_from=2019, year_to=2019))
+
+    assert [(shard.config.gearbox, shard.pages) for shard in shards] == [("manual", 150)]
+    assert planner.coverage_gaps == [
+        {"url": ScrapeConfig(year_from=2019, year_to=2019).search_url(), "pages": 300, "covered_pages": 150}
+    ]
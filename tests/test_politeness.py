@@ -0,0 +1,148 @@
+import pytest
+
+from automotive_data_project.config import ScrapeConfig
+from automotive_data_project.scraping.client import OtomotoClient
+from automotive_data_project.scraping.exceptions import CooldownActive, RateLimited
+from automotive_data_project.scraping.politeness import SharedTokenBucket
+from automotive_data_project.storage.database import make_engine
+
+
+class FakeTime:
+    def __init__(self) -> None:
+        self.now = 1_000.0
+        self.sleeps: list[float] = []
+
+    def clock(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def shared_buckets(tmp_path, fake: FakeTime, count: int = 2) -> list[SharedTokenBucket]:
+    url = f"sqlite+pysqlite:///{tmp_path / 'politeness.sqlite3'}"
+    return [
+        SharedTokenBucket(make_engine(url), "www.otomoto.pl", rate=0.25, clock=fake.clock, sleep_func=fake.sleep)
+        for _ in range(count)
+    ]
+
+
+def test_processes_sharing_a_bucket_split_one_request_rate(tmp_path) -> None:
+    fake = FakeTime()
+    first, second = shared_buckets(tmp_path, fake)
+
+    for bucket in (first, second, first, second):
+        bucket.acquire()
+
+    # Four requests at 0.25 tokens/s with a burst of one take twelve seconds, whichever process sends them.
+    assert fake.now - 1_000.0 == pytest.approx(12.0)
+    assert fake.sleeps == pytest.approx([4.0, 4.0, 4.0])
+
+
+def test_cooldown_from_one_process_stops_the_others(tmp_path) -> None:
+    fake = FakeTime()
+    first, second = shared_buckets(tmp_path, fake)
+
+    first.cooldown(60, "RateLimited")
+    with pytest.raises(CooldownActive) as raised:
+        second.acquire()
+    assert raised.value.retry_after_seconds == 61
+
+    fake.now += 61
+    second.acquire()
+
+
+class FakeResponse:
+    status_code = 429
+    text = ""
+    headers = {"Retry-After": "120"}
+
+
+class CountingSession:
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def get(self, *args, **kwargs) -> FakeResponse:
+        self.calls += 1
+        return FakeResponse()
+
+
+def test_rate_limit_seen_by_one_client_puts_the_other_into_cooldown(tmp_path) -> None:
+    fake = FakeTime()
+    first, second = shared_buckets(tmp_path, fake)
+    config = ScrapeConfig(request_jitter_seconds=0)
+    sessions = [CountingSession(), CountingSession()]
+    clients = [
+        OtomotoClient(config, session=session, sleep_func=fake.sleep, limiter=bucket)
+        for session, bucket in zip(sessions, (first, second), strict=True)
+    ]
+
+    with pytest.raises(RateLimited):
+        clients[0].fetch("https://www.otomoto.pl/osobowe")
+    with pytest.raises(CooldownActive):
+        clients[1].fetch("https://www.otomoto.pl/osobowe")
+
+    assert [session.calls for session in sessions] == [1, 0]
+
+
+class OkResponse(FakeResponse):
+    status_code = 200
+
+    def raise_for_status(self) -> None:
+        pass
+
+
+class SequenceRng:
+    def __init__(self, values: list[float]) -> None:
+        self.values = iter(values)
+
+    def uniform(self, low: float, high: float) -> float:
+        return next(self.values)
+
+
+def test_shared_bucket_does_not_shorten_a_single_clients_spacing(tmp_path) -> None:
+    fake = FakeTime()
+    (bucket,) = shared_buckets(tmp_path, fake, count=1)
+    request_times: list[float] = []
+
+    class OkSession:
+        def get(self, *args, **kwargs) -> FakeResponse:
+            request_times.append(fake.now)
+            return OkResponse()
+
+    jitters = [1.5, 0.1, 2.0, 0.7]
+    config = ScrapeConfig(request_delay_seconds=4, request_jitter_seconds=2)
+    client = OtomotoClient(config, session=OkSession(), sleep_func=fake.sleep, rng=SequenceRng(jitters), limiter=bucket)
+
+    for _ in jitters:
+        client.fetch("https://www.otomoto.pl/osobowe")
+
+    gaps = [later - earlier for earlier, later in zip(request_times, request_times[1:], strict=False)]
+    # Same spacing as without a shared bucket: the full delay plus that request's jitter.
+    assert gaps == pytest.approx([4 + jitter for jitter in jitters[1:]])
+
+
+def test_close_disposes_only_a_limiter_engine_the_client_created(tmp_path, monkeypatch) -> None:
+    config = ScrapeConfig(request_delay_seconds=4, rate_limit_url=f"sqlite+pysqlite:///{tmp_path / 'limit.sqlite3'}")
+    owned = OtomotoClient(config)
+    (shared,) = shared_buckets(tmp_path, FakeTime(), count=1)
+    borrowed = OtomotoClient(config, limiter=shared)
+    disposed: list[str] = []
+    monkeypatch.setattr(owned.limiter.engine, "dispose", lambda: disposed.append("owned"))
+    monkeypatch.setattr(shared.engine, "dispose", lambda: disposed.append("shared"))
+
+    owned.close()
+    borrowed.close()
+
+    assert disposed == ["owned"]
+
+
+def test_client_built_limiter_uses_the_clients_clock(tmp_path) -> None:
+    fake = FakeTime()
+    config = ScrapeConfig(request_delay_seconds=4, rate_limit_url=f"sqlite+pysqlite:///{tmp_path / 'limit.sqlite3'}")
+    client = OtomotoClient(config, sleep_func=fake.sleep, clock=fake.clock)
+
+    assert client.limiter.clock == fake.clock
+    assert client.limiter.sleep_func == fake.sleep
+    client.close()
@@ -0,0 +1,85 @@
+from dataclasses import replace
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from pathlib import Path
+
+import automotive_data_project.pipeline as pipeline_module
+from automotive_data_project.config import AppConfig, ScrapeConfig
+from automotive_data_project.priority import DetailCandidate, DetailQueue, DetailScorer
+from automotive_data_project.scraping.client import FetchResult
+from automotive_data_project.scraping.models import ListingRef
+from automotive_data_project.scraping.parser import parse_listing_page
+from automotive_data_project.storage.database import init_schema, make_engine, make_session_factory
+from automotive_data_project.storage.repositories import ListingRepository, ListingState
+
+FIXTURES = Path(__file__).parent / "fixtures"
+NOW = datetime(2026, 3, 1, tzinfo=timezone.utc)
+
+
+def test_listing_cards_carry_price_and_year() -> None:
+    first, second = parse_listing_page((FIXTURES / "listing_page.html").read_text(encoding="utf-8"))
+
+    assert (first.price_raw, first.production_year_raw) == ("89 900", "2020")
+    assert (second.price_raw, second.production_year_raw) == ("91 500", None)
+
+
+def test_detail_scorer_ranks_new_changed_stale_and_undersampled() -> None:
+    scorer = DetailScorer(now=NOW, segment_counts={2020: 30, 2018: 3}, segment_target=30)
+    fresh = ListingState(price=Decimal("89900"), last_seen_at=NOW - timedelta(days=1))
+
+    def candidate(price: str, year: str | None = None, stored: ListingState | None = fresh) -> DetailCandidate:
+        return DetailCandidate(ListingRef("1", "https://example.test/1", price, year), stored is not None, stored)
+
+    assert scorer(candidate("89 900")) == 0
+    assert scorer(candidate("85 000")) == 50
+    assert scorer(candidate("89 900", stored=replace(fresh, last_seen_at=datetime(2026, 2, 1)))) == 10
+    assert scorer(candidate("89 900", "2020", stored=None)) == 100
+    assert scorer(candidate("89 900", "2018", stored=None)) == 118
+    assert scorer(candidate("89 900", "2018")) == 0
+
+    queue = DetailQueue()
+    for name, score in (("a", 10), ("b", 0), ("c", 50), ("d", 50)):
+        queue.push(DetailCandidate(ListingRef(name, name), known=True), score)
+    assert [queue.pop().ref.advert_id for _ in range(len(queue))] == ["c", "d", "a"]
+
+
+def test_pipeline_spends_listing_budget_by_score(tmp_path, monkeypatch) -> None:
+    fetched: list[str] = []
+
+    class FakeClient:
+        def __init__(self, config: ScrapeConfig) -> None:
+            self.config = config
+
+        def fetch(self, url: str) -> FetchResult:
+            fetched.append(url)
+            name = "listing_page.html" if "page=" in url else "offer_complete.html"
+            return FetchResult(url, (FIXTURES / name).read_text(encoding="utf-8"), 200)
+
+        def close(self) -> None:
+            pass
+
+    monkeypatch.setattr(pipeline_module, "OtomotoClient", FakeClient)
+    config = AppConfig(
+        database_url=f"sqlite+pysqlite:///{tmp_path / 'test.sqlite3'}",
+        data_dir=tmp_path,
+        raw_html_dir=tmp_path / "html",
+        scrape=replace(ScrapeConfig(), max_pages=1, max_listings=1, request_delay_seconds=0),
+    )
+    engine = make_engine(config.database_url)
+    init_schema(engine)
+    with make_session_factory(engine).begin() as session:
+        ListingRepository(session).upsert_many(
+            [{"advert_id": "1001", "source": "otomoto", "source_url": "https://example.test", "price": Decimal(70000)}]
+        )
+
+    stats = pipeline_module.run_pipeline(config)
+
+    # 1001 is first on the page, but a listing never seen outranks a stored one with a changed price.
+    assert fetched[1].endswith("ID1002.html")
+    assert (stats.new_listings, stats.refreshed_listings, stats.stopped_reason) == (1, 0, "max_listings")
+
+    fetched.clear()
+    stats = pipeline_module.run_pipeline(config, scorer=lambda candidate: 2.0 if candidate.known else 1.0)
+
+    assert fetched[1].endswith("ID1001.html")
+    assert (stats.new_listings, stats.refreshed_listings) == (0, 1)
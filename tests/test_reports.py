@@ -0,0 +1,74 @@
+import random
+from collections import defaultdict
+from decimal import Decimal
+from statistics import mean, median
+
+import pytest
+from sqlalchemy import insert
+
+from automotive_data_project.analysis.reports import (
+    mean_price_by_fuel,
+    mean_price_by_mileage_bucket,
+    median_price_by_year,
+    offer_count_by_make_model,
+)
+from automotive_data_project.storage.database import init_schema, make_engine
+from automotive_data_project.storage.models import Listing
+
+
+@pytest.fixture()
+def rows() -> list[dict[str, object]]:
+    rng = random.Random(3)
+    result = []
+    for index in range(300):
+        result.append(
+            {
+                "advert_id": str(index),
+                "source": "otomoto",
+                "source_url": f"https://example.test/{index}",
+                "make": rng.choice(["Toyota", "Skoda", None]),
+                "model": rng.choice(["Corolla", "Octavia"]),
+                "production_year": rng.choice([2018, 2019, 2020, None]),
+                "price": None if index % 10 == 0 else Decimal(rng.randint(20_000, 150_000)),
+                "mileage_km": rng.choice([None, rng.randint(0, 300_000)]),
+                "fuel_type": rng.choice(["Benzyna", "Diesel", None]),
+            }
+        )
+    return result
+
+
+@pytest.fixture()
+def conn(tmp_path, rows):
+    engine = make_engine(f"sqlite+pysqlite:///{tmp_path / 'test.sqlite3'}")
+    init_schema(engine)
+    with engine.begin() as connection:
+        connection.execute(insert(Listing), rows)
+    with engine.connect() as connection:
+        yield connection
+
+
+def test_median_price_by_year_matches_python(conn, rows) -> None:
+    expected: dict[int, list[float]] = defaultdict(list)
+    for row in rows:
+        if row["price"] is not None and row["production_year"]:
+            expected[row["production_year"]].append(float(row["price"]))
+
+    assert median_price_by_year(conn) == [(year, median(prices)) for year, prices in sorted(expected.items())]
+
+
+def test_grouped_means_and_counts_match_python(conn, rows) -> None:
+    priced = [row for row in rows if row["price"] is not None]
+    by_fuel: dict[str, list[float]] = defaultdict(list)
+    by_bucket: dict[int, list[float]] = defaultdict(list)
+    by_make_model: dict[tuple[str, str], int] = defaultdict(int)
+    for row in priced:
+        by_fuel[row["fuel_type"] or "unknown"].append(float(row["price"]))
+        by_make_model[(row["make"] or "unknown", row["model"] or "unknown")] += 1
+        if row["mileage_km"] is not None:
+            by_bucket[row["mileage_km"] // 50000 * 50000].append(float(row["price"]))
+
+    assert mean_price_by_fuel(conn) == pytest.approx([(fuel, mean(p)) for fuel, p in sorted(by_fuel.items())])
+    assert mean_price_by_mileage_bucket(conn) == pytest.approx(
+        [(bucket, mean(p)) for bucket, p in sorted(by_bucket.items())]
+    )
+    assert {(make, model): count for make, model, count in offer_count_by_make_model(conn)} == by_make_model
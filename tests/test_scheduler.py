@@ -0,0 +1,144 @@
+import json
+import re
+from dataclasses import replace
+from pathlib import Path
+from urllib.request import urlopen
+
+import automotive_data_project.pipeline as pipeline_module
+from automotive_data_project.config import AppConfig, ScrapeConfig
+from automotive_data_project.scheduler import Scheduler, start_status_server
+from automotive_data_project.scraping.client import FetchResult
+from automotive_data_project.scraping.exceptions import RateLimited
+from automotive_data_project.storage.database import make_engine, make_session_factory
+from automotive_data_project.storage.repositories import ListingRepository
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.now += seconds
+
+
+class FakeClient:
+    instances: list["FakeClient"] = []
+    rate_limited: set[str] = set()
+
+    def __init__(self, config: ScrapeConfig, sleep_func=None) -> None:
+        self.config = config
+        self.sleep_func = sleep_func
+        self.fetched: list[str] = []
+        FakeClient.instances.append(self)
+
+    def fetch(self, url: str) -> FetchResult:
+        self.fetched.append(url)
+        if any(f"/{make}/" in url for make in self.rate_limited):
+            raise RateLimited(f"HTTP 429 for {url}", retry_after_seconds=600)
+        self.sleep_func(1.0)
+        if "page=" in url:
+            return FetchResult(url, (FIXTURES / "listing_page.html").read_text(encoding="utf-8"), 200)
+        # Serve each offer under the ID in its URL, as the site does, so stored IDs match the listing cards.
+        advert_id = re.search(r"ID(\d+)\.html", url).group(1)
+        html = (FIXTURES / "offer_complete.html").read_text(encoding="utf-8").replace("ID: 1001", f"ID: {advert_id}")
+        return FetchResult(url, html, 200)
+
+    def close(self) -> None:
+        pass
+
+
+def _setup(tmp_path, monkeypatch, rate_limited=()) -> tuple[AppConfig, list[ScrapeConfig]]:
+    FakeClient.instances = []
+    FakeClient.rate_limited = set(rate_limited)
+    monkeypatch.setattr(pipeline_module, "OtomotoClient", FakeClient)
+    base = replace(ScrapeConfig(), max_pages=1, max_listings=1, request_delay_seconds=0, cooldown_seconds=900)
+    config = AppConfig(
+        database_url=f"sqlite+pysqlite:///{tmp_path / 'test.sqlite3'}",
+        data_dir=tmp_path,
+        raw_html_dir=tmp_path / "html",
+        scrape=base,
+    )
+    return config, [replace(base, make="Toyota", model="Corolla"), replace(base, make="Honda", model="Civic")]
+
+
+def test_scheduler_runs_targets_on_interval_with_one_client(tmp_path, monkeypatch) -> None:
+    config, targets = _setup(tmp_path, monkeypatch)
+    clock = FakeClock()
+    scheduler = Scheduler(config, targets, interval_seconds=300, clock=clock, sleep_func=clock.sleep)
+
+    scheduler.serve(max_runs=6)
+
+    (client,) = FakeClient.instances
+    assert scheduler.runs == 6
+    assert [target.runs for target in scheduler.targets] == [3, 3]
+    # Each target starts 300 seconds after its previous start; requests advance the clock by one second each.
+    assert [target.next_run_at for target in scheduler.targets] == [1900, 1902]
+    # One new listing per target; later runs refresh 1002, whose card price differs from its stored offer price.
+    assert (scheduler.targets[0].totals.new_listings, scheduler.targets[0].totals.refreshed_listings) == (1, 2)
+    assert scheduler.targets[0].totals.skipped_duplicates == 2
+    assert sum("page=" in url for url in client.fetched) == 6
+
+
+def test_scheduler_reloads_known_ids_written_by_other_processes(tmp_path, monkeypatch) -> None:
+    config, targets = _setup(tmp_path, monkeypatch)
+    clock = FakeClock()
+    scheduler = Scheduler(config, targets[:1], interval_seconds=300, clock=clock, sleep_func=clock.sleep)
+    assert scheduler.run_due() == 1
+
+    engine = make_engine(config.database_url)
+    with make_session_factory(engine).begin() as session:
+        ListingRepository(session).upsert_many(
+            [{"advert_id": "5555", "source": "otomoto", "source_url": "https://example.test"}]
+        )
+    engine.dispose()
+    clock.now += 300
+    assert scheduler.run_due() == 1
+
+    assert "5555" in scheduler.resources.known_advert_ids["otomoto"]
+    scheduler.close()
+
+
+def test_scheduler_pauses_every_target_after_rate_limit(tmp_path, monkeypatch) -> None:
+    config, targets = _setup(tmp_path, monkeypatch, rate_limited={"honda"})
+    clock = FakeClock()
+    scheduler = Scheduler(config, targets[::-1], interval_seconds=60, clock=clock, sleep_func=clock.sleep)
+
+    assert scheduler.run_due() == 1
+    assert scheduler.health()["status"] == "cooling_down"
+    assert scheduler.seconds_until_next_run() == 600
+
+    scheduler.serve(max_runs=3)
+
+    honda, toyota = scheduler.targets
+    assert scheduler.cooldowns == 2
+    assert (honda.runs, toyota.runs) == (2, 1)
+    assert honda.last_stats.stopped_reason == "RateLimited"
+    assert clock.now >= 1000 + 600
+    assert "automotive_scheduler_cooldowns_total 2" in scheduler.metrics_text()
+
+
+def test_status_server_serves_health_and_metrics(tmp_path, monkeypatch) -> None:
+    config, targets = _setup(tmp_path, monkeypatch)
+    clock = FakeClock()
+    scheduler = Scheduler(config, targets[:1], interval_seconds=300, clock=clock, sleep_func=clock.sleep)
+    scheduler.run_due()
+    server = start_status_server(scheduler, port=0)
+    base_url = "http://{}:{}".format(*server.server_address[:2])
+    try:
+        with urlopen(f"{base_url}/health") as response:
+            health = json.loads(response.read())
+        with urlopen(f"{base_url}/metrics") as response:
+            metrics = response.read().decode("utf-8")
+    finally:
+        server.shutdown()
+        server.server_close()
+        scheduler.close()
+
+    assert health["status"] == "ok"
+    assert health["targets"][0]["runs"] == 1
+    assert 'automotive_scheduler_saved_records_total{target="Toyota Corolla 2019-2021"} 1' in metrics
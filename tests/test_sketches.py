@@ -0,0 +1,89 @@
+import math
+import random
+from decimal import Decimal
+
+import pytest
+
+from automotive_data_project.storage.database import init_schema, make_engine, make_session_factory
+from automotive_data_project.storage.repositories import ListingRepository
+from automotive_data_project.storage.sketches import (
+    SKETCH_RELATIVE_ACCURACY,
+    QuantileSketch,
+    segment_quantiles,
+    verify_sketches,
+)
+
+
+def _exact(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[math.floor(q * (len(ordered) - 1))]
+
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_quantiles_are_within_relative_error_bound(seed: int) -> None:
+    rng = random.Random(seed)
+    values = [round(rng.lognormvariate(11, 0.6)) for _ in range(20_000)] + [0] * 50
+    sketch = QuantileSketch()
+    for value in values:
+        sketch.add(value)
+
+    for q in (0.01, 0.1, 0.25, 0.5, 0.75, 0.9, 0.99):
+        exact = _exact(values, q)
+        assert abs(sketch.quantile(q) - exact) <= SKETCH_RELATIVE_ACCURACY * exact
+
+
+def test_merge_and_remove_match_a_sketch_built_directly() -> None:
+    rng = random.Random(9)
+    kept = [rng.randint(1_000, 300_000) for _ in range(2_000)]
+    dropped = [rng.randint(1_000, 300_000) for _ in range(500)]
+    left, right, direct = QuantileSketch(), QuantileSketch(), QuantileSketch()
+    for value in kept[:1_000] + dropped:
+        left.add(value)
+    for value in kept[1_000:]:
+        right.add(value)
+    for value in kept:
+        direct.add(value)
+
+    left.merge(right)
+    for value in dropped:
+        left.remove(value)
+
+    assert left.bins == direct.bins
+    assert left.count == len(kept)
+
+
+def test_upserts_keep_stored_sketches_consistent(tmp_path) -> None:
+    engine = make_engine(f"sqlite+pysqlite:///{tmp_path / 'test.sqlite3'}")
+    init_schema(engine)
+    session_factory = make_session_factory(engine)
+    rng = random.Random(4)
+    prices: dict[str, int] = {}
+
+    for _ in range(5):
+        batch = []
+        for _ in range(60):
+            advert_id = str(rng.randint(1, 150))
+            prices[advert_id] = rng.randint(20_000, 160_000)
+            batch.append(
+                {
+                    "advert_id": advert_id,
+                    "source": "otomoto",
+                    "source_url": f"https://example.test/{advert_id}",
+                    "make": "Toyota",
+                    "model": "Corolla",
+                    "production_year": 2018 + int(advert_id) % 3,
+                    "fuel_type": "Benzyna",
+                    "price": Decimal(prices[advert_id]),
+                }
+            )
+        with session_factory.begin() as session:
+            ListingRepository(session).upsert_many(batch)
+
+    with session_factory() as session:
+        conn = session.connection()
+        assert verify_sketches(conn) == []
+        estimates = segment_quantiles(conn, "price", make="Toyota", model="Corolla")
+
+    for q, estimate in estimates.items():
+        exact = _exact(list(prices.values()), q)
+        assert abs(estimate - exact) <= SKETCH_RELATIVE_ACCURACY * exact
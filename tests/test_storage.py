@@ -1,6 +1,7 @@
 from datetime import datetime, timezone
 from decimal import Decimal
 
+import pytest
 from sqlalchemy import select
 
 from automotive_data_project.storage.database import init_schema, make_engine, make_session_factory
@@ -48,3 +49,21 @@ def test_upsert_existing_offer_updates_without_duplicate() -> None:
     assert listings[0].price == Decimal("91000.00")
     assert listings[0].first_seen_at == first_seen
     assert listings[0].last_seen_at is not None
+
+
+def test_default_profile_applies_sqlite_pragmas(tmp_path) -> None:
+    engine = make_engine(f"sqlite+pysqlite:///{tmp_path / 'test.sqlite3'}", "default")
+
+    with engine.connect() as conn:
+        journal_mode = conn.exec_driver_sql("PRAGMA journal_mode").scalar_one()
+        synchronous = conn.exec_driver_sql("PRAGMA synchronous").scalar_one()
+        temp_store = conn.exec_driver_sql("PRAGMA temp_store").scalar_one()
+
+    assert journal_mode == "wal"
+    assert synchronous == 1
+    assert temp_store == 2
+
+
+def test_unknown_engine_profile_is_rejected() -> None:
+    with pytest.raises(ValueError, match="Unknown engine profile"):
+        make_engine("sqlite+pysqlite:///:memory:", "turbo")
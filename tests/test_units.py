@@ -0,0 +1,61 @@
+import math
+
+import pytest
+
+from automotive_data_project.transformation.units import UNIT_RULES, parse_unit_value
+
+SAMPLES = {
+    "power": ["150 KM", "90 kW", "1 000 kW", "122", "150 KM (110 kW)", "110 kW / 150 KM", None],
+    "engine_capacity": ["1 598 cm3", "1 798 cm³", "999ccm", None],
+    "mileage": ["45 000 km", "120000 KM", "45.000 km", "45,000 km", None],
+    "fuel_consumption": ["7,8 l/100km", "5.4 l/100km", None],
+    "battery_health": ["98 %", None],
+    "energy_consumption": ["15,5 kWh/100km", None],
+}
+
+
+def test_scalar_power_conversion() -> None:
+    assert parse_unit_value("90 kW", UNIT_RULES["power"]) == pytest.approx(122.3658)
+    assert parse_unit_value("150 KM", UNIT_RULES["power"]) == 150
+    assert parse_unit_value("150 Nm", UNIT_RULES["power"]) is None
+
+
+@pytest.mark.parametrize("rule_name", sorted(SAMPLES))
+def test_batch_and_scalar_paths_agree(rule_name: str) -> None:
+    pd = pytest.importorskip("pandas")
+    rule = UNIT_RULES[rule_name]
+    values = SAMPLES[rule_name]
+
+    batch = pd.Series(values, dtype="object").pipe(lambda series: _clean(series, rule)).tolist()
+    scalar = [parse_unit_value(value, rule) for value in values]
+
+    for batch_value, scalar_value in zip(batch, scalar, strict=True):
+        if scalar_value is None:
+            assert batch_value is pd.NA or (isinstance(batch_value, float) and math.isnan(batch_value))
+        else:
+            assert batch_value == pytest.approx(round(scalar_value) if rule.dtype == "Int64" else scalar_value)
+
+
+def test_batch_path_rejects_unexpected_units() -> None:
+    pd = pytest.importorskip("pandas")
+
+    with pytest.raises(ValueError, match="Unexpected units in power data"):
+        _clean(pd.Series(["150 KM", "300 Nm"]), UNIT_RULES["power"])
+
+
+def _clean(series, rule):
+    from automotive_data_project.transformation.units import clean_series
+
+    return clean_series(series, rule)
+
+
+def test_batch_path_maps_distinct_results_back_to_every_row() -> None:
+    pd = pytest.importorskip("pandas")
+    series = pd.Series(["150 KM", None, "90 kW", "150 KM", "90 kW"], index=[10, 11, 12, 13, 14])
+
+    cleaned = _clean(series, UNIT_RULES["power"])
+
+    assert cleaned.index.tolist() == [10, 11, 12, 13, 14]
+    assert cleaned.isna().tolist() == [False, True, False, False, False]
+    assert cleaned[[10, 13]].tolist() == [150.0, 150.0]
+    assert cleaned[[12, 14]].tolist() == pytest.approx([122.3658, 122.3658])